@@ -0,0 +1,11 @@
+import reflex as rx
+
+# structure that holds one row of the background jobs table on the admin page
+class Job(rx.Base):
+    id: int
+    kind: str
+    description: str
+    status: str
+    summary: str = ""
+    created_by: str = ""
+    created_at: str = ""
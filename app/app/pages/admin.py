@@ -4,7 +4,7 @@ import reflex as rx
 from ..state import State
 from ..components import require_google_login, navigation_bar, require_privilege
 
-@rx.page(route="/admin",on_load=State.unprivileged_redirect)
+@rx.page(route="/admin",on_load=[State.unprivileged_redirect, State.poll_jobs])
 @require_google_login
 @require_privilege
 def admin_page() -> rx.Component:
@@ -46,6 +46,68 @@ def admin_page() -> rx.Component:
                     on_click=State.populate_database,
                     margin_top="10px"
                 ),
+                rx.button(
+                    "Enrich Placeholders",
+                    on_click=State.enqueue_job("enrich"),
+                    margin_top="10px"
+                ),
+                rx.button(
+                    "Compute Metrics",
+                    on_click=State.enqueue_job("metrics"),
+                    margin_top="10px"
+                ),
+                rx.button(
+                    "Retrain Model",
+                    on_click=State.enqueue_job("retrain"),
+                    margin_top="10px"
+                ),
+                rx.button(
+                    "Compress Abstracts",
+                    on_click=State.enqueue_job("compress"),
+                    margin_top="10px"
+                ),
+                rx.button(
+                    "Export Snapshot",
+                    on_click=State.enqueue_job("snapshot"),
+                    margin_top="10px"
+                ),
+            ),
+
+            # Background jobs, refreshed while any of them is queued or running
+            rx.table.root(
+                rx.table.header(
+                    rx.table.row(
+                        rx.table.column_header_cell("Job"),
+                        rx.table.column_header_cell("Kind"),
+                        rx.table.column_header_cell("Details"),
+                        rx.table.column_header_cell("Status"),
+                        rx.table.column_header_cell("Result"),
+                        rx.table.column_header_cell("Queued by"),
+                        rx.table.column_header_cell("Queued at"),
+                    ),
+                ),
+                rx.table.body(
+                    rx.foreach(
+                        State.jobs,
+                        lambda job: rx.table.row(
+                            rx.table.cell(job.id),
+                            rx.table.cell(job.kind),
+                            rx.table.cell(job.description),
+                            rx.table.cell(
+                                rx.hstack(
+                                    rx.spinner(loading=(job.status == "running") | (job.status == "queued")),
+                                    rx.text(job.status),
+                                    spacing="1",
+                                )
+                            ),
+                            rx.table.cell(job.summary),
+                            rx.table.cell(job.created_by),
+                            rx.table.cell(job.created_at),
+                        )
+                    )
+                ),
+                margin_top="20px",
+                width="100%"
             ),
             
             # Display results
@@ -11,19 +11,93 @@ from google.oauth2.id_token import verify_oauth2_token
 
 # for article serach app
 from .article import Article
+from .job import Job
 from model.RankModel import RankModel
 from database.DatabaseManager import DatabaseManager
-from database.populate_db import DatabaseSearchService
+from database.job_worker import JOB_HANDLERS
 
 # to export csv
 import csv
 from io import StringIO
 
+# to keep blocking work off the event loop
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 load_dotenv()
 CLIENT_ID = os.getenv('CLIENT_ID')
 
 G_db_manager: DatabaseManager = DatabaseManager()
 
+# Ranking runs psycopg2 queries and pandas/sklearn work synchronously, so searches are run on
+# this pool instead of the asyncio event loop that serves every connected user.
+G_search_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('SEARCH_WORKERS', '4')),
+    thread_name_prefix='search'
+)
+
+# Seconds between refreshes of the jobs table while a job is queued or running
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', '3'))
+
+def describe_job(row) -> Job:
+    """Turn a DatabaseManager.get_jobs row into a Job for the admin page."""
+    job_id, kind, params, status, result, error, created_by, created_at, _, _ = row
+    params = json.loads(params or '{}')
+    result = json.loads(result) if result else None
+    if kind == 'ingest':
+        description = f"'{params.get('query', '')}', {params.get('num_articles', '')} articles"
+    elif kind == 'enrich':
+        description = f"from {params.get('source', 'openalex')}"
+    else:
+        description = ""
+    if error:
+        summary = error
+    elif kind == 'ingest' and result:
+        inserted = sum(stats.get('inserted', 0) for stats in result.values())
+        failed = [name for name, stats in result.items() if stats.get('error')]
+        summary = f"{inserted} inserted" + (f", {', '.join(failed)} failed" if failed else "")
+    elif kind == 'enrich' and result:
+        summary = f"{result.get('updated', 0)} updated"
+    elif kind == 'compress' and result:
+        summary = f"{result.get('compressed', 0)} compressed"
+    elif kind == 'snapshot' and result:
+        summary = f"{result.get('row_count', 0)} papers in {result.get('version', '')}"
+    else:
+        summary = ""
+    return Job(
+        id=job_id,
+        kind=kind,
+        description=description,
+        status=status,
+        summary=summary,
+        created_by=created_by or "",
+        created_at=created_at.strftime("%Y-%m-%d %H:%M:%S") if created_at else "",
+    )
+
+def rank_articles(keywords: str, num_articles: int):
+    """Rank articles for a query with a fresh RankModel. Blocking; run it on G_search_executor."""
+    rank_model = RankModel()
+    try:
+        return rank_model.rank_articles(keywords, num_articles=num_articles)
+    finally:
+        rank_model.close()
+
+def fetch_jobs():
+    """The jobs table for the admin page, read on its own connection. Blocking; run it on G_search_executor."""
+    db_manager = DatabaseManager()
+    try:
+        return [describe_job(row) for row in db_manager.get_jobs()]
+    finally:
+        db_manager.close()
+
+def queue_job(kind: str, params: dict | None = None, created_by: str | None = None):
+    """Queue a background job on its own connection and return its id (None on failure). Blocking; run it on G_search_executor."""
+    db_manager = DatabaseManager()
+    try:
+        return db_manager.enqueue_job(kind, params, created_by=created_by)
+    finally:
+        db_manager.close()
+
 class State(rx.State):
     # Google OAUTH token
     id_token_json: str = rx.LocalStorage()
@@ -52,6 +126,10 @@ class State(rx.State):
     # admin entry field on users page
     admin_entry: str = ""
 
+    # background jobs shown on the admin page, newest first
+    jobs: list[Job] = []
+    is_polling_jobs: bool = False
+
     
 
     """page redirect functions"""
@@ -131,8 +209,17 @@ class State(rx.State):
         
         num_articles_int = int(self.num_articles)
 
-        rank_model = RankModel() # Get ranked articles from the model
-        ranked_articles = rank_model.rank_articles(self.keywords, num_articles=num_articles_int)
+        # Get ranked articles from the model without blocking the event loop
+        loop = asyncio.get_running_loop()
+        try:
+            ranked_articles = await loop.run_in_executor(
+                G_search_executor, rank_articles, self.keywords, num_articles_int
+            )
+        except Exception as e:
+            print(f"Error ranking articles: {e}")
+            async with self:
+                self.is_searching = False
+            return rx.toast.error("Search failed. Please try again.")
 
         new_results = []  # build up a new list to store articles
 
@@ -160,41 +247,80 @@ class State(rx.State):
             )
             new_results.append(article)
 
-            # Update the results and is_searching flag
-            async with self:
-                self.results = new_results
-                self.original_results = new_results
-                self.is_searching = False
-                end_time=time.time()
-                self.reset_sort()
-                
+        # Update the results and is_searching flag
+        async with self:
+            self.results = new_results
+            self.original_results = new_results
+            self.is_searching = False
+            end_time=time.time()
+            self.reset_sort()
 
-        return rx.toast.success(f"fetched {len(self.results)} articles in {(end_time - start_time):.2f} seconds!")
+        return rx.toast.success(f"fetched {len(new_results)} articles in {(end_time - start_time):.2f} seconds!")
 
     @rx.event(background=True)
     async def populate_database(self):
         if a := self.validate_input(): return a
 
-        num_articles_int = int(self.num_articles)
-        if num_articles_int  > 100: 
-            return rx.toast.warning("insert no more than 100 papers at a time")
-
         async with self:
+            if self.is_populating:
+                return
             self.is_populating = True
-            start_time= time.time()
+            keywords = self.keywords
+            num_articles_int = int(self.num_articles)
+            email = self.email
+
+        # The harvest runs in a job worker process (app/database/job_worker.py), not in this app
+        loop = asyncio.get_running_loop()
+        try:
+            job_id = await loop.run_in_executor(
+                G_search_executor, queue_job, 'ingest',
+                # The sources share the whole request; DatabaseSearchService shifts it toward the productive ones
+                {'query': keywords, 'num_articles': num_articles_int}, email
+            )
+        finally:
+            async with self:
+                self.is_populating = False
+        if job_id is None:
+            return rx.toast.error("Failed to queue the database population job.")
 
-        # Initialize the DatabaseSearchService with the query (keywords) and number of articles
-        search_service = DatabaseSearchService(query=self.keywords, num_articles=(num_articles_int//4)) # we have 4 APIs... This is not the best way to do it
- 
-        search_service.search_and_store() # Run the search and store the results in the databases
-        
         async with self:
             self.clear_results()
-            self.is_populating = False
-            end_time= time.time()
+        return [rx.toast.success(f"Queued job {job_id} to populate the database for query '{keywords}'."), State.poll_jobs]
 
-        return rx.toast.success(f"Database populated with {num_articles_int} articles for query '{self.keywords}' in {(end_time - start_time):.2f} seconds.")
-    
+    @rx.event(background=True)
+    async def enqueue_job(self, kind: str):
+        # 'kind' comes from the client; only kinds the job worker can run are queued
+        if kind not in JOB_HANDLERS or kind == 'ingest':
+            return rx.toast.error(f"Unknown job kind '{kind}'.")
+        async with self:
+            email = self.email
+        loop = asyncio.get_running_loop()
+        job_id = await loop.run_in_executor(G_search_executor, queue_job, kind, None, email)
+        if job_id is None:
+            return rx.toast.error(f"Failed to queue the {kind} job.")
+        return [rx.toast.success(f"Queued {kind} job {job_id}."), State.poll_jobs]
+
+    @rx.event(background=True)
+    async def poll_jobs(self):
+        """Refresh the jobs table until no job is queued or running. One poller runs per session."""
+        async with self:
+            if self.is_polling_jobs:
+                return
+            self.is_polling_jobs = True
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                # Query outside the state lock so the session's other events are not held up
+                jobs = await loop.run_in_executor(G_search_executor, fetch_jobs)
+                async with self:
+                    self.jobs = jobs
+                active = any(job.status in ('queued', 'running') for job in jobs)
+                if not active:
+                    break
+                await asyncio.sleep(JOB_POLL_SECONDS)
+        finally:
+            async with self:
+                self.is_polling_jobs = False
 
     """users page functions"""
     @rx.event(background=True)
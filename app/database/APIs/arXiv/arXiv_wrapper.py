@@ -1,29 +1,42 @@
 import arxiv
 from arxiv import UnexpectedEmptyPageError
+from ..http_client import rate_limit_for, HTTP_MAX_RETRIES
 
 class api_handler:
     
     def __init__(self):
-        self.client = arxiv.Client()
+        # The arxiv library paces and retries its own page requests; give it the same limits as the other APIs
+        rate, _ = rate_limit_for('arxiv')
+        self.client = arxiv.Client(delay_seconds=1 / rate, num_retries=HTTP_MAX_RETRIES)
 
     def query(self, query, max_results=None):
-        search = arxiv.Search(
-            query=query,
-            sort_by=arxiv.SortCriterion.Relevance,
-            sort_order=arxiv.SortOrder.Descending
-        )
         # Generator function to yield results with a DOI
         def results_with_doi():
-            count = 0
             try:
-                for result in self.client.results(search):
-                    if result.doi:
-                        yield result
-                        count += 1
-                        if max_results is not None and count >= max_results:
-                            break
+                for _, result in self.harvest(query, max_results):
+                    yield result
             except UnexpectedEmptyPageError as e:
                 print(f"Unexpected empty page encountered: {e}")
             except Exception as e:
                 print(f"An error occurred: {e}")
         return results_with_doi()
+
+    def harvest(self, query, max_results=None, resume_from=None):
+        """
+        Yield (position, result) for the results with a DOI, raising errors instead of stopping
+        quietly. 'position' is the offset of the next raw search result; passing it back as
+        'resume_from' continues right after 'result'.
+        """
+        search = arxiv.Search(
+            query=query,
+            sort_by=arxiv.SortCriterion.Relevance,
+            sort_order=arxiv.SortOrder.Descending
+        )
+        offset = resume_from or 0
+        count = 0
+        for index, result in enumerate(self.client.results(search, offset=offset), start=offset + 1):
+            if result.doi:
+                yield index, result
+                count += 1
+                if max_results is not None and count >= max_results:
+                    break
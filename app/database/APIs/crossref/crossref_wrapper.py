@@ -1,24 +1,71 @@
+import os
 import requests
+from ..http_client import get_client
+
+# Works per cursor page; CrossRef allows up to 1000 rows per request
+CROSSREF_PAGE_SIZE = int(os.getenv('CROSSREF_PAGE_SIZE', '200'))
+
+# Results returned when no max_results is given
+DEFAULT_MAX_RESULTS = 1000
+
+# Only the fields CrossRefDbWrapper stores; skips reference lists, funders, licenses etc.
+SELECT_FIELDS = ["DOI", "title", "abstract", "published", "link", "author", "subject"]
 
 class api_handler:
-    def __init__(self):
+    def __init__(self, page_size=CROSSREF_PAGE_SIZE):
         self.base_url = "https://api.crossref.org/works"
+        self.http = get_client('crossref')
+        self.page_size = min(page_size, 1000)
 
     def query(self, query, max_results=None):
+        """
+        Yield up to 'max_results' (default 1000) works with a DOI matching 'query'.
+        Pages through the results with CrossRef's deep-paging cursor, requesting only SELECT_FIELDS.
+        """
+        try:
+            for _, item in self.harvest(query, max_results):
+                yield item
+        except requests.exceptions.RequestException as e:
+            print(f"An error occurred while querying CrossRef: {e}")
+
+    def harvest(self, query, max_results=None, resume_from=None):
+        """
+        Yield (position, work) like query(), raising request errors instead of stopping quietly.
+        'position' is the number of works yielded so far. Deep-paging cursors expire after a few
+        minutes, so a resume ('resume_from') walks the cursor from the start again and skips
+        that many works; with the select= projection those pages are small.
+        """
+        max_results = max_results or DEFAULT_MAX_RESULTS
+        skip = resume_from or 0
+        position = 0
+        count = 0
         params = {
             "query": query,
-            "rows": max_results if max_results else 1000  # Use the maximum allowed by CrossRef
+            "select": ",".join(SELECT_FIELDS),
+            "cursor": "*"
         }
-        try:
-            response = requests.get(self.base_url, params=params)
+        while count < max_results:
+            params["rows"] = self.page_size if position < skip else min(self.page_size, max_results - count)
+            response = self.http.get(self.base_url, params=params)
             response.raise_for_status()  # Raises an HTTPError for bad responses (4xx or 5xx)
-            data = response.json()
-            if "message" in data and "items" in data["message"]:
-                for item in data["message"]["items"]:
-                    if "DOI" in item:
-                        yield item
-        except requests.exceptions.RequestException as e:
-            print(f"An error occurred while querying CrossRef: {e}")
+            message = response.json().get("message", {})
+            items = message.get("items", [])
+            for item in items:
+                if "DOI" not in item:
+                    continue
+                position += 1
+                if position <= skip:
+                    continue
+                yield position, item
+                count += 1
+                if count >= max_results:
+                    return
+
+            # The last page is empty or comes without a new cursor
+            next_cursor = message.get("next-cursor")
+            if not items or not next_cursor or next_cursor == params["cursor"]:
+                return
+            params["cursor"] = next_cursor
 
 # # Example usage
 # if __name__ == "__main__":
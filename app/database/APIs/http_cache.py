@@ -0,0 +1,160 @@
+# app/database/APIs/http_cache.py
+
+import os
+import json
+import gzip
+import time
+import hashlib
+import tempfile
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import requests
+from requests.structures import CaseInsensitiveDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# off: no caching; on: serve fresh entries, revalidate stale ones with ETag / Last-Modified;
+# record: always fetch and store; replay: serve only from the cache, never touch the network
+HTTP_CACHE_MODE = os.getenv('HTTP_CACHE_MODE', 'off')
+HTTP_CACHE_MODES = ('off', 'on', 'record', 'replay')
+
+HTTP_CACHE_DIR = os.getenv('HTTP_CACHE_DIR', '.http_cache')
+
+# Seconds a cached response is served without revalidation in 'on' mode
+HTTP_CACHE_TTL = int(os.getenv('HTTP_CACHE_TTL', '86400'))
+
+# Response headers kept with a cached body
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class CacheMissError(Exception):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def normalize_request(method, url, params=None, json_body=None, data=None):
+    """
+    Canonical form of a request: the method, the URL with a lowercase scheme and host and its
+    query parameters (including 'params') sorted, and the body. Headers are left out, so API
+    keys never end up in the cache key and requests with different keys share entries.
+    """
+    prepared = requests.Request(method.upper(), url, params=params).prepare()
+    parts = urlsplit(prepared.url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    canonical = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ''))
+    body = ''
+    if json_body is not None:
+        body = json.dumps(json_body, sort_keys=True)
+    elif data is not None:
+        body = data if isinstance(data, str) else repr(data)
+    return f"{method.upper()} {canonical}\n{body}"
+
+
+class HttpCache:
+    """
+    Content-addressed disk cache for API responses.
+    entries/<request hash>.json maps a normalized request to the sha256 of its body, and the
+    body itself is stored once, gzip-compressed, as bodies/<body hash>.gz, so identical pages
+    fetched through different queries are stored once. Only 200 responses are cached.
+    """
+
+    def __init__(self, directory=HTTP_CACHE_DIR, mode=HTTP_CACHE_MODE, ttl=HTTP_CACHE_TTL):
+        if mode not in HTTP_CACHE_MODES:
+            raise ValueError(f"Unknown HTTP cache mode '{mode}'; expected one of {', '.join(HTTP_CACHE_MODES)}.")
+        self.directory = directory
+        self.mode = mode
+        self.ttl = ttl
+
+    def key(self, method, url, params=None, json_body=None, data=None):
+        return hashlib.sha256(normalize_request(method, url, params, json_body, data).encode()).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, 'entries', key[:2], f"{key}.json")
+
+    def _body_path(self, digest):
+        return os.path.join(self.directory, 'bodies', digest[:2], f"{digest}.gz")
+
+    @staticmethod
+    def _write(path, content, mode='wb'):
+        # Write to a temporary file first so concurrent readers never see a partial file
+        # under a name unique to this call, so threads storing the same entry never share one
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, mode) as file:
+                file.write(content)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    def get(self, key):
+        """Return the cached entry for 'key', or None."""
+        try:
+            with open(self._entry_path(key), 'r') as file:
+                entry = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not os.path.exists(self._body_path(entry['body'])):
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        return self.ttl <= 0 or time.time() - entry['stored_at'] < self.ttl
+
+    def revalidation_headers(self, entry):
+        """Conditional request headers that let the server answer 304 for an unchanged entry."""
+        headers = {}
+        if entry['headers'].get('ETag'):
+            headers['If-None-Match'] = entry['headers']['ETag']
+        if entry['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        return headers
+
+    def put(self, key, request, response):
+        """Store a 200 response under 'key'. Reads the whole body if it was streamed."""
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        body_path = self._body_path(digest)
+        if not os.path.exists(body_path):
+            self._write(body_path, gzip.compress(body, compresslevel=6))
+        entry = {
+            'request': request,
+            'url': response.url,
+            'status': response.status_code,
+            'headers': {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+            'body': digest,
+            'stored_at': time.time(),
+        }
+        self._write(self._entry_path(key), json.dumps(entry), 'w')
+
+    def touch(self, key, entry):
+        """Mark a revalidated entry as fresh again."""
+        entry['stored_at'] = time.time()
+        self._write(self._entry_path(key), json.dumps(entry), 'w')
+
+    def response(self, entry):
+        """Rebuild a requests.Response from a cached entry; iter_content and json work as usual."""
+        with open(self._body_path(entry['body']), 'rb') as file:
+            body = gzip.decompress(file.read())
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = 'utf-8'
+        response._content = body
+        response._content_consumed = True
+        response.from_cache = True
+        return response
+
+
+_cache = None
+
+
+def get_cache():
+    """The process-wide cache configured by HTTP_CACHE_MODE / HTTP_CACHE_DIR, or None when it is off."""
+    global _cache
+    if HTTP_CACHE_MODE == 'off':
+        return None
+    if _cache is None:
+        _cache = HttpCache()
+    return _cache
@@ -0,0 +1,346 @@
+# app/database/APIs/http_client.py
+
+import os
+import json
+import time
+import codecs
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from .http_cache import get_cache, CacheMissError
+
+load_dotenv()
+
+# Seconds to wait for a connection or a response before giving up on a request
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '30'))
+
+# Keep-alive connections kept per host; override for one API with e.g. HTTP_POOL_SIZE_OPENALEX
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+
+# Attempts after the first one for throttled (429), failed (5xx) or dropped requests
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '5'))
+
+# Exponential backoff between retries: a random delay in [0, min(cap, base * 2 ** attempt)]
+HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', '1'))
+HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', '60'))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Published request limits per API as (requests per second, burst); override with e.g. HTTP_RATE_LIMIT_OPENALEX
+RATE_LIMITS = {
+    'openalex': (10.0, 10),          # polite pool: 10 requests/s (and 100k/day)
+    'crossref': (5.0, 5),            # public pool: 5 requests/s
+    'arxiv': (1 / 3, 1),             # one request every 3 seconds
+    'semantic_scholar': (1.0, 1),    # API key tier: 1 request/s
+}
+
+# Semantic Scholar without an API key shares 100 requests per 5 minutes with every anonymous client
+SEMANTIC_SCHOLAR_ANONYMOUS_RATE_LIMIT = (0.3, 1)
+
+# Bytes read from the socket at a time when a JSON body is parsed while it streams in
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Headers sent with every request; the APIs return gzip-compressed JSON when asked
+DEFAULT_HEADERS = {
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
+    'User-Agent': os.getenv('HTTP_USER_AGENT', 'AFTAC-Research-Ranker'),
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: acquire() blocks until a request may be sent.
+    The rate adapts to the server: it is halved when a request is throttled and
+    creeps back up to the published limit while requests succeed.
+    """
+
+    # Lowest fraction of the published rate the bucket backs off to
+    MIN_RATE_FACTOR = 0.1
+
+    # Fraction of the published rate regained after each successful request
+    RECOVERY_STEP = 0.05
+
+    def __init__(self, rate, capacity=1):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttled(self, retry_after=None):
+        """The server rejected a request: slow down, and pause every thread for 'retry_after' seconds."""
+        with self.lock:
+            self.rate = max(self.max_rate * self.MIN_RATE_FACTOR, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    def succeeded(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.RECOVERY_STEP)
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delay in seconds or an HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=HTTP_BACKOFF_BASE, cap=HTTP_BACKOFF_MAX):
+    """Exponential backoff with full jitter for the given retry attempt (0 for the first retry)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def rate_limit_for(name):
+    """(requests per second, burst) for the API called 'name', from HTTP_RATE_LIMIT_<NAME> or RATE_LIMITS."""
+    override = os.getenv(f'HTTP_RATE_LIMIT_{name.upper()}')
+    if override:
+        return float(override), max(1, int(float(override)))
+    if name == 'semantic_scholar' and not os.getenv('SEMANTIC_SCHOLAR_API_KEY'):
+        return SEMANTIC_SCHOLAR_ANONYMOUS_RATE_LIMIT
+    return RATE_LIMITS.get(name, (None, None))
+
+
+class HttpClient:
+    """
+    A pooled requests.Session for one API. Connections are kept alive between requests,
+    so repeated calls to the same host skip the TCP and TLS handshakes.
+    Requests are paced by an optional rate limit, and throttled (429), failed (5xx) or
+    dropped requests are retried with jittered exponential backoff, honouring Retry-After.
+    With an HttpCache, responses are served from and stored to disk (see http_cache).
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT, headers=None,
+                 rate=None, burst=1, max_retries=HTTP_MAX_RETRIES, cache=None):
+        self.timeout = timeout
+        self.cache = cache
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request, going through the disk cache when one is configured.
+        In replay mode a request that is not in the cache raises CacheMissError.
+        """
+        if self.cache is None:
+            return self.send(method, url, **kwargs)
+
+        key = self.cache.key(method, url, kwargs.get('params'), kwargs.get('json'), kwargs.get('data'))
+        entry = self.cache.get(key)
+        if self.cache.mode == 'replay':
+            if entry is None:
+                raise CacheMissError(f"No recorded response for {method} {url} (params: {kwargs.get('params')}).")
+            return self.cache.response(entry)
+
+        if entry is not None and self.cache.mode == 'on':
+            if self.cache.is_fresh(entry):
+                return self.cache.response(entry)
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), **self.cache.revalidation_headers(entry)}
+
+        response = self.send(method, url, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(key, entry)
+            return self.cache.response(entry)
+        if response.status_code == 200:
+            request = f"{method} {url} {kwargs.get('params') or ''}"
+            self.cache.put(key, request, response)
+        return response
+
+    def send(self, method, url, **kwargs):
+        """
+        Send a request on the shared session, retrying throttled, failed or dropped attempts.
+        Returns the last response (callers still check it with raise_for_status), or raises
+        the last connection error once the retries are used up.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            if self.bucket:
+                self.bucket.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES:
+                if self.bucket:
+                    self.bucket.succeeded()
+                return response
+            if attempt >= self.max_retries:
+                return response
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if self.bucket and response.status_code == 429:
+                self.bucket.throttled(retry_after)
+            delay = backoff_delay(attempt)
+            time.sleep(max(delay, retry_after) if retry_after is not None else delay)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        """GET 'url' on the shared session. Takes the same arguments as requests.get."""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """POST to 'url' on the shared session. Takes the same arguments as requests.post."""
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+class JsonStream:
+    """
+    Incrementally parse a JSON object body as it is read, yielding the items of one of its
+    top-level arrays ('array_key') one at a time instead of building the whole document.
+    The object's other top-level members are decoded into 'fields' as they go by, so values
+    that follow the array (e.g. paging metadata) are available once iteration finishes.
+
+        page = JsonStream(response.iter_content(STREAM_CHUNK_SIZE), 'results')
+        for work in page: ...
+        next_cursor = page.fields['meta']['next_cursor']
+    """
+
+    WHITESPACE = ' \t\n\r'
+
+    def __init__(self, chunks, array_key):
+        self.chunks = iter(chunks)
+        self.array_key = array_key
+        self.fields = {}
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.exhausted = False
+
+    def _read(self):
+        """Append the next chunk to the buffer, dropping what has been parsed. False at end of body."""
+        if self.exhausted:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.exhausted = True
+            self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(b'', final=True)
+        else:
+            self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def _peek(self):
+        """Skip whitespace and return the next character ('' at end of body)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._read():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f"Expected '{char}' at position {self.pos} of the streamed JSON body.")
+        self.pos += 1
+
+    def _value(self):
+        """Decode the next complete JSON value, reading more of the body until it is complete."""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number at the very end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.exhausted:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+            self._read()
+
+    def __iter__(self):
+        self._expect('{')
+        first_member = True
+        while self._peek() != '}':
+            if not first_member:
+                self._expect(',')
+            first_member = False
+            key = self._value()
+            self._expect(':')
+            if key == self.array_key and self._peek() == '[':
+                self.pos += 1
+                first_item = True
+                while self._peek() != ']':
+                    if not first_item:
+                        self._expect(',')
+                    first_item = False
+                    yield self._value()
+                self.pos += 1
+            else:
+                self.fields[key] = self._value()
+        self._expect('}')
+
+
+# API name -> HttpClient shared by every handler and wrapper in the process
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name):
+    """
+    Return the shared HttpClient for the API called 'name' (e.g. 'openalex'), creating it
+    on first use. Its pool size comes from HTTP_POOL_SIZE_<NAME> if set, else HTTP_POOL_SIZE,
+    and its rate limit from rate_limit_for(name). Every thread using the client shares the limit.
+    """
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            pool_size = int(os.getenv(f'HTTP_POOL_SIZE_{name.upper()}', HTTP_POOL_SIZE))
+            rate, burst = rate_limit_for(name)
+            client = _clients[name] = HttpClient(pool_size=pool_size, rate=rate, burst=burst or 1, cache=get_cache())
+        return client
+
+
+def close_clients():
+    """Close every shared client's connections."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -1,11 +1,14 @@
 # app/APIs/open_alex/open_alex_wrapper.py
 
 import requests
+from ..http_client import get_client, JsonStream, STREAM_CHUNK_SIZE
 
 class OpenAlexAPIHandler:
-    def __init__(self):
-        # No specialized client initialization is required for OpenAlex.
-        pass
+    def __init__(self, select=None):
+        # Requests go through the shared keep-alive session for OpenAlex
+        self.http = get_client('openalex')
+        # Top-level work fields to request (select=); None returns full work objects
+        self.select = select
 
     def query(self, query_string, max_results=None):
         """
@@ -19,43 +22,61 @@ class OpenAlexAPIHandler:
 
         Returns:
             generator: A generator that yields results from the OpenAlex API.
+
+        Each page is parsed while it downloads, so works are yielded before the
+        rest of the page has arrived and the full page is never held in memory.
         """
         def results_generator():
-            count = 0
-            cursor = '*'
-            per_page = 200  # Maximum per-page limit for OpenAlex API
-
-            while True:
-                url = 'https://api.openalex.org/works'
-                headers = {'User-Agent': 'YourAppName (your_email@example.com)'}
-                params = {
-                    'search': query_string,
-                    'per-page': per_page,
-                    'cursor': cursor,
-                    'sort': 'cited_by_count:desc'
-                }
-                try:
-                    response = requests.get(url, params=params, headers=headers, timeout=30)
-                    response.raise_for_status()
-                    data = response.json()
-                    results = data.get('results', [])
-
-                    if not results:
-                        break
-
-                    for work in results:
-                        yield work
-                        count += 1
-                        if max_results is not None and count >= max_results:
-                            return
-
-                    cursor = data.get('meta', {}).get('next_cursor')
-                    if not cursor:
-                        break
-                except requests.RequestException as e:
-                    print(f"An error occurred: {e}")
-                    break
-
-            return
+            try:
+                for _, work in self.harvest(query_string, max_results):
+                    yield work
+            except requests.RequestException as e:
+                print(f"An error occurred: {e}")
 
         return results_generator()
+
+    def harvest(self, query_string, max_results=None, resume_from=None):
+        """
+        Yield (position, work) for the works matching 'query_string', like query() but raising
+        request errors instead of stopping quietly. 'position' is [page cursor, works of that
+        page consumed]; passing it back as 'resume_from' continues right after that work.
+        """
+        count = 0
+        cursor, skip = resume_from or ('*', 0)
+        per_page = 200  # Maximum per-page limit for OpenAlex API
+
+        while True:
+            url = 'https://api.openalex.org/works'
+            headers = {'User-Agent': 'YourAppName (your_email@example.com)'}
+            params = {
+                'search': query_string,
+                'per-page': per_page,
+                'cursor': cursor,
+                'sort': 'cited_by_count:desc'
+            }
+            if self.select:
+                params['select'] = ','.join(self.select)
+            response = self.http.get(url, params=params, headers=headers, timeout=30, stream=True)
+            try:
+                response.raise_for_status()
+                page = JsonStream(response.iter_content(chunk_size=STREAM_CHUNK_SIZE), 'results')
+                page_results = 0
+                for work in page:
+                    page_results += 1
+                    # A resumed page starts with works that were already processed
+                    if page_results <= skip:
+                        continue
+                    yield [cursor, page_results], work
+                    count += 1
+                    if max_results is not None and count >= max_results:
+                        return
+            finally:
+                response.close()
+
+            if not page_results:
+                break
+
+            cursor = (page.fields.get('meta') or {}).get('next_cursor')
+            skip = 0
+            if not cursor:
+                break
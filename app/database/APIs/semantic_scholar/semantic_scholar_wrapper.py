@@ -1,12 +1,27 @@
+import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from ..http_client import get_client
 
 # Load environment variables from a .env file
 load_dotenv()
 
+# Relevance search returns at most 100 papers per request and 1,000 in total (offset + limit)
+SEARCH_PAGE_SIZE = 100
+SEARCH_RESULT_LIMIT = 1000
+
+# Ids per /paper/batch request; the endpoint accepts up to 500
+BATCH_SIZE = 500
+
+# Search pages requested concurrently (the shared client still enforces the rate limit)
+SEMANTIC_SCHOLAR_WORKERS = int(os.getenv('SEMANTIC_SCHOLAR_WORKERS', '3'))
+
 class api_handler:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, max_workers=SEMANTIC_SCHOLAR_WORKERS):
         self.base_url = "https://api.semanticscholar.org/graph/v1/paper/search"
+        self.bulk_url = "https://api.semanticscholar.org/graph/v1/paper/search/bulk"
+        self.batch_url = "https://api.semanticscholar.org/graph/v1/paper/batch"
         self.fields = [
             "title",
             "authors",
@@ -17,29 +32,145 @@ class api_handler:
             "influentialCitationCount"
         ]  # Fields to include in the API response
         self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.http = get_client('semantic_scholar')
+        self.max_workers = max_workers
 
     def query(self, query, max_results=None):
+        """
+        Yield up to 'max_results' (default 100) papers with a DOI matching 'query'.
+        Relevance-ranked search pages are fetched by offset, a few at a time; past the
+        endpoint's 1,000-result cap the bulk search endpoint continues with its token.
+        """
+        try:
+            for _, paper in self.harvest(query, max_results):
+                yield paper
+        except requests.exceptions.RequestException as e:
+            print(f"An error occurred while querying Semantic Scholar: {e}")
+        except ValueError as e:
+            print(f"An error occurred while parsing the response: {e}")
+
+    def harvest(self, query, max_results=None, resume_from=None):
+        """
+        Yield (position, paper) like query(), raising request and parsing errors instead of
+        stopping quietly. 'position' is ['search', offset of the next result] or
+        ['bulk', token of the page, papers of that page consumed]; passing it back as
+        'resume_from' continues right after that paper.
+        """
+        max_results = max_results or SEARCH_PAGE_SIZE
+        seen = set()
+        count = 0
+
+        def accept(paper):
+            # Only yield papers with a DOI, and each paper once across both endpoints
+            paper_id = paper.get("paperId")
+            if paper_id in seen or not paper.get("externalIds", {}).get("DOI"):
+                return False
+            if paper_id:
+                seen.add(paper_id)
+            return True
+
+        if resume_from and resume_from[0] == 'bulk':
+            token, skip = resume_from[1], resume_from[2]
+        else:
+            start = resume_from[1] if resume_from else 0
+            searched = start
+            # A harvest that stopped at the end of relevance search goes straight on to bulk search
+            pages = self.search(query, start) if start < SEARCH_RESULT_LIMIT else []
+            for offset, paper in pages:
+                searched = offset + 1
+                if accept(paper):
+                    yield ['search', offset + 1], paper
+                    count += 1
+                    if count >= max_results:
+                        return
+            if searched == 0:
+                print("No data found in the response.")
+            if searched < SEARCH_RESULT_LIMIT:
+                return
+            token, skip = None, 0
+
+        for (page_token, index), paper in self.bulk_search(query, token, skip):
+            if accept(paper):
+                yield ['bulk', page_token, index], paper
+                count += 1
+                if count >= max_results:
+                    return
+
+    def search(self, query, start=0):
+        """
+        Yield (offset, paper) for the relevance-ranked results from 'start' on, page by page,
+        fetching up to 'max_workers' pages at once.
+        """
+        first_page = self.fetch_search_page(query, start)
+        for index, paper in enumerate(first_page.get("data", [])):
+            yield start + index, paper
+        if "next" not in first_page:
+            return
+
+        total = min(first_page.get("total", 0), SEARCH_RESULT_LIMIT)
+        offsets = list(range(first_page["next"], total, SEARCH_PAGE_SIZE))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for window_start in range(0, len(offsets), self.max_workers):
+                window = offsets[window_start:window_start + self.max_workers]
+                pages = executor.map(lambda offset: self.fetch_search_page(query, offset), window)
+                for offset, page in zip(window, pages):
+                    for index, paper in enumerate(page.get("data", [])):
+                        yield offset + index, paper
+
+    def fetch_search_page(self, query, offset):
         params = {
             "query": query,
             "fields": ",".join(self.fields),
-            "limit": max_results if max_results else 100  # Semantic Scholar allows up to 100 results per request
+            "offset": offset,
+            "limit": min(SEARCH_PAGE_SIZE, SEARCH_RESULT_LIMIT - offset)
         }
+        response = self.http.get(self.base_url, params=params, headers=self.headers)
+        response.raise_for_status()  # Raise an error if the request fails
+        return response.json()
 
-        try:
-            response = requests.get(self.base_url, params=params, headers=self.headers)
-            response.raise_for_status()  # Raise an error if the request fails
+    def bulk_search(self, query, token=None, skip=0):
+        """
+        Yield ((page token, papers of the page consumed), paper) from the bulk search endpoint,
+        following its continuation token. 'token' and 'skip' resume inside an earlier page.
+        """
+        params = {"query": query, "fields": ",".join(self.fields)}
+        while True:
+            if token:
+                params["token"] = token
+            response = self.http.get(self.bulk_url, params=params, headers=self.headers)
+            response.raise_for_status()
             data = response.json()
-            
-            if "data" in data:
-                for paper in data["data"]:
-                    if paper.get("externalIds", {}).get("DOI"):  # Only yield papers with a DOI
-                        yield paper
-            else:
-                print("No data found in the response.")
-        except requests.exceptions.RequestException as e:
-            print(f"An error occurred while querying Semantic Scholar: {e}")
-        except ValueError as e:
-            print(f"An error occurred while parsing the response: {e}")
+            for index, paper in enumerate(data.get("data") or [], start=1):
+                if index > skip:
+                    yield (token, index), paper
+            if not data.get("token"):
+                return
+            token, skip = data["token"], 0
+
+    def batch(self, dois, fields=None):
+        """
+        Look up papers by DOI through /paper/batch, up to BATCH_SIZE DOIs per request.
+        Yields (doi, paper) for every DOI Semantic Scholar knows.
+        """
+        fields = fields or self.fields + ["citationCount"]
+        for start in range(0, len(dois), BATCH_SIZE):
+            chunk = dois[start:start + BATCH_SIZE]
+            try:
+                response = self.http.post(
+                    self.batch_url,
+                    params={"fields": ",".join(fields)},
+                    json={"ids": [f"DOI:{doi}" for doi in chunk]},
+                    headers=self.headers
+                )
+                response.raise_for_status()
+                papers = response.json()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"An error occurred while looking up {len(chunk)} papers in Semantic Scholar: {e}")
+                continue
+            # The response lists one paper (or null) per requested id, in order
+            for doi, paper in zip(chunk, papers):
+                if paper:
+                    yield doi, paper
 
 # # Example usage
 # if __name__ == "__main__":
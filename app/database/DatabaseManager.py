@@ -1,16 +1,191 @@
+import io
+import json
 import os
+import threading
+import weakref
 import psycopg2
 from psycopg2 import sql
+from psycopg2.extensions import TRANSACTION_STATUS_INERROR
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Number of papers the ingest wrappers write per transaction (1 = one transaction per paper)
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '1'))
+
+# Upsert for paper-concept links; the score is only filled in when the stored one is NULL or 0.
+# '%s' is replaced with a single row placeholder or with execute_values' VALUES list.
+PAPER_CONCEPT_UPSERT = """
+    INSERT INTO paper_concepts (paper_id, concept_id, score)
+    VALUES %s
+    ON CONFLICT (paper_id, concept_id)
+    DO UPDATE SET score = COALESCE(NULLIF(paper_concepts.score, 0), EXCLUDED.score, paper_concepts.score)
+"""
+
+# Statements of a paper_features refresh; the refresh time tells ranking snapshots the features changed
+REFRESH_PAPER_FEATURES = "REFRESH MATERIALIZED VIEW CONCURRENTLY paper_features"
+RECORD_PAPER_FEATURES_REFRESH = """
+    INSERT INTO view_refreshes (view_name, refreshed_at)
+    VALUES ('paper_features', clock_timestamp())
+    ON CONFLICT (view_name) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+"""
+
+# Maximum connections in the shared pool opened by DatabaseManager.open_pool()
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+
+# Upsert shapes are PREPAREd on the server once a connection has run them this many times (0 disables)
+PREPARE_AFTER_USES = int(os.getenv('PREPARE_AFTER_USES', '2'))
+
+# Stored values an upsert may overwrite, per table: the fields compared against '' and the
+# comparison for every other field (None means only NULL counts as a placeholder)
+UPSERT_PLACEHOLDERS = {
+    'authors': ({'openalex_id', 'name'}, "= 0"),
+    'journals': (set(), "= 0"),
+    'papers': ({'openalex_id', 'title', 'abstract', 'pdf_url', 'doi'}, "= 0"),
+    'concepts': (set(), None),
+}
+
+# Fields that can be filled outside their table, with the condition that says so. Compacted
+# abstracts are NULL in papers but stored in paper_abstracts, and must not be written back inline.
+FILLED_ELSEWHERE = {
+    ('papers', 'abstract'): "EXISTS (SELECT 1 FROM paper_abstracts WHERE paper_abstracts.paper_id = papers.id)",
+}
+
+
+def placeholder_condition(table, field):
+    """SQL condition that holds while 'table'.'field' is NULL or a placeholder (see UPSERT_PLACEHOLDERS)."""
+    string_fields, comparison = UPSERT_PLACEHOLDERS[table]
+    if field in string_fields:
+        condition = f"{table}.{field} IS NULL OR {table}.{field} = ''"
+    elif comparison:
+        condition = f"{table}.{field} IS NULL OR {table}.{field} {comparison}"
+    else:
+        condition = f"{table}.{field} IS NULL"
+    if (table, field) in FILLED_ELSEWHERE:
+        condition = f"({condition}) AND NOT {FILLED_ELSEWHERE[(table, field)]}"
+    return condition
+
+
+def copy_value(value):
+    """Format one value for COPY's text format: None as NULL, special characters escaped."""
+    if value is None:
+        return '\\N'
+    # Text columns cannot hold NUL characters, which some API records contain
+    return (str(value).replace('\x00', '').replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+class UpsertStatement:
+    """A composed upsert for one (table, columns, conflict key) shape, plus its PREPARE/EXECUTE forms."""
+
+    def __init__(self, name, query, prepare, execute):
+        self.name = name
+        self.query = query
+        self.prepare = prepare
+        self.execute = execute
+
+
+# (table, columns, conflict key) -> UpsertStatement
+_upsert_statements = {}
+_upsert_statements_lock = threading.Lock()
+
+# connection -> ({statement name: times run}, {names PREPAREd on that connection})
+_connection_statements = weakref.WeakKeyDictionary()
+
+
+def upsert_statement(table, columns, conflict_key):
+    """
+    Return the cached upsert for 'table' inserting 'columns' (a tuple) and resolving
+    conflicts on 'conflict_key'. Only fields holding placeholders are overwritten on conflict
+    (see UPSERT_PLACEHOLDERS) and the statement returns the row's id.
+    """
+    shape = (table, columns, conflict_key)
+    statement = _upsert_statements.get(shape)
+    if statement is not None:
+        return statement
+    with _upsert_statements_lock:
+        if shape not in _upsert_statements:
+            _upsert_statements[shape] = _compose_upsert(len(_upsert_statements) + 1, *shape)
+        return _upsert_statements[shape]
+
+
+def _compose_upsert(number, table, columns, conflict_key):
+    """Compose the upsert for one shape; 'number' keeps its prepared statement name unique."""
+    update_statements = []
+    for field in columns:
+        if field == conflict_key:
+            continue
+        update_statements.append(
+            sql.SQL("{field} = CASE WHEN {condition} THEN EXCLUDED.{field} ELSE {table}.{field} END").format(
+                field=sql.Identifier(field),
+                table=sql.Identifier(table),
+                condition=sql.SQL(placeholder_condition(table, field))
+            )
+        )
+
+    def compose(placeholders):
+        return sql.SQL("""
+            INSERT INTO {table} ({fields})
+            VALUES ({placeholders})
+            ON CONFLICT ({unique_key})
+            DO UPDATE SET
+                {updates}
+            RETURNING id
+        """).format(
+            table=sql.Identifier(table),
+            fields=sql.SQL(', ').join(map(sql.Identifier, columns)),
+            placeholders=sql.SQL(', ').join(placeholders),
+            unique_key=sql.Identifier(conflict_key),
+            updates=sql.SQL(', ').join(update_statements)
+        )
+
+    name = f"upsert_{table}_{number}"
+    return UpsertStatement(
+        name,
+        query=compose(sql.Placeholder() * len(columns)),
+        prepare=sql.SQL("PREPARE {name} AS {query}").format(
+            name=sql.Identifier(name),
+            query=compose([sql.SQL(f"${index}") for index in range(1, len(columns) + 1)])
+        ),
+        execute=sql.SQL("EXECUTE {name} ({placeholders})").format(
+            name=sql.Identifier(name),
+            placeholders=sql.SQL(', ').join(sql.Placeholder() * len(columns))
+        )
+    )
+
+
 class DatabaseManager:
+    # Shared connection pool; while it is open, managers borrow a connection from it instead of connecting
+    pool = None
+    # The pool this manager's connection was borrowed from, if any
+    borrowed_from = None
+
+    @classmethod
+    def open_pool(cls, maxconn=DB_POOL_SIZE):
+        """Open the shared connection pool used by every DatabaseManager created afterwards."""
+        if cls.pool is None or cls.pool.closed:
+            cls.pool = ThreadedConnectionPool(1, maxconn, os.getenv('DATABASE_URL'))
+            print(f"Database connection pool opened with up to {maxconn} connections.")
+        return cls.pool
+
+    @classmethod
+    def close_pool(cls):
+        """Close every connection in the shared pool."""
+        if cls.pool is not None and not cls.pool.closed:
+            cls.pool.closeall()
+        cls.pool = None
+
     def __init__(self):
         """Initialize the database connection."""
         try:
-            self.connection = psycopg2.connect(os.getenv('DATABASE_URL'))
+            if self.pool is not None and not self.pool.closed:
+                self.connection = self.pool.getconn()
+                self.borrowed_from = self.pool
+            else:
+                self.connection = psycopg2.connect(os.getenv('DATABASE_URL'))
             self.connection.autocommit = True
             self.cursor = self.connection.cursor()
             print("Database connection established.")
@@ -18,6 +193,84 @@ class DatabaseManager:
             print(f"Error connecting to the database: {e}")
             raise
 
+    def set_autocommit(self, enabled):
+        """
+        Switch the connection between autocommit and explicit transactions.
+        The ingest wrappers turn autocommit off and call commit_batch() every N papers.
+        """
+        self.connection.autocommit = enabled
+
+    def commit_batch(self):
+        """
+        Commit every statement issued since the last commit or rollback.
+        If any statement in the batch failed, the whole batch is rolled back instead,
+        so a paper is never stored without its authors and concepts.
+        Returns True if the batch was committed.
+        """
+        if self.connection.autocommit:
+            return True
+        if self.connection.info.transaction_status == TRANSACTION_STATUS_INERROR:
+            print("A statement in the current batch failed. Rolling back the batch.")
+            self.rollback_batch()
+            return False
+        try:
+            self.connection.commit()
+            return True
+        except psycopg2.Error as e:
+            print(f"Error committing batch: {e}")
+            self.rollback_batch()
+            return False
+
+    def rollback_batch(self):
+        """Discard every statement issued since the last commit or rollback."""
+        try:
+            self.connection.rollback()
+        except psycopg2.Error as e:
+            print(f"Error rolling back batch: {e}")
+
+    def savepoint(self):
+        """
+        Mark the start of one paper's statements in the current batch, so that a failing paper
+        can be undone by rollback_to_savepoint() without losing the papers written before it.
+        """
+        if not self.connection.autocommit:
+            self.cursor.execute("SAVEPOINT paper")
+
+    def release_savepoint(self):
+        """Keep the statements issued since savepoint() as part of the batch."""
+        if not self.connection.autocommit:
+            self.cursor.execute("RELEASE SAVEPOINT paper")
+
+    def batch_failed(self):
+        """True if a statement of the current batch failed (the methods above print and swallow their errors)."""
+        return not self.connection.autocommit and self.connection.info.transaction_status == TRANSACTION_STATUS_INERROR
+
+    def rollback_to_savepoint(self):
+        """Undo the statements issued since savepoint(); the rest of the batch is kept."""
+        if self.connection.autocommit:
+            return
+        try:
+            self.cursor.execute("ROLLBACK TO SAVEPOINT paper")
+            self.cursor.execute("RELEASE SAVEPOINT paper")
+        except psycopg2.Error as e:
+            print(f"Error rolling back to savepoint: {e}")
+
+    def execute_upsert(self, statement, values):
+        """
+        Run a cached upsert with 'values'. Shapes this connection keeps running are
+        PREPAREd once so the server stops re-planning them.
+        """
+        uses, prepared = _connection_statements.setdefault(self.connection, ({}, set()))
+        uses[statement.name] = uses.get(statement.name, 0) + 1
+        if not PREPARE_AFTER_USES or uses[statement.name] < PREPARE_AFTER_USES:
+            self.cursor.execute(statement.query, values)
+            return
+        if statement.name not in prepared:
+            # Prepared statements outlive transactions, so a rolled back batch does not undo this
+            self.cursor.execute(statement.prepare)
+            prepared.add(statement.name)
+        self.cursor.execute(statement.execute, values)
+
     def insert_author(self, openalex_id, name, **kwargs):
         """
         Insert or update an author in the database.
@@ -28,42 +281,10 @@ class DatabaseManager:
         columns = ['openalex_id', 'name'] + list(kwargs.keys())
         values = [openalex_id, name] + list(kwargs.values())
 
-        update_columns = [col for col in columns if col != 'openalex_id']
-
-        # Define which fields are strings
-        string_fields = ['openalex_id', 'name']
-
-        update_statements = []
-        for field in update_columns:
-            if field in string_fields:
-                condition = sql.SQL("authors.{field} IS NULL OR authors.{field} = ''").format(
-                    field=sql.Identifier(field)
-                )
-            else:
-                condition = sql.SQL("authors.{field} IS NULL OR authors.{field} = 0").format(
-                    field=sql.Identifier(field)
-                )
-            update_statement = sql.SQL("{field} = CASE WHEN {condition} THEN EXCLUDED.{field} ELSE authors.{field} END").format(
-                field=sql.Identifier(field),
-                condition=condition
-            )
-            update_statements.append(update_statement)
-
-        insert_query = sql.SQL("""
-            INSERT INTO authors ({fields})
-            VALUES ({placeholders})
-            ON CONFLICT (openalex_id)
-            DO UPDATE SET
-                {updates}
-            RETURNING id
-        """).format(
-            fields=sql.SQL(', ').join(map(sql.Identifier, columns)),
-            placeholders=sql.SQL(', ').join(sql.Placeholder() * len(columns)),
-            updates=sql.SQL(', ').join(update_statements)
-        )
+        statement = upsert_statement('authors', tuple(columns), 'openalex_id')
 
         try:
-            self.cursor.execute(insert_query, values)
+            self.execute_upsert(statement, values)
             author_id = self.cursor.fetchone()[0]
             print(f"Author '{name}' inserted/updated successfully with ID: {author_id}.")
             return author_id
@@ -82,27 +303,10 @@ class DatabaseManager:
         columns = ['journal_name'] + list(kwargs.keys())
         values = [journal_name] + list(kwargs.values())
 
-        update_columns = [col for col in columns if col != 'journal_name']
-
-        insert_query = sql.SQL("""
-            INSERT INTO journals ({fields})
-            VALUES ({placeholders})
-            ON CONFLICT (journal_name)
-            DO UPDATE SET
-                {updates}
-            RETURNING id
-        """).format(
-            fields=sql.SQL(', ').join(map(sql.Identifier, columns)),
-            placeholders=sql.SQL(', ').join(sql.Placeholder() * len(columns)),
-            updates=sql.SQL(', ').join([
-                sql.SQL("{field} = CASE WHEN journals.{field} IS NULL OR journals.{field} = 0 THEN EXCLUDED.{field} ELSE journals.{field} END").format(
-                    field=sql.Identifier(field)
-                ) for field in update_columns
-            ])
-        )
+        statement = upsert_statement('journals', tuple(columns), 'journal_name')
 
         try:
-            self.cursor.execute(insert_query, values)
+            self.execute_upsert(statement, values)
             journal_id = self.cursor.fetchone()[0]
             print(f"Journal '{journal_name}' inserted/updated successfully with ID: {journal_id}.")
             return journal_id
@@ -137,43 +341,10 @@ class DatabaseManager:
         columns = ['openalex_id', 'title'] + list(kwargs.keys())
         values = [openalex_id, title] + list(kwargs.values())
 
-        update_columns = [col for col in columns if col != unique_key]
-
-        # Define which fields are strings
-        string_fields = ['openalex_id', 'title', 'abstract', 'pdf_url', 'doi']
-
-        update_statements = []
-        for field in update_columns:
-            if field in string_fields:
-                condition = sql.SQL("papers.{field} IS NULL OR papers.{field} = ''").format(
-                    field=sql.Identifier(field)
-                )
-            else:
-                condition = sql.SQL("papers.{field} IS NULL OR papers.{field} = 0").format(
-                    field=sql.Identifier(field)
-                )
-            update_statement = sql.SQL("{field} = CASE WHEN {condition} THEN EXCLUDED.{field} ELSE papers.{field} END").format(
-                field=sql.Identifier(field),
-                condition=condition
-            )
-            update_statements.append(update_statement)
-
-        insert_query = sql.SQL("""
-            INSERT INTO papers ({fields})
-            VALUES ({placeholders})
-            ON CONFLICT ({unique_key})
-            DO UPDATE SET
-                {updates}
-            RETURNING id
-        """).format(
-            fields=sql.SQL(', ').join(map(sql.Identifier, columns)),
-            placeholders=sql.SQL(', ').join(sql.Placeholder() * len(columns)),
-            unique_key=sql.Identifier(unique_key),
-            updates=sql.SQL(', ').join(update_statements)
-        )
+        statement = upsert_statement('papers', tuple(columns), unique_key)
 
         try:
-            self.cursor.execute(insert_query, values)
+            self.execute_upsert(statement, values)
             paper_id = self.cursor.fetchone()[0]
             print(f"Paper '{title}' inserted/updated successfully with ID: {paper_id}.")
             return paper_id
@@ -192,27 +363,10 @@ class DatabaseManager:
         columns = ['openalex_id', 'name'] + list(kwargs.keys())
         values = [openalex_id, name] + list(kwargs.values())
 
-        update_columns = [col for col in columns if col != 'openalex_id']
-
-        insert_query = sql.SQL("""
-            INSERT INTO concepts ({fields})
-            VALUES ({placeholders})
-            ON CONFLICT (openalex_id)
-            DO UPDATE SET
-                {updates}
-            RETURNING id
-        """).format(
-            fields=sql.SQL(', ').join(map(sql.Identifier, columns)),
-            placeholders=sql.SQL(', ').join(sql.Placeholder() * len(columns)),
-            updates=sql.SQL(', ').join([
-                sql.SQL("{field} = CASE WHEN concepts.{field} IS NULL THEN EXCLUDED.{field} ELSE concepts.{field} END").format(
-                    field=sql.Identifier(field)
-                ) for field in update_columns
-            ])
-        )
+        statement = upsert_statement('concepts', tuple(columns), 'openalex_id')
 
         try:
-            self.cursor.execute(insert_query, values)
+            self.execute_upsert(statement, values)
             concept_id = self.cursor.fetchone()[0]
             print(f"Concept '{name}' inserted/updated successfully with ID: {concept_id}.")
             return concept_id
@@ -250,37 +404,41 @@ class DatabaseManager:
             print("Missing paper_id or concept_id in paper_concept_data. Skipping insertion.")
             return
 
-        # Check if association exists
-        select_query = sql.SQL("""
-            SELECT score FROM paper_concepts
-            WHERE paper_id = %s AND concept_id = %s
-        """)
         try:
-            self.cursor.execute(select_query, (paper_id, concept_id))
-            result = self.cursor.fetchone()
-            if result:
-                existing_score = result[0]
-                if (existing_score is None or existing_score == 0) and score:
-                    update_query = sql.SQL("""
-                        UPDATE paper_concepts
-                        SET score = %s
-                        WHERE paper_id = %s AND concept_id = %s
-                    """)
-                    self.cursor.execute(update_query, (score, paper_id, concept_id))
-                    print(f"Paper-Concept association (Paper ID: {paper_id}, Concept ID: {concept_id}) updated with score {score}.")
-                else:
-                    print(f"Paper-Concept association (Paper ID: {paper_id}, Concept ID: {concept_id}) already has a score. Skipping update.")
-            else:
-                # Insert new association
-                insert_query = sql.SQL("""
-                    INSERT INTO paper_concepts (paper_id, concept_id, score)
-                    VALUES (%s, %s, %s)
-                """)
-                self.cursor.execute(insert_query, (paper_id, concept_id, score))
-                print(f"Paper-Concept association (Paper ID: {paper_id}, Concept ID: {concept_id}) inserted successfully.")
+            self.cursor.execute(PAPER_CONCEPT_UPSERT % "(%s, %s, %s)", (paper_id, concept_id, score))
+            print(f"Paper-Concept association (Paper ID: {paper_id}, Concept ID: {concept_id}) inserted/updated successfully.")
         except psycopg2.Error as e:
             print(f"Error inserting/updating Paper-Concept association (Paper ID: {paper_id}, Concept ID: {concept_id}): {e}")
 
+    def upsert_paper_concepts(self, rows):
+        """
+        Insert or update many paper-concept associations in a single statement.
+        'rows' is an iterable of (paper_id, concept_id, score) tuples.
+        Existing associations only take the new score if their own score is missing.
+        """
+        links = {}
+        for paper_id, concept_id, score in rows:
+            if not paper_id or not concept_id:
+                print("Missing paper_id or concept_id in paper_concept_data. Skipping insertion.")
+                continue
+            # ON CONFLICT cannot touch the same row twice in one statement, so keep one score per pair
+            key = (paper_id, concept_id)
+            if not links.get(key):
+                links[key] = score
+
+        if not links:
+            return
+
+        try:
+            execute_values(
+                self.cursor,
+                PAPER_CONCEPT_UPSERT % "%s",
+                [(paper_id, concept_id, score) for (paper_id, concept_id), score in links.items()]
+            )
+            print(f"{len(links)} Paper-Concept associations inserted/updated successfully.")
+        except psycopg2.Error as e:
+            print(f"Error inserting/updating {len(links)} Paper-Concept associations: {e}")
+
     def insert_citation(self, paper_id, author_id, citing_paper_id, citation_year=None, citation_count=None):
         """
         Insert a citation in the database.
@@ -313,23 +471,304 @@ class DatabaseManager:
             print(f"Error inserting citation: {e}")
             return None
 
-    def get_entries_with_placeholders(self):
+    def copy_rows(self, table, columns, rows):
+        """
+        Bulk load 'rows' (tuples in 'columns' order) into 'table' with COPY.
+        Returns the number of rows copied. Errors are raised, so the caller decides
+        whether the surrounding transaction survives.
+        """
+        buffer = io.StringIO()
+        copied = 0
+        for row in rows:
+            buffer.write('\t'.join(map(copy_value, row)) + '\n')
+            copied += 1
+        if copied:
+            buffer.seek(0)
+            self.cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+        return copied
+
+    def copy_pending_citations(self, edges):
+        """
+        Bulk load citation edges with COPY.
+        'edges' is an iterable of (citing paper id, cited OpenAlex work id) pairs. They are staged
+        in a temporary table and merged into pending_citations until resolve_pending_citations()
+        finds the cited work. Returns the number of edges copied.
+        """
+        rows = [
+            (int(citing_paper_id), cited_openalex_id) for citing_paper_id, cited_openalex_id in edges
+            if citing_paper_id and cited_openalex_id
+        ]
+        if not rows:
+            return 0
+
+        try:
+            self.cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS citation_edges_staging (
+                    citing_paper_id INTEGER,
+                    cited_openalex_id VARCHAR(50)
+                )
+            """)
+            self.cursor.execute("TRUNCATE citation_edges_staging")
+            copied = self.copy_rows('citation_edges_staging', ['citing_paper_id', 'cited_openalex_id'], rows)
+            self.cursor.execute("""
+                INSERT INTO pending_citations (citing_paper_id, cited_openalex_id)
+                SELECT DISTINCT citing_paper_id, cited_openalex_id FROM citation_edges_staging
+                ON CONFLICT DO NOTHING
+            """)
+            print(f"Copied {copied} citation edges.")
+            return copied
+        except psycopg2.Error as e:
+            print(f"Error copying citation edges: {e}")
+            return 0
+
+    def resolve_pending_citations(self):
+        """
+        Turn pending citation edges whose cited work is now stored into citations rows,
+        in one set-based statement. Edges that still point at unknown works stay pending.
+        Returns the number of citations inserted.
+        """
+        try:
+            self.cursor.execute("""
+                WITH resolved AS (
+                    DELETE FROM pending_citations pending
+                    USING papers cited
+                    WHERE cited.openalex_id = pending.cited_openalex_id
+                    RETURNING cited.id AS paper_id, pending.citing_paper_id
+                )
+                INSERT INTO citations (paper_id, citing_paper_id, citation_year)
+                SELECT resolved.paper_id, resolved.citing_paper_id, citing.publication_year
+                FROM resolved
+                JOIN papers citing ON citing.id = resolved.citing_paper_id
+                ON CONFLICT (paper_id, citing_paper_id) DO NOTHING
+            """)
+            resolved = self.cursor.rowcount
+            print(f"Resolved {resolved} pending citations.")
+            return resolved
+        except psycopg2.Error as e:
+            print(f"Error resolving pending citations: {e}")
+            return 0
+
+    def get_entries_with_placeholders(self, after_id=None, limit=None):
         """
         Fetch entries from the database that have placeholder zeros or nulls.
         Currently checks for papers with total_citations as NULL or 0.
         Modify this method to include other fields and tables as needed.
+        With 'after_id' and 'limit', returns one keyset page: the next 'limit' entries
+        with an id greater than 'after_id', ordered by id.
         """
+        query = """
+            SELECT id, openalex_id, doi, title, publication_year FROM papers
+            WHERE (total_citations IS NULL OR total_citations = 0)
+        """
+        params = []
+        if after_id is not None:
+            query += " AND id > %s"
+            params.append(after_id)
+        query += " ORDER BY id"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
         try:
-            self.cursor.execute("""
-                SELECT id, openalex_id, doi, title, publication_year FROM papers
-                WHERE total_citations IS NULL OR total_citations = 0
-            """)
+            self.cursor.execute(query, params)
             entries = self.cursor.fetchall()
             return entries
         except psycopg2.Error as e:
             print(f"Error fetching entries with placeholders: {e}")
             return []
 
+    def estimate_paper_count(self):
+        """Return the planner's estimate of the number of papers (0 before the table is analyzed)."""
+        try:
+            self.cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = 'papers'::regclass")
+            row = self.cursor.fetchone()
+            return max(row[0], 0) if row else 0
+        except psycopg2.Error as e:
+            print(f"Error estimating the number of papers: {e}")
+            return 0
+
+    def get_paper_fields(self, after_id, limit):
+        """
+        Return the next 'limit' papers with an id greater than 'after_id', ordered by id, as
+        (id, doi, openalex_id, filled fields). 'filled fields' names the columns holding real
+        values (not NULL or a placeholder). The dedup filter is warmed from these rows; it keys
+        links by the source that stored them, which the tables do not record, so they are left out.
+        """
+        try:
+            self.cursor.execute("""
+                SELECT p.id, p.doi, p.openalex_id, array_remove(ARRAY[
+                    CASE WHEN p.title <> '' THEN 'title' END,
+                    CASE WHEN p.abstract <> '' OR EXISTS (SELECT 1 FROM paper_abstracts pab WHERE pab.paper_id = p.id)
+                         THEN 'abstract' END,
+                    CASE WHEN p.publication_year <> 0 THEN 'publication_year' END,
+                    CASE WHEN p.pdf_url <> '' THEN 'pdf_url' END,
+                    CASE WHEN p.total_citations <> 0 THEN 'total_citations' END,
+                    CASE WHEN p.influential_citations <> 0 THEN 'influential_citations' END
+                ], NULL)
+                FROM papers p
+                WHERE p.id > %s
+                ORDER BY p.id
+                LIMIT %s
+            """, (after_id, limit))
+            return self.cursor.fetchall()
+        except psycopg2.Error as e:
+            print(f"Error fetching paper fields: {e}")
+            return []
+
+    def get_enrichment_watermark(self, job):
+        """Return the highest paper id 'job' has processed in its current sweep (0 if none)."""
+        try:
+            self.cursor.execute("SELECT last_paper_id FROM enrichment_watermarks WHERE job = %s", (job,))
+            row = self.cursor.fetchone()
+            return row[0] if row else 0
+        except psycopg2.Error as e:
+            print(f"Error fetching enrichment watermark for '{job}': {e}")
+            return 0
+
+    def set_enrichment_watermark(self, job, last_paper_id):
+        """Record that 'job' has processed every paper up to 'last_paper_id' (0 restarts the sweep)."""
+        try:
+            self.cursor.execute("""
+                INSERT INTO enrichment_watermarks (job, last_paper_id, updated_at)
+                VALUES (%s, %s, now())
+                ON CONFLICT (job) DO UPDATE SET last_paper_id = EXCLUDED.last_paper_id, updated_at = now()
+            """, (job, last_paper_id))
+        except psycopg2.Error as e:
+            print(f"Error saving enrichment watermark for '{job}': {e}")
+
+    def get_harvest_checkpoint(self, source, query):
+        """Return (position, records, exhausted) of the harvest of 'query' from 'source', or None."""
+        try:
+            self.cursor.execute(
+                "SELECT position, records, exhausted FROM harvest_checkpoints WHERE source = %s AND query = %s",
+                (source, query)
+            )
+            return self.cursor.fetchone()
+        except psycopg2.Error as e:
+            print(f"Error fetching harvest checkpoint for '{query}' from {source}: {e}")
+            return None
+
+    def set_harvest_checkpoint(self, source, query, position, records, exhausted=False):
+        """Record the resume position and processed record count of the harvest of 'query' from 'source'."""
+        try:
+            self.cursor.execute("""
+                INSERT INTO harvest_checkpoints (source, query, position, records, exhausted, updated_at)
+                VALUES (%s, %s, %s, %s, %s, now())
+                ON CONFLICT (source, query) DO UPDATE SET
+                    position = EXCLUDED.position, records = EXCLUDED.records,
+                    exhausted = EXCLUDED.exhausted, updated_at = now()
+            """, (source, query, position, records, exhausted))
+        except psycopg2.Error as e:
+            print(f"Error saving harvest checkpoint for '{query}' from {source}: {e}")
+
+    def enqueue_job(self, kind, params=None, created_by=None, unless_queued=False):
+        """
+        Queue a background job of 'kind' with JSON-serializable 'params'. Returns the job's id.
+        With 'unless_queued', nothing is queued (and None returned) while a job of 'kind' is still waiting.
+        """
+        try:
+            self.cursor.execute("""
+                INSERT INTO jobs (kind, params, created_by)
+                SELECT %s, %s, %s
+                WHERE NOT %s OR NOT EXISTS (SELECT 1 FROM jobs WHERE kind = %s AND status = 'queued')
+                RETURNING id
+            """, (kind, json.dumps(params or {}), created_by, unless_queued, kind))
+            row = self.cursor.fetchone()
+            if row is None:
+                print(f"A {kind} job is already queued.")
+                return None
+            job_id = row[0]
+            print(f"Queued {kind} job {job_id}.")
+            return job_id
+        except psycopg2.Error as e:
+            print(f"Error queueing {kind} job: {e}")
+            return None
+
+    def claim_job(self, worker, kinds=None):
+        """
+        Mark the oldest queued job (of one of 'kinds', if given) as running by 'worker' and
+        return (id, kind, params), or None if there is none. SKIP LOCKED lets concurrent
+        workers claim different jobs without waiting on each other.
+        """
+        try:
+            self.cursor.execute("""
+                UPDATE jobs SET status = 'running', worker = %s, attempts = attempts + 1,
+                    started_at = now(), heartbeat_at = now()
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE status = 'queued' AND (%s IS NULL OR kind = ANY(%s))
+                    ORDER BY id
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, kind, params
+            """, (worker, kinds, kinds))
+            row = self.cursor.fetchone()
+            if not self.connection.autocommit:
+                self.connection.commit()
+            if row is None:
+                return None
+            return row[0], row[1], json.loads(row[2])
+        except psycopg2.Error as e:
+            if not self.connection.autocommit:
+                self.connection.rollback()
+            print(f"Error claiming a job: {e}")
+            return None
+
+    def heartbeat_job(self, job_id):
+        """Record that the worker running 'job_id' is still alive."""
+        try:
+            self.cursor.execute("UPDATE jobs SET heartbeat_at = now() WHERE id = %s AND status = 'running'", (job_id,))
+        except psycopg2.Error as e:
+            print(f"Error updating the heartbeat of job {job_id}: {e}")
+
+    def finish_job(self, job_id, result=None, error=None):
+        """Mark 'job_id' as done with its JSON 'result', or as failed with 'error'."""
+        try:
+            self.cursor.execute("""
+                UPDATE jobs SET status = %s, result = %s, error = %s, finished_at = now(), heartbeat_at = now()
+                WHERE id = %s
+            """, ('failed' if error else 'done', json.dumps(result, default=str) if result is not None else None, error, job_id))
+        except psycopg2.Error as e:
+            print(f"Error finishing job {job_id}: {e}")
+
+    def requeue_stale_jobs(self, timeout, max_attempts):
+        """
+        Requeue running jobs whose heartbeat is older than 'timeout' seconds, as their worker
+        died; jobs that already ran 'max_attempts' times are failed instead.
+        Returns the number of jobs requeued or failed.
+        """
+        try:
+            self.cursor.execute("""
+                UPDATE jobs SET
+                    status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'queued' END,
+                    error = CASE WHEN attempts >= %s THEN 'Worker stopped responding.' ELSE error END,
+                    finished_at = CASE WHEN attempts >= %s THEN now() ELSE NULL END,
+                    worker = NULL
+                WHERE status = 'running' AND heartbeat_at < now() - %s * interval '1 second'
+            """, (max_attempts, max_attempts, max_attempts, timeout))
+            return self.cursor.rowcount
+        except psycopg2.Error as e:
+            print(f"Error requeueing stale jobs: {e}")
+            return 0
+
+    def get_jobs(self, limit=20, job_ids=None):
+        """
+        Return the 'limit' most recent jobs (or the jobs in 'job_ids') as
+        (id, kind, params, status, result, error, created_by, created_at, started_at, finished_at), newest first.
+        """
+        try:
+            self.cursor.execute("""
+                SELECT id, kind, params, status, result, error, created_by, created_at, started_at, finished_at
+                FROM jobs
+                WHERE %s IS NULL OR id = ANY(%s)
+                ORDER BY id DESC
+                LIMIT %s
+            """, (job_ids, job_ids, limit))
+            return self.cursor.fetchall()
+        except psycopg2.Error as e:
+            print(f"Error fetching jobs: {e}")
+            return []
+
     def update_paper_entry(self, paper_id, openalex_data):
         """
         Update a paper entry in the database with data from OpenAlex.
@@ -355,9 +794,22 @@ class DatabaseManager:
                 print(f"No relevant data to update for paper ID {paper_id}.")
                 return
 
-            # Update the paper entry
+            if self.update_placeholder_fields(paper_id, update_fields):
+                print(f"Paper ID {paper_id} updated successfully with data from OpenAlex.")
+        except psycopg2.Error as e:
+            print(f"Error updating paper ID {paper_id}: {e}")
+
+    def update_placeholder_fields(self, paper_id, update_fields):
+        """
+        Set the given {column: value} fields of a paper, but only where the column still holds
+        a placeholder (NULL, 0, or '' for the abstract; a compressed abstract is filled).
+        Returns True if the update ran.
+        """
+        if not update_fields:
+            return False
+        try:
             set_clause = ', '.join([
-                f"{field} = CASE WHEN {field} IS NULL OR {field} = 0 THEN %s ELSE {field} END" 
+                f"{field} = CASE WHEN {placeholder_condition('papers', field)} THEN %s ELSE {field} END"
                 for field in update_fields.keys()
             ])
             values = list(update_fields.values())
@@ -370,9 +822,10 @@ class DatabaseManager:
             """
 
             self.cursor.execute(update_query, values)
-            print(f"Paper ID {paper_id} updated successfully with data from OpenAlex.")
+            return True
         except psycopg2.Error as e:
             print(f"Error updating paper ID {paper_id}: {e}")
+            return False
 
     def reconstruct_abstract(self, abstract_inverted_index):
         """
@@ -396,6 +849,123 @@ class DatabaseManager:
             print(f"Error reconstructing abstract: {e}")
             return None
 
+    def get_abstract_samples(self, limit):
+        """Return up to 'limit' randomly chosen inline abstracts."""
+        try:
+            self.cursor.execute("SELECT abstract FROM papers WHERE abstract <> '' ORDER BY random() LIMIT %s", (limit,))
+            return [row[0] for row in self.cursor.fetchall()]
+        except psycopg2.Error as e:
+            print(f"Error sampling abstracts: {e}")
+            return []
+
+    def save_abstract_dictionary(self, dictionary):
+        """Store a compression dictionary for abstracts. Returns its id."""
+        try:
+            self.cursor.execute(
+                "INSERT INTO abstract_dictionaries (dictionary) VALUES (%s) RETURNING id", (psycopg2.Binary(dictionary),)
+            )
+            return self.cursor.fetchone()[0]
+        except psycopg2.Error as e:
+            print(f"Error saving abstract dictionary: {e}")
+            return None
+
+    def get_abstract_dictionary(self):
+        """Return (id, dictionary) of the newest abstract compression dictionary, or None."""
+        try:
+            self.cursor.execute("SELECT id, dictionary FROM abstract_dictionaries ORDER BY id DESC LIMIT 1")
+            row = self.cursor.fetchone()
+            return (row[0], bytes(row[1])) if row else None
+        except psycopg2.Error as e:
+            print(f"Error fetching abstract dictionary: {e}")
+            return None
+
+    def get_inline_abstracts(self, after_id, limit):
+        """Return the next 'limit' (id, abstract) pairs of papers with an inline abstract and an id greater than 'after_id'."""
+        try:
+            self.cursor.execute("""
+                SELECT id, abstract FROM papers
+                WHERE id > %s AND abstract <> ''
+                ORDER BY id
+                LIMIT %s
+            """, (after_id, limit))
+            return self.cursor.fetchall()
+        except psycopg2.Error as e:
+            print(f"Error fetching inline abstracts: {e}")
+            return []
+
+    def get_compressed_abstracts(self, after_id, limit):
+        """Return the next 'limit' (paper id, dictionary id, body) rows of paper_abstracts after 'after_id'."""
+        try:
+            self.cursor.execute("""
+                SELECT paper_id, dictionary_id, body FROM paper_abstracts
+                WHERE paper_id > %s
+                ORDER BY paper_id
+                LIMIT %s
+            """, (after_id, limit))
+            return self.cursor.fetchall()
+        except psycopg2.Error as e:
+            print(f"Error fetching compressed abstracts: {e}")
+            return []
+
+    def store_compressed_abstracts(self, rows):
+        """
+        Move abstracts into paper_abstracts: 'rows' are (paper id, dictionary id, compressed body),
+        replacing any body stored before, and the papers' inline abstracts are set to NULL.
+        Returns the number of abstracts stored.
+        """
+        if not rows:
+            return 0
+        try:
+            execute_values(self.cursor, """
+                INSERT INTO paper_abstracts (paper_id, dictionary_id, body)
+                VALUES %s
+                ON CONFLICT (paper_id) DO UPDATE SET dictionary_id = EXCLUDED.dictionary_id, body = EXCLUDED.body
+            """, [(paper_id, dictionary_id, psycopg2.Binary(body)) for paper_id, dictionary_id, body in rows],
+                page_size=len(rows))
+            self.cursor.execute("UPDATE papers SET abstract = NULL WHERE id = ANY(%s)", ([row[0] for row in rows],))
+            return len(rows)
+        except psycopg2.Error as e:
+            print(f"Error storing compressed abstracts: {e}")
+            return 0
+
+    def restore_inline_abstracts(self, rows):
+        """
+        Move (paper id, abstract) pairs back into papers.abstract, unless a paper was given a new
+        inline abstract since, and delete their compressed bodies. Returns the number of abstracts moved.
+        """
+        if not rows:
+            return 0
+        try:
+            execute_values(self.cursor, """
+                UPDATE papers SET abstract = restored.abstract
+                FROM (VALUES %s) AS restored (id, abstract)
+                WHERE papers.id = restored.id AND (papers.abstract IS NULL OR papers.abstract = '')
+            """, rows, page_size=len(rows))
+            self.cursor.execute("DELETE FROM paper_abstracts WHERE paper_id = ANY(%s)", ([row[0] for row in rows],))
+            return len(rows)
+        except psycopg2.Error as e:
+            print(f"Error restoring inline abstracts: {e}")
+            return 0
+
+    def refresh_paper_features(self):
+        """
+        Rebuild the paper_features materialized view read by RankModel and record the refresh time.
+        CONCURRENTLY keeps the view readable by running searches while it refreshes.
+        Returns True if the view was refreshed.
+        """
+        try:
+            self.cursor.execute(REFRESH_PAPER_FEATURES)
+            self.cursor.execute(RECORD_PAPER_FEATURES_REFRESH)
+            if not self.connection.autocommit:
+                self.connection.commit()
+            print("paper_features view refreshed.")
+            return True
+        except psycopg2.Error as e:
+            if not self.connection.autocommit:
+                self.connection.rollback()
+            print(f"Error refreshing paper_features view: {e}")
+            return False
+
     def insert_admin(self, email: str):
         query = sql.SQL("INSERT INTO admins(email) VALUES ({email})").format(email=sql.Placeholder())
         try:
@@ -421,10 +991,15 @@ class DatabaseManager:
             return e
 
     def close(self):
-        """Close the database connection."""
+        """Close the database connection, or hand it back if it was borrowed from the pool."""
         try:
             self.cursor.close()
-            self.connection.close()
+            if self.borrowed_from is not None and not self.borrowed_from.closed:
+                # The pool rolls back anything left uncommitted before lending the connection again
+                self.borrowed_from.putconn(self.connection)
+                self.borrowed_from = None
+            else:
+                self.connection.close()
             print("Database connection closed.\n")
         except psycopg2.Error as e:
             print(f"Error closing the database connection: {e}")
@@ -0,0 +1,79 @@
+# app/database/abstracts.py
+
+import os
+import zlib
+from functools import lru_cache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 'inline' keeps abstracts as text in papers.abstract; 'compressed' moves them into paper_abstracts
+# after every ingestion (see compress_abstracts.py)
+ABSTRACT_STORAGE = os.getenv('ABSTRACT_STORAGE', 'inline')
+
+# Bytes of sample abstracts kept as the preset dictionary; deflate cannot look back further than 32 KiB
+ABSTRACT_DICTIONARY_SIZE = int(os.getenv('ABSTRACT_DICTIONARY_SIZE', str(32 * 1024)))
+
+ABSTRACT_COMPRESSION_LEVEL = int(os.getenv('ABSTRACT_COMPRESSION_LEVEL', '6'))
+
+# Raw deflate streams: no header or checksum, which would cost 6 of the few hundred bytes of an abstract
+WINDOW_BITS = -15
+
+
+def train_dictionary(samples, size=ABSTRACT_DICTIONARY_SIZE):
+    """
+    Build a preset dictionary from sample abstracts. Deflate finds matches for the phrases
+    abstracts share ('In this paper we propose', 'state of the art', ...) in the dictionary,
+    so even a short abstract compresses as well as a long one. Matches closer to the end of
+    the dictionary are cheaper to encode, and the samples are joined in the order given.
+    """
+    dictionary = ' '.join(sample for sample in samples if sample).encode('utf-8')
+    return dictionary[-size:]
+
+
+@lru_cache(maxsize=8)
+def _primed_compressor(dictionary):
+    return zlib.compressobj(ABSTRACT_COMPRESSION_LEVEL, zlib.DEFLATED, WINDOW_BITS, zlib.DEF_MEM_LEVEL,
+                            zlib.Z_DEFAULT_STRATEGY, dictionary)
+
+
+def compress_abstract(text, dictionary):
+    """Compress one abstract with 'dictionary' into a raw deflate stream."""
+    # Copying a compressor that has loaded the dictionary is cheaper than loading it again
+    compressor = _primed_compressor(dictionary).copy()
+    return compressor.compress(text.encode('utf-8')) + compressor.flush()
+
+
+def decompress_abstract(body, dictionary):
+    """Inverse of compress_abstract."""
+    decompressor = zlib.decompressobj(WINDOW_BITS, zdict=dictionary)
+    return (decompressor.decompress(body) + decompressor.flush()).decode('utf-8')
+
+
+class AbstractDecoder:
+    """
+    Turn the (abstract, dictionary id, compressed body) columns of a paper into its abstract.
+    The dictionaries are read from abstract_dictionaries on 'connection' the first time a
+    body compressed with them is decoded, so inline-only corpora never query the table.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.dictionaries = {}
+
+    def dictionary(self, dictionary_id):
+        if dictionary_id not in self.dictionaries:
+            with self.connection.cursor() as cur:
+                cur.execute("SELECT dictionary FROM abstract_dictionaries WHERE id = %s", (dictionary_id,))
+                row = cur.fetchone()
+            # A missing dictionary is remembered too, so its other bodies fail without a query
+            self.dictionaries[dictionary_id] = bytes(row[0]) if row else None
+        if self.dictionaries[dictionary_id] is None:
+            raise LookupError(f"Abstract dictionary {dictionary_id} does not exist.")
+        return self.dictionaries[dictionary_id]
+
+    def decode(self, abstract, dictionary_id, body):
+        """An inline abstract is newer than a compressed one (it was stored after the last compaction)."""
+        if abstract or body is None:
+            return abstract
+        return decompress_abstract(bytes(body), self.dictionary(dictionary_id))
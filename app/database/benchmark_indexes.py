@@ -0,0 +1,143 @@
+# app/database/benchmark_indexes.py
+
+import argparse
+import statistics
+from .DatabaseManager import DatabaseManager
+from .migrate import discover_migrations
+
+BENCHMARK_SCHEMA = 'index_benchmark'
+
+# Hot-path queries taken from RankModel, DatabaseManager and compute_metrics
+BENCHMARK_QUERIES = {
+    'placeholder scan (get_entries_with_placeholders)': """
+        SELECT id, openalex_id, doi, title, publication_year FROM papers
+        WHERE total_citations IS NULL OR total_citations = 0
+    """,
+    'ranking corpus (get_articles_from_db)': """
+        SELECT p.id, p.title, p.publication_year, j.journal_h_index,
+               COUNT(pa.author_id) AS num_authors, AVG(a.h_index) AS avg_author_h_index,
+               AVG(a.total_papers) AS avg_author_total_papers,
+               AVG(a.total_citations) AS avg_author_total_citations,
+               array_agg(a.name) FILTER (WHERE a.name IS NOT NULL) AS authors
+        FROM papers p
+        LEFT JOIN journals j ON p.journal_id = j.id
+        LEFT JOIN paper_authors pa ON p.id = pa.paper_id
+        LEFT JOIN authors a ON pa.author_id = a.id
+        GROUP BY p.id, j.journal_h_index
+    """,
+    'papers of one author (compute_author_metrics)': """
+        SELECT p.* FROM papers p JOIN paper_authors pa ON pa.paper_id = p.id
+        WHERE pa.author_id = 4242
+    """,
+    'papers of one journal (compute_journal_metrics)': """
+        SELECT * FROM papers WHERE journal_id = 42
+    """,
+    'papers of one year': """
+        SELECT id FROM papers WHERE publication_year = 2001
+    """,
+    'papers of one concept': """
+        SELECT paper_id, score FROM paper_concepts WHERE concept_id = 42
+    """,
+    'citations of one paper': """
+        SELECT * FROM citations WHERE paper_id = 4242
+    """,
+    'references of one paper': """
+        SELECT * FROM citations WHERE citing_paper_id = 4242
+    """,
+}
+
+
+def populate_synthetic_corpus(cursor, papers):
+    """Fill the benchmark schema with a synthetic corpus of 'papers' papers."""
+    authors = max(papers // 4, 1)
+    journals = max(papers // 100, 1)
+    concepts = max(papers // 40, 1)
+    cursor.execute("""
+        INSERT INTO journals (journal_name, journal_h_index, mean_citations_per_paper, total_papers_published)
+        SELECT 'Journal ' || g, mod(g, 80), mod(g, 50)::float, 100 FROM generate_series(1, %(journals)s) g;
+
+        INSERT INTO authors (openalex_id, name, h_index, total_papers, total_citations)
+        SELECT 'A' || g, 'Author ' || g, mod(g, 60), mod(g, 200), mod(g, 5000) FROM generate_series(1, %(authors)s) g;
+
+        INSERT INTO concepts (openalex_id, name)
+        SELECT 'C' || g, 'Concept ' || g FROM generate_series(1, %(concepts)s) g;
+
+        -- About 5 percent of papers still carry placeholder citation counts
+        INSERT INTO papers (openalex_id, doi, title, abstract, publication_year, journal_id, total_citations)
+        SELECT 'W' || g, '10.5555/' || g, 'Synthetic paper ' || g,
+               repeat('lorem ipsum dolor sit amet ', 20 + mod(g, 30)),
+               1970 + mod(g, 55), 1 + mod(g, %(journals)s),
+               CASE WHEN mod(g, 20) = 0 THEN 0 ELSE mod(g, 1000) + 1 END
+        FROM generate_series(1, %(papers)s) g;
+
+        INSERT INTO paper_authors (paper_id, author_id)
+        SELECT DISTINCT g, 1 + mod(g::bigint * k * 7919, %(authors)s)
+        FROM generate_series(1, %(papers)s) g, generate_series(1, 3) k;
+
+        INSERT INTO paper_concepts (paper_id, concept_id, score)
+        SELECT DISTINCT g, 1 + mod(g::bigint * k * 104729, %(concepts)s), 0.5
+        FROM generate_series(1, %(papers)s) g, generate_series(1, 4) k;
+
+        INSERT INTO citations (paper_id, citing_paper_id, citation_year)
+        SELECT 1 + mod(g::bigint * k * 15485863, %(papers)s), g, 2000 + k
+        FROM generate_series(1, %(papers)s) g, generate_series(1, 5) k;
+    """, {'papers': papers, 'authors': authors, 'journals': journals, 'concepts': concepts})
+    # VACUUM sets the visibility map so index-only scans are possible in both runs
+    cursor.execute("VACUUM ANALYZE")
+
+
+def measure(cursor, query, repeats):
+    """Return the median EXPLAIN ANALYZE execution time of 'query' in milliseconds."""
+    timings = []
+    for _ in range(repeats):
+        cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + query)
+        timings.append(cursor.fetchone()[0][0]['Execution Time'])
+    return statistics.median(timings)
+
+
+def run_benchmark(papers=200000, repeats=5):
+    """
+    Build a synthetic corpus in a scratch schema and time the hot-path queries
+    before and after the index migration. The scratch schema is dropped afterwards.
+    Returns {query name: (before ms, after ms)}.
+    """
+    migrations = {migration.name: migration for migration in discover_migrations()}
+    db_manager = DatabaseManager()
+    cursor = db_manager.cursor
+    results = {}
+    try:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {BENCHMARK_SCHEMA}")
+        cursor.execute(f"SET search_path TO {BENCHMARK_SCHEMA}")
+        cursor.execute(migrations['initial_schema'].read('up'))
+        print(f"Populating synthetic corpus with {papers} papers...")
+        populate_synthetic_corpus(cursor, papers)
+
+        before = {name: measure(cursor, query, repeats) for name, query in BENCHMARK_QUERIES.items()}
+        cursor.execute(migrations['hot_path_indexes'].read('up'))
+        cursor.execute("VACUUM ANALYZE")
+        after = {name: measure(cursor, query, repeats) for name, query in BENCHMARK_QUERIES.items()}
+
+        for name in BENCHMARK_QUERIES:
+            results[name] = (before[name], after[name])
+    finally:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE")
+        db_manager.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE the hot-path queries before and after the index migration.")
+    parser.add_argument('--papers', type=int, default=200000, help="Number of synthetic papers.")
+    parser.add_argument('--repeats', type=int, default=5, help="Runs per query; the median is reported.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.papers, args.repeats)
+    print("| Query | Before (ms) | After (ms) |")
+    print("|---|---:|---:|")
+    for name, (before, after) in results.items():
+        print(f"| {name} | {before:.2f} | {after:.2f} |")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+# app/database/bulk_load.py
+
+import os
+import json
+import glob
+import gzip
+import time
+import argparse
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import psycopg2
+from dotenv import load_dotenv
+from .DatabaseManager import DatabaseManager, placeholder_condition
+from .open_alex_db_wrapper import OpenAlexDbWrapper
+from .abstracts import ABSTRACT_STORAGE
+from .compress_abstracts import compress_abstracts
+
+load_dotenv()
+
+# Works parsed, COPYed and merged per transaction; an interrupted partition resumes after the last chunk
+BULK_LOAD_CHUNK_SIZE = int(os.getenv('BULK_LOAD_CHUNK_SIZE', '10000'))
+
+# Partitions loaded at once, each by its own process and connection
+BULK_LOAD_WORKERS = int(os.getenv('BULK_LOAD_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# Name of snapshot partitions in the harvest_checkpoints table; the query column holds the partition name
+CHECKPOINT_SOURCE = 'openalex_snapshot'
+
+# Attempts at merging a chunk when concurrent loaders deadlock
+DEADLOCK_RETRIES = 3
+
+# Widths of the columns the loader fills (see the initial schema); longer values would fail the whole COPY
+COLUMN_LIMITS = {'openalex_id': 50, 'doi': 255, 'title': 2000, 'pdf_url': 1000, 'author_name': 500, 'concept_name': 255}
+
+# Staging columns, in COPY order
+WORK_COLUMNS = ['openalex_id', 'doi', 'title', 'abstract', 'publication_year',
+                'total_citations', 'influential_citations', 'pdf_url']
+AUTHORSHIP_COLUMNS = ['work_openalex_id', 'author_openalex_id', 'name']
+CONCEPT_COLUMNS = ['work_openalex_id', 'concept_openalex_id', 'name', 'score']
+REFERENCE_COLUMNS = ['work_openalex_id', 'cited_openalex_id']
+
+STAGING_TABLES = """
+    CREATE TEMP TABLE IF NOT EXISTS works_staging (
+        openalex_id TEXT, doi TEXT, title TEXT, abstract TEXT, publication_year INTEGER,
+        total_citations INTEGER, influential_citations INTEGER, pdf_url TEXT
+    );
+    CREATE TEMP TABLE IF NOT EXISTS authorships_staging (work_openalex_id TEXT, author_openalex_id TEXT, name TEXT);
+    CREATE TEMP TABLE IF NOT EXISTS work_concepts_staging (
+        work_openalex_id TEXT, concept_openalex_id TEXT, name TEXT, score DOUBLE PRECISION
+    );
+    CREATE TEMP TABLE IF NOT EXISTS work_references_staging (work_openalex_id TEXT, cited_openalex_id TEXT);
+    CREATE TEMP TABLE IF NOT EXISTS work_papers_staging (work_openalex_id TEXT, paper_id INTEGER);
+    TRUNCATE works_staging, authorships_staging, work_concepts_staging, work_references_staging, work_papers_staging;
+"""
+
+# Authors and concepts are shared by every partition; they are inserted in key order and
+# committed on their own, so parallel loaders never wait on each other's open chunks
+MERGE_ENTITIES = """
+    INSERT INTO authors (openalex_id, name)
+    SELECT DISTINCT ON (author_openalex_id) author_openalex_id, name FROM authorships_staging
+    ORDER BY author_openalex_id
+    ON CONFLICT (openalex_id) DO NOTHING;
+
+    INSERT INTO concepts (openalex_id, name)
+    SELECT DISTINCT ON (concept_openalex_id) concept_openalex_id, name FROM work_concepts_staging
+    ORDER BY concept_openalex_id
+    ON CONFLICT (openalex_id) DO NOTHING;
+"""
+
+# Like DatabaseManager.insert_paper, a work matches a stored paper by DOI, or by OpenAlex id
+# when it has no DOI, and only fills that paper's NULLs and placeholders. A DOI match only takes
+# the work's OpenAlex id if no other paper holds it, as one unique violation would fail the chunk.
+MERGE_PAPERS = """
+    UPDATE papers SET {updates}, openalex_id = CASE
+        WHEN (papers.openalex_id IS NULL OR papers.openalex_id = '')
+             AND NOT EXISTS (SELECT 1 FROM papers other WHERE other.openalex_id = s.openalex_id)
+        THEN s.openalex_id ELSE papers.openalex_id END
+    FROM works_staging s
+    WHERE s.doi IS NOT NULL AND papers.doi = s.doi;
+
+    UPDATE papers SET {updates}
+    FROM works_staging s
+    WHERE s.doi IS NULL AND papers.openalex_id = s.openalex_id;
+
+    INSERT INTO papers ({columns})
+    SELECT {columns} FROM works_staging s
+    WHERE NOT EXISTS (SELECT 1 FROM papers p WHERE p.doi = s.doi)
+      AND NOT EXISTS (SELECT 1 FROM papers p WHERE s.doi IS NULL AND p.openalex_id = s.openalex_id)
+    ORDER BY s.openalex_id
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO work_papers_staging (work_openalex_id, paper_id)
+    SELECT s.openalex_id, p.id FROM works_staging s JOIN papers p ON p.doi = s.doi
+    UNION
+    SELECT s.openalex_id, p.id FROM works_staging s JOIN papers p ON p.openalex_id = s.openalex_id
+    WHERE s.doi IS NULL;
+"""
+
+MERGE_LINKS = """
+    INSERT INTO paper_authors (paper_id, author_id)
+    SELECT DISTINCT w.paper_id, a.id
+    FROM authorships_staging s
+    JOIN work_papers_staging w ON w.work_openalex_id = s.work_openalex_id
+    JOIN authors a ON a.openalex_id = s.author_openalex_id
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO paper_concepts (paper_id, concept_id, score)
+    SELECT DISTINCT ON (w.paper_id, c.id) w.paper_id, c.id, s.score
+    FROM work_concepts_staging s
+    JOIN work_papers_staging w ON w.work_openalex_id = s.work_openalex_id
+    JOIN concepts c ON c.openalex_id = s.concept_openalex_id
+    ORDER BY w.paper_id, c.id, s.score DESC NULLS LAST
+    ON CONFLICT (paper_id, concept_id)
+    DO UPDATE SET score = COALESCE(NULLIF(paper_concepts.score, 0), EXCLUDED.score, paper_concepts.score);
+
+    INSERT INTO pending_citations (citing_paper_id, cited_openalex_id)
+    SELECT DISTINCT w.paper_id, s.cited_openalex_id
+    FROM work_references_staging s
+    JOIN work_papers_staging w ON w.work_openalex_id = s.work_openalex_id
+    ON CONFLICT DO NOTHING;
+"""
+
+
+def placeholder_updates(table, columns, source):
+    """SET list overwriting only the NULL or placeholder 'columns' of 'table' (see placeholder_condition)."""
+    updates = []
+    for column in columns:
+        placeholder = placeholder_condition(table, column)
+        updates.append(f"{column} = CASE WHEN {placeholder} THEN {source}.{column} ELSE {table}.{column} END")
+    return ', '.join(updates)
+
+
+def fits(value, column):
+    return value is None or len(value) <= COLUMN_LIMITS[column]
+
+
+def parse_works(lines):
+    """
+    Parse snapshot lines (one OpenAlex work per line) into staging rows with the same field
+    mapping as OpenAlexDbWrapper.store_result. Works without a title or an OpenAlex id (which
+    links a work to its staged authors, concepts and references), or with values wider than
+    their columns, are skipped.
+    Returns {'works', 'authorships', 'concepts', 'references': [rows], 'skipped': count}.
+    """
+    rows = {'works': [], 'authorships': [], 'concepts': [], 'references': [], 'skipped': 0}
+    for line in lines:
+        if not line.strip():
+            continue
+        work = json.loads(line)
+        fields = OpenAlexDbWrapper.paper_fields(work)
+        # Stripped and emptied like DatabaseManager.insert_paper does
+        fields['doi'] = (fields['doi'] or '').strip() or None
+        fields['openalex_id'] = openalex_id = fields['openalex_id'].strip() or None
+        if (not fields['title'] or not openalex_id
+                or not all(fits(fields[column], column) for column in ('openalex_id', 'doi', 'title', 'pdf_url'))):
+            rows['skipped'] += 1
+            continue
+        rows['works'].append(tuple(fields[column] for column in WORK_COLUMNS))
+        rows['authorships'].extend(
+            (openalex_id, author_openalex_id, name) for author_openalex_id, name in OpenAlexDbWrapper.work_authors(work)
+            if fits(author_openalex_id, 'openalex_id') and fits(name, 'author_name')
+        )
+        rows['concepts'].extend(
+            (openalex_id, concept_openalex_id, name, score)
+            for concept_openalex_id, name, score in OpenAlexDbWrapper.work_concepts(work)
+            if fits(concept_openalex_id, 'openalex_id') and fits(name, 'concept_name')
+        )
+        rows['references'].extend(
+            (openalex_id, cited_openalex_id) for cited_openalex_id in OpenAlexDbWrapper.referenced_work_ids(work)
+            if fits(cited_openalex_id, 'openalex_id')
+        )
+    return rows
+
+
+def load_chunk(db_manager, rows, partition, position, records):
+    """
+    COPY one chunk of parsed works into the staging tables and merge them with set-based
+    statements. The chunk's papers, links and the partition checkpoint commit together.
+    """
+    cursor = db_manager.cursor
+    cursor.execute(STAGING_TABLES)
+    db_manager.copy_rows('works_staging', WORK_COLUMNS, rows['works'])
+    db_manager.copy_rows('authorships_staging', AUTHORSHIP_COLUMNS, rows['authorships'])
+    db_manager.copy_rows('work_concepts_staging', CONCEPT_COLUMNS, rows['concepts'])
+    db_manager.copy_rows('work_references_staging', REFERENCE_COLUMNS, rows['references'])
+    cursor.execute(MERGE_ENTITIES)
+    db_manager.connection.commit()
+
+    # The match keys are never overwritten, except for the OpenAlex id handled in MERGE_PAPERS
+    paper_columns = [column for column in WORK_COLUMNS if column not in ('doi', 'openalex_id')]
+    merge_papers = MERGE_PAPERS.format(
+        updates=placeholder_updates('papers', paper_columns, 's'),
+        columns=', '.join(WORK_COLUMNS)
+    )
+    for attempt in range(1, DEADLOCK_RETRIES + 1):
+        try:
+            cursor.execute(merge_papers)
+            cursor.execute(MERGE_LINKS)
+            db_manager.set_harvest_checkpoint(CHECKPOINT_SOURCE, partition, json.dumps(position), records)
+            if not db_manager.commit_batch():
+                raise RuntimeError(f"Could not save the checkpoint of partition {partition}.")
+            return
+        except (psycopg2.errors.DeadlockDetected, psycopg2.errors.SerializationFailure):
+            db_manager.rollback_batch()
+            if attempt == DEADLOCK_RETRIES:
+                raise
+
+
+def load_partition(path, partition, chunk_size=BULK_LOAD_CHUNK_SIZE, restart=False):
+    """
+    Load one gzip JSONL partition, 'chunk_size' works per transaction. Runs in a worker process
+    with its own connection. Resumes after the last committed chunk unless 'restart' is set.
+    Returns {'partition', 'works', 'rows', 'skipped', 'seconds'}.
+    """
+    start_time = time.perf_counter()
+    stats = {'partition': partition, 'works': 0, 'rows': 0, 'skipped': 0}
+    db_manager = DatabaseManager()
+    try:
+        checkpoint = None if restart else db_manager.get_harvest_checkpoint(CHECKPOINT_SOURCE, partition)
+        position, records = (json.loads(checkpoint[0]), checkpoint[1]) if checkpoint and checkpoint[0] else (0, 0)
+        db_manager.set_autocommit(False)
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            lines = islice(file, position, None)
+            while True:
+                chunk = list(islice(lines, chunk_size))
+                if not chunk:
+                    break
+                rows = parse_works(chunk)
+                position += len(chunk)
+                records += len(rows['works'])
+                load_chunk(db_manager, rows, partition, position, records)
+                stats['works'] += len(rows['works'])
+                stats['rows'] += sum(len(rows[table]) for table in ('works', 'authorships', 'concepts', 'references'))
+                stats['skipped'] += rows['skipped']
+        db_manager.set_harvest_checkpoint(CHECKPOINT_SOURCE, partition, json.dumps(position), records, exhausted=True)
+        db_manager.commit_batch()
+    finally:
+        db_manager.close()
+    stats['seconds'] = time.perf_counter() - start_time
+    return stats
+
+
+def find_partitions(path):
+    """(file, partition name) of every .gz partition under 'path' (a snapshot directory or one file), by name."""
+    if os.path.isfile(path):
+        return [(path, os.path.basename(path))]
+    files = sorted(glob.glob(os.path.join(path, '**', '*.gz'), recursive=True))
+    return [(file, os.path.relpath(file, path)) for file in files]
+
+
+def run_bulk_load(path, workers=BULK_LOAD_WORKERS, chunk_size=BULK_LOAD_CHUNK_SIZE, restart=False):
+    """
+    Load every partition under 'path' that is not loaded yet, 'workers' partitions at a time,
+    then resolve citation edges and refresh the ranking features.
+    Returns {'partitions', 'failed', 'works', 'rows', 'seconds'}.
+    """
+    partitions = find_partitions(path)
+    db_manager = DatabaseManager()
+    try:
+        if not restart:
+            loaded = []
+            for file, partition in partitions:
+                checkpoint = db_manager.get_harvest_checkpoint(CHECKPOINT_SOURCE, partition)
+                if checkpoint and checkpoint[2]:
+                    loaded.append(partition)
+            partitions = [(file, partition) for file, partition in partitions if partition not in loaded]
+            if loaded:
+                print(f"Skipping {len(loaded)} partitions that are already loaded.")
+    finally:
+        # Worker processes open their own connections; none is held across the fork
+        db_manager.close()
+
+    print(f"Loading {len(partitions)} partitions with {workers} workers...")
+    start_time = time.perf_counter()
+    summary = {'partitions': 0, 'failed': 0, 'works': 0, 'rows': 0}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(load_partition, file, partition, chunk_size, restart): partition
+            for file, partition in partitions
+        }
+        for future in as_completed(futures):
+            try:
+                stats = future.result()
+            except Exception as e:
+                print(f"Partition {futures[future]} failed: {e}. The next run resumes it.")
+                summary['failed'] += 1
+                continue
+            summary['partitions'] += 1
+            summary['works'] += stats['works']
+            summary['rows'] += stats['rows']
+            print(f"Loaded {stats['partition']}: {stats['works']} works, {stats['rows']} rows "
+                  f"({stats['skipped']} skipped) in {stats['seconds']:.1f}s, "
+                  f"{stats['rows'] / max(stats['seconds'], 1e-9):.0f} rows/s.")
+    summary['seconds'] = time.perf_counter() - start_time
+    print(f"Loaded {summary['works']} works and {summary['rows']} rows from {summary['partitions']} partitions "
+          f"in {summary['seconds']:.1f}s: {summary['works'] / max(summary['seconds'], 1e-9):.0f} works/s, "
+          f"{summary['rows'] / max(summary['seconds'], 1e-9):.0f} rows/s.")
+
+    db_manager = DatabaseManager()
+    try:
+        # Citations between works of different partitions are resolved once everything is stored
+        db_manager.resolve_pending_citations()
+        if ABSTRACT_STORAGE == 'compressed':
+            compress_abstracts(db_manager)
+        db_manager.refresh_paper_features()
+    finally:
+        db_manager.close()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load OpenAlex snapshot works (gzip JSONL partitions) into the database.")
+    parser.add_argument('path', help="Snapshot works directory (e.g. openalex-snapshot/data/works) or one .gz partition.")
+    parser.add_argument('--workers', type=int, default=BULK_LOAD_WORKERS, help="Partitions loaded in parallel.")
+    parser.add_argument('--chunk-size', type=int, default=BULK_LOAD_CHUNK_SIZE, help="Works per transaction.")
+    parser.add_argument('--restart', action='store_true', help="Reload partitions that were already loaded.")
+    args = parser.parse_args(argv)
+
+    summary = run_bulk_load(args.path, args.workers, args.chunk_size, args.restart)
+    if summary['failed']:
+        raise SystemExit(f"{summary['failed']} partitions failed.")
+
+
+if __name__ == '__main__':
+    main()
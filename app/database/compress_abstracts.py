@@ -0,0 +1,118 @@
+# app/database/compress_abstracts.py
+
+import os
+import time
+import argparse
+from dotenv import load_dotenv
+from .DatabaseManager import DatabaseManager
+from .abstracts import AbstractDecoder, train_dictionary, compress_abstract
+
+load_dotenv()
+
+# Abstracts moved per transaction
+COMPRESS_BATCH_SIZE = int(os.getenv('COMPRESS_BATCH_SIZE', '1000'))
+
+# Abstracts sampled to train a new compression dictionary
+ABSTRACT_DICTIONARY_SAMPLES = int(os.getenv('ABSTRACT_DICTIONARY_SAMPLES', '2000'))
+
+
+def compress_abstracts(db_manager, batch_size=COMPRESS_BATCH_SIZE, retrain=False,
+                       samples=ABSTRACT_DICTIONARY_SAMPLES):
+    """
+    Move every inline abstract into paper_abstracts, compressed with the newest dictionary.
+    A dictionary is trained on 'samples' random abstracts first if there is none yet or
+    'retrain' is set; bodies compressed with an older dictionary keep it.
+    Returns {'compressed', 'inline_bytes', 'compressed_bytes', 'dictionary_id', 'seconds'}.
+    """
+    start_time = time.perf_counter()
+    stats = {'compressed': 0, 'inline_bytes': 0, 'compressed_bytes': 0, 'dictionary_id': None}
+    current = None if retrain else db_manager.get_abstract_dictionary()
+    if current is None:
+        dictionary = train_dictionary(db_manager.get_abstract_samples(samples))
+        if not dictionary:
+            print("No inline abstracts to compress.")
+            stats['seconds'] = time.perf_counter() - start_time
+            return stats
+        current = (db_manager.save_abstract_dictionary(dictionary), dictionary)
+        print(f"Trained abstract dictionary {current[0]} ({len(dictionary)} bytes).")
+    dictionary_id, dictionary = current
+    stats['dictionary_id'] = dictionary_id
+
+    db_manager.set_autocommit(False)
+    after_id = 0
+    try:
+        while True:
+            rows = db_manager.get_inline_abstracts(after_id, batch_size)
+            if not rows:
+                break
+            after_id = rows[-1][0]
+            bodies = [(paper_id, dictionary_id, compress_abstract(abstract, dictionary)) for paper_id, abstract in rows]
+            db_manager.store_compressed_abstracts(bodies)
+            if db_manager.commit_batch():
+                stats['compressed'] += len(bodies)
+                stats['inline_bytes'] += sum(len(abstract.encode('utf-8')) for _, abstract in rows)
+                stats['compressed_bytes'] += sum(len(body) for _, _, body in bodies)
+    finally:
+        # End the read transaction of the last (empty) batch
+        db_manager.rollback_batch()
+        db_manager.set_autocommit(True)
+    stats['seconds'] = time.perf_counter() - start_time
+    print(f"Compressed {stats['compressed']} abstracts from {stats['inline_bytes']} to {stats['compressed_bytes']} bytes "
+          f"in {stats['seconds']:.1f}s.")
+    return stats
+
+
+def inline_abstracts(db_manager, batch_size=COMPRESS_BATCH_SIZE):
+    """
+    Move every compressed abstract back into papers.abstract (before migration 0008 is rolled back).
+    Returns {'inlined', 'seconds'}.
+    """
+    start_time = time.perf_counter()
+    decoder = AbstractDecoder(db_manager.connection)
+    inlined = 0
+    db_manager.set_autocommit(False)
+    try:
+        while True:
+            # Moved bodies are deleted, so every batch starts from the beginning again
+            rows = db_manager.get_compressed_abstracts(0, batch_size)
+            if not rows:
+                break
+            db_manager.restore_inline_abstracts([
+                (paper_id, decoder.decode(None, dictionary_id, body)) for paper_id, dictionary_id, body in rows
+            ])
+            if not db_manager.commit_batch():
+                break
+            inlined += len(rows)
+    finally:
+        # End the read transaction of the last (empty) batch
+        db_manager.rollback_batch()
+        db_manager.set_autocommit(True)
+    seconds = time.perf_counter() - start_time
+    print(f"Moved {inlined} abstracts back inline in {seconds:.1f}s.")
+    return {'inlined': inlined, 'seconds': seconds}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move abstracts into compressed storage (or back inline).")
+    parser.add_argument('--batch-size', type=int, default=COMPRESS_BATCH_SIZE, help="Abstracts moved per transaction.")
+    parser.add_argument('--retrain', action='store_true', help="Train a new dictionary for the abstracts compressed now.")
+    parser.add_argument('--samples', type=int, default=ABSTRACT_DICTIONARY_SAMPLES,
+                        help="Abstracts sampled to train a dictionary.")
+    parser.add_argument('--inline', action='store_true', help="Decompress every abstract back into papers.abstract.")
+    args = parser.parse_args(argv)
+
+    db_manager = DatabaseManager()
+    try:
+        if args.inline:
+            stats = inline_abstracts(db_manager, args.batch_size)
+        else:
+            stats = compress_abstracts(db_manager, args.batch_size, args.retrain, args.samples)
+        # paper_features holds its own copy of the abstracts
+        db_manager.refresh_paper_features()
+    finally:
+        db_manager.close()
+    return stats
+
+
+if __name__ == '__main__':
+    main()
@@ -4,9 +4,10 @@ import sys
 import datetime
 import logging
 import traceback
-from sqlalchemy import create_engine, func, desc
+from sqlalchemy import create_engine, func, desc, text
 from sqlalchemy.orm import sessionmaker, scoped_session
 from ..models import Base, Paper, Author, Journal, Citation, PaperAuthor, Concept, PaperConcept
+from .DatabaseManager import REFRESH_PAPER_FEATURES, RECORD_PAPER_FEATURES_REFRESH
 from dotenv import load_dotenv
 import os
 import networkx as nx
@@ -288,6 +289,18 @@ def compute_coauthor_pagerank(session):
         logger.error(traceback.format_exc())
         session.rollback()
 
+def refresh_paper_features(session):
+    logger.info("Refreshing paper_features view.")
+    try:
+        session.execute(text(REFRESH_PAPER_FEATURES))
+        session.execute(text(RECORD_PAPER_FEATURES_REFRESH))
+        session.commit()
+        logger.info("paper_features view refreshed successfully.")
+    except Exception as e:
+        logger.error(f"Error refreshing paper_features view: {e}")
+        logger.error(traceback.format_exc())
+        session.rollback()
+
 def main():
     session = connect_to_database()
 
@@ -296,6 +309,9 @@ def main():
     compute_journal_metrics(session)
     compute_coauthor_pagerank(session)
 
+    # Publish the new metrics to the ranking features
+    refresh_paper_features(session)
+
     # Close the session
     session.close()
 
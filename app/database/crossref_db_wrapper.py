@@ -1,10 +1,19 @@
 # CrossRefDbWrapper.py
 
 import hashlib
-from .DatabaseManager import DatabaseManager
+from .DatabaseManager import DatabaseManager, INGEST_BATCH_SIZE
+from .harvest import HarvestWrapper
 from .APIs.crossref.crossref_wrapper import api_handler
-class CrossRefDbWrapper:
-    def __init__(self):
+
+# Name of CrossRef harvests in the harvest_checkpoints table
+HARVEST_SOURCE = 'crossref'
+
+class CrossRefDbWrapper(HarvestWrapper):
+    HARVEST_SOURCE = HARVEST_SOURCE
+    SOURCE_NAME = 'CrossRef'
+
+    def __init__(self, batch_size=INGEST_BATCH_SIZE, dedup=None):
+        super().__init__(batch_size, dedup)
         self.api_handler = api_handler()
         self.db_manager = DatabaseManager()
 
@@ -21,110 +30,113 @@ class CrossRefDbWrapper:
         hex_dig = hash_object.hexdigest()
         return f"{prefix}{hex_dig[:10]}"  # Truncate for brevity
 
-    def query_and_store(self, query, max_results=None):
-        count = 0
-        inserted_papers = 0
-        print(f"Querying CrossRef for: {query}...")
-        try:
-            for result in self.api_handler.query(query, max_results=max_results):
-                count += 1
-
-                try:
-                    # Insert paper information into the database
-                    paper_openalex_id = self.generate_openalex_id('CROSSREF_PAPER_', result.get('DOI', ''))
-                    inserted_papers += 1
-                    print(f"\nInserting paper {inserted_papers}: {result.get('title', ['No Title'])[0]}")
-                    paper_id = self.db_manager.insert_paper(
-                        openalex_id=paper_openalex_id,
-                        title=result.get('title', ['No Title'])[0],
-                        abstract=result.get('abstract', None),
-                        publication_year=self.extract_year(result.get('published', {}).get('date-parts', [[None]])[0][0]),
-                        journal_id=None,  # Assuming journal info is not directly available or requires separate handling
-                        total_citations=0,  # Placeholder as CrossRef does not provide citation counts
-                        citations_per_year=0.0,  # Placeholder
-                        rank_citations_per_year=0,  # Placeholder
-                        pdf_url=self.extract_pdf_url(result.get('link', [])),
-                        doi=result.get('DOI', None),
-                        influential_citations=0,  # Placeholder
-                        delta_citations=0  # Placeholder
-                    )
-
-                    if not paper_id:
-                        print(f"\nFailed to insert/update paper: {result.get('title', ['No Title'])[0]}. Skipping further processing for this paper.")
-                        continue
-
-                    # Insert author information
-                    for author in result.get('author', []):
-                        author_name = self.format_author_name(author)
-                        if not author_name:
-                            print("Author name is missing. Skipping this author.")
-                            continue
-
-                        # Generate a unique openalex_id for the author
-                        author_openalex_id = self.generate_openalex_id('CROSSREF_AUTHOR_', author_name)
-
-                        # Insert or update the author
-                        author_id = self.db_manager.insert_author(
-                            openalex_id=author_openalex_id,
-                            name=author_name,
-                            first_publication_year=0,  # Using 0 as a placeholder
-                            author_age=0,  # Using 0 as a placeholder
-                            h_index=0,  # Using 0 as a placeholder
-                            delta_h_index=0,  # Using 0 as a placeholder
-                            adopters=0,  # Using 0 as a placeholder
-                            total_papers=0,  # Using 0 as a placeholder
-                            delta_total_papers=0,  # Using 0 as a placeholder
-                            recent_coauthors=0,  # Using 0 as a placeholder
-                            coauthor_pagerank=0.0,  # Using 0.0 as a placeholder
-                            total_citations=0,  # Using 0 as a placeholder
-                            citations_per_paper=0.0,  # Using 0.0 as a placeholder
-                            max_citations=0,  # Using 0 as a placeholder
-                            total_journals=0  # Using 0 as a placeholder
-                        )
-
-                        if not author_id:
-                            print(f"Failed to insert/update author: {author_name}. Skipping this author.")
-                            continue
-
-                        # Insert paper-author relationship
-                        self.db_manager.insert_paper_author(paper_id=paper_id, author_id=author_id)
-
-                    # Insert subject (category) information
-                    for subject in result.get('subject', []):
-                        if not subject:
-                            print("Subject is missing. Skipping this subject.")
-                            continue
-
-                        # Generate a unique openalex_id for the subject
-                        subject_openalex_id = self.generate_openalex_id('CROSSREF_CONCEPT_', subject)
-
-                        # Insert or update the concept
-                        concept_id = self.db_manager.insert_concept(
-                            openalex_id=subject_openalex_id,
-                            name=subject
-                        )
-
-                        if not concept_id:
-                            print(f"Failed to insert/update concept: {subject}. Skipping this concept.")
-                            continue
-
-                        # Insert paper-concept relationship
-                        self.db_manager.insert_paper_concept(
-                            paper_id=paper_id,
-                            concept_id=concept_id,
-                            score=None  # Placeholder as CrossRef does not provide a score
-                        )
-
-                except Exception as e:
-                    print(f"An error occurred while processing paper '{result.get('title', ['No Title'])[0]}': {e}. Skipping this paper.")
-
-                if max_results is not None and count >= max_results:
-                    break
-        except Exception as e:
-            print(f"An error occurred: {e}")
-        finally:
-            print(f"Processed {count} results from CrossRef. Inserted {inserted_papers} new papers into the database.")
-            self.db_manager.close()
+    def result_title(self, result):
+        return result.get('title', ['No Title'])[0]
+
+    def dedup_record(self, result):
+        """(DOI, source id, {field: value}) of a work, as the dedup filter keys it."""
+        return result.get('DOI'), None, {
+            'title': result.get('title'),
+            'abstract': result.get('abstract'),
+            'publication_year': result.get('published'),
+            'pdf_url': self.extract_pdf_url(result.get('link', [])),
+            'authors': result.get('author'),
+            'concepts': result.get('subject'),
+        }
+
+    def store_result(self, result):
+        """
+        Insert one CrossRef work together with its authors and subjects.
+        Args:
+            result (dict): A work item from the CrossRef API.
+        Returns:
+            int or None: The paper's id, or None if the paper could not be inserted.
+        """
+        # Insert paper information into the database
+        paper_openalex_id = self.generate_openalex_id('CROSSREF_PAPER_', result.get('DOI', ''))
+        print(f"\nInserting paper: {result.get('title', ['No Title'])[0]}")
+        paper_id = self.db_manager.insert_paper(
+            openalex_id=paper_openalex_id,
+            title=result.get('title', ['No Title'])[0],
+            abstract=result.get('abstract', None),
+            publication_year=self.extract_year(result.get('published', {}).get('date-parts', [[None]])[0][0]),
+            journal_id=None,  # Assuming journal info is not directly available or requires separate handling
+            total_citations=0,  # Placeholder as CrossRef does not provide citation counts
+            citations_per_year=0.0,  # Placeholder
+            rank_citations_per_year=0,  # Placeholder
+            pdf_url=self.extract_pdf_url(result.get('link', [])),
+            doi=result.get('DOI', None),
+            influential_citations=0,  # Placeholder
+            delta_citations=0  # Placeholder
+        )
+
+        if not paper_id:
+            print(f"\nFailed to insert/update paper: {result.get('title', ['No Title'])[0]}. Skipping further processing for this paper.")
+            return None
+
+        # Insert author information
+        for author in result.get('author', []):
+            author_name = self.format_author_name(author)
+            if not author_name:
+                print("Author name is missing. Skipping this author.")
+                continue
+
+            # Generate a unique openalex_id for the author
+            author_openalex_id = self.generate_openalex_id('CROSSREF_AUTHOR_', author_name)
+
+            # Insert or update the author
+            author_id = self.db_manager.insert_author(
+                openalex_id=author_openalex_id,
+                name=author_name,
+                first_publication_year=0,  # Using 0 as a placeholder
+                author_age=0,  # Using 0 as a placeholder
+                h_index=0,  # Using 0 as a placeholder
+                delta_h_index=0,  # Using 0 as a placeholder
+                adopters=0,  # Using 0 as a placeholder
+                total_papers=0,  # Using 0 as a placeholder
+                delta_total_papers=0,  # Using 0 as a placeholder
+                recent_coauthors=0,  # Using 0 as a placeholder
+                coauthor_pagerank=0.0,  # Using 0.0 as a placeholder
+                total_citations=0,  # Using 0 as a placeholder
+                citations_per_paper=0.0,  # Using 0.0 as a placeholder
+                max_citations=0,  # Using 0 as a placeholder
+                total_journals=0  # Using 0 as a placeholder
+            )
+
+            if not author_id:
+                print(f"Failed to insert/update author: {author_name}. Skipping this author.")
+                continue
+
+            # Insert paper-author relationship
+            self.db_manager.insert_paper_author(paper_id=paper_id, author_id=author_id)
+
+        # Insert subject (category) information
+        concept_links = []
+        for subject in result.get('subject', []):
+            if not subject:
+                print("Subject is missing. Skipping this subject.")
+                continue
+
+            # Generate a unique openalex_id for the subject
+            subject_openalex_id = self.generate_openalex_id('CROSSREF_CONCEPT_', subject)
+
+            # Insert or update the concept
+            concept_id = self.db_manager.insert_concept(
+                openalex_id=subject_openalex_id,
+                name=subject
+            )
+
+            if not concept_id:
+                print(f"Failed to insert/update concept: {subject}. Skipping this concept.")
+                continue
+
+            # Queue paper-concept relationship
+            concept_links.append((paper_id, concept_id, None))  # Placeholder score as CrossRef does not provide one
+
+        # Insert all paper-concept relationships in one statement
+        self.db_manager.upsert_paper_concepts(concept_links)
+
+        return paper_id
 
     def extract_year(self, date_part):
         """
@@ -0,0 +1,200 @@
+# app/database/dedup.py
+
+import os
+import math
+import hashlib
+import threading
+import numpy as np
+from dotenv import load_dotenv
+from .DatabaseManager import DatabaseManager
+
+load_dotenv()
+
+# 'on' skips writes of records the database already holds; 'off' writes every record
+DEDUP_FILTER = os.getenv('DEDUP_FILTER', 'on')
+
+# Keys the filter is sized for at least; it is sized up from the papers table when it is warmed
+DEDUP_CAPACITY = int(os.getenv('DEDUP_CAPACITY', '10000000'))
+
+# False-positive rate of a single key at capacity; 10M keys at 0.1% take about 18 MB
+DEDUP_ERROR_RATE = float(os.getenv('DEDUP_ERROR_RATE', '0.001'))
+
+# Papers read per keyset page while warming the filter
+DEDUP_WARM_CHUNK = int(os.getenv('DEDUP_WARM_CHUNK', '50000'))
+
+# Keys held per paper: its identity plus one per field it can have filled (see get_paper_fields)
+KEYS_PER_PAPER = 10
+
+# Fields stored as rows linking the paper to other entities, rather than as paper columns
+LINK_FIELDS = ('authors', 'concepts', 'references')
+
+DOI_PREFIXES = ('https://doi.org/', 'http://doi.org/', 'https://dx.doi.org/', 'http://dx.doi.org/', 'doi:')
+
+
+def normalize_doi(doi):
+    """Lowercase a DOI and strip any resolver prefix, so stored DOIs match the ones OpenAlex returns."""
+    if not doi:
+        return None
+    doi = doi.strip().lower()
+    for prefix in DOI_PREFIXES:
+        if doi.startswith(prefix):
+            return doi[len(prefix):]
+    return doi
+
+
+class BloomFilter:
+    """
+    A Bloom filter over strings: a key that was added is always found, and a key that was not
+    is found with probability about 'error_rate' while the filter holds up to 'capacity' keys.
+    Bits live in a numpy array and keys are hashed and set a batch at a time.
+    """
+
+    def __init__(self, capacity, error_rate=DEDUP_ERROR_RATE):
+        self.capacity = max(1, capacity)
+        self.size = max(64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self.lock = threading.Lock()
+        # numpy view of 'bits' for setting a batch of keys at once
+        self._array = np.frombuffer(self.bits, dtype=np.uint8)
+        self._steps = np.arange(self.hashes, dtype=np.uint64)
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+    @staticmethod
+    def _digest(key):
+        """The two 64-bit hashes of 'key' that every bit position is derived from."""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+    def update(self, keys):
+        """Add every key in 'keys', hashing and setting them as one numpy batch."""
+        keys = list(keys)
+        if not keys:
+            return
+        digests = b''.join(hashlib.blake2b(key.encode(), digest_size=16).digest() for key in keys)
+        pairs = np.frombuffer(digests, dtype=np.uint64).reshape(-1, 2)
+        with np.errstate(over='ignore'):
+            positions = pairs[:, :1] + self._steps * (pairs[:, 1:] | np.uint64(1))
+        positions = (positions % np.uint64(self.size)).ravel()
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+        with self.lock:
+            np.bitwise_or.at(self._array, positions >> np.uint64(3), masks)
+            self.count += len(keys)
+
+    def add(self, key):
+        self.update([key])
+
+    def contains_all(self, keys):
+        """True if every key in 'keys' is (probably) in the filter."""
+        bits, size, mask = self.bits, self.size, 0xFFFFFFFFFFFFFFFF
+        for key in keys:
+            first, step = self._digest(key)
+            for i in range(self.hashes):
+                # Same double hashing as update(), whose uint64 arithmetic wraps around
+                position = ((first + i * step) & mask) % size
+                if not bits[position >> 3] & (1 << (position & 7)):
+                    return False
+        return True
+
+    def __contains__(self, key):
+        return self.contains_all([key])
+
+
+def record_keys(doi, source_id, fields, source=None):
+    """
+    Filter keys of a paper: its identity (the normalized DOI, or the source id without one)
+    and one 'identity|field' key per field in 'fields' that holds a value. 'fields' maps field
+    names to values or to names of filled fields; empty values and 0 are placeholders.
+    Link fields (LINK_FIELDS) are keyed per harvest 'source' as 'identity|field@source': every
+    source links its own author, concept and work ids, so links stored by one source say
+    nothing about the links another would add. Without a source they are left out.
+    """
+    doi = normalize_doi(doi)
+    identity = f"doi:{doi}" if doi else f"id:{source_id}" if source_id else None
+    if identity is None:
+        return []
+    if isinstance(fields, dict):
+        fields = [field for field, value in fields.items() if value]
+    keys = [identity]
+    for field in fields:
+        if field not in LINK_FIELDS:
+            keys.append(f"{identity}|{field}")
+        elif source:
+            keys.append(f"{identity}|{field}@{source}")
+    return keys
+
+
+class DedupFilter:
+    """
+    Papers known to be stored, with the fields they have filled. A record whose identity and
+    carried fields are all in the filter would not change its paper (upserts only fill NULLs and
+    placeholders), so the wrappers skip it instead of writing it. A false positive needs every
+    one of the record's keys to collide, and every record carries at least a title.
+    """
+
+    def __init__(self, capacity=DEDUP_CAPACITY, error_rate=DEDUP_ERROR_RATE):
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.papers = 0
+
+    def seen(self, doi, source_id, fields, source=None):
+        """True if a record with these fields, harvested from 'source', would add nothing to the database."""
+        keys = record_keys(doi, source_id, fields, source)
+        return bool(keys) and self.bloom.contains_all(keys)
+
+    def known(self, doi, source_id):
+        """True if a paper with this DOI (or source id, without a DOI) is stored, whatever fields it has."""
+        keys = record_keys(doi, source_id, [])
+        return bool(keys) and self.bloom.contains_all(keys)
+
+    def add(self, doi, source_id, fields, source=None):
+        """Record that a paper with these fields, harvested from 'source', is stored."""
+        self.bloom.update(record_keys(doi, source_id, fields, source))
+        self.papers += 1
+
+    def warm(self, db_manager, chunk_size=DEDUP_WARM_CHUNK):
+        """
+        Add every stored paper, reading the papers table one keyset page at a time. The tables
+        do not record which source stored a link, so warmed papers carry no link keys.
+        """
+        last_id = 0
+        while True:
+            rows = db_manager.get_paper_fields(last_id, chunk_size)
+            if not rows:
+                break
+            keys = []
+            for _, doi, openalex_id, filled in rows:
+                keys.extend(record_keys(doi, openalex_id, filled))
+            self.bloom.update(keys)
+            self.papers += len(rows)
+            last_id = rows[-1][0]
+
+
+# The process-wide filter shared by every ingest wrapper; warmed on first use
+_dedup_filter = None
+_dedup_filter_lock = threading.Lock()
+
+
+def get_dedup_filter():
+    """
+    Return the shared DedupFilter, warming it from the papers table the first time, or None
+    if DEDUP_FILTER is off. It is sized for the stored papers plus room to grow.
+    """
+    global _dedup_filter
+    if DEDUP_FILTER != 'on':
+        return None
+    with _dedup_filter_lock:
+        if _dedup_filter is None:
+            db_manager = DatabaseManager()
+            try:
+                papers = db_manager.estimate_paper_count()
+                dedup_filter = DedupFilter(capacity=max(DEDUP_CAPACITY, 2 * papers * KEYS_PER_PAPER))
+                dedup_filter.warm(db_manager)
+            finally:
+                db_manager.close()
+            print(f"Dedup filter warmed with {dedup_filter.papers} papers ({dedup_filter.bloom.nbytes / 1e6:.1f} MB).")
+            _dedup_filter = dedup_filter
+        return _dedup_filter
@@ -0,0 +1,42 @@
+# app/database/enrich_placeholders.py
+
+import time
+import argparse
+from .open_alex_db_wrapper import OpenAlexDbWrapper, ENRICH_PAGE_SIZE, ENRICH_WORKERS
+from .semantic_scholar_db_wrapper import SemanticScholarDbWrapper
+from .APIs.semantic_scholar.semantic_scholar_wrapper import BATCH_SIZE
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fill placeholder citation counts and abstracts from OpenAlex or Semantic Scholar.")
+    parser.add_argument('--source', choices=['openalex', 'semantic_scholar'], default='openalex',
+                        help="API to enrich from (default: openalex).")
+    parser.add_argument('--page-size', type=int, default=None,
+                        help=f"Papers per keyset page (default: {ENRICH_PAGE_SIZE} for OpenAlex, {BATCH_SIZE} for Semantic Scholar).")
+    parser.add_argument('--workers', type=int, default=ENRICH_WORKERS, help="Concurrent OpenAlex requests per page.")
+    parser.add_argument('--max-pages', type=int, default=None, help="Stop after this many pages (default: finish the sweep).")
+    parser.add_argument('--continuous', action='store_true', help="Keep sweeping until interrupted.")
+    parser.add_argument('--interval', type=float, default=300, help="Seconds to wait between sweeps with --continuous.")
+    args = parser.parse_args(argv)
+
+    if args.source == 'semantic_scholar':
+        wrapper = SemanticScholarDbWrapper()
+        run_sweep = lambda: wrapper.update_existing_entries(args.page_size or BATCH_SIZE, args.max_pages)
+    else:
+        wrapper = OpenAlexDbWrapper()
+        run_sweep = lambda: wrapper.update_existing_entries(args.page_size or ENRICH_PAGE_SIZE, args.workers, args.max_pages)
+    # Enrichment opens its own connection for every sweep
+    wrapper.db_manager.close()
+    try:
+        while True:
+            updated = run_sweep()
+            print(f"Updated {updated} papers with placeholders.")
+            if not args.continuous:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("Enrichment interrupted; the next run resumes from the last committed page.")
+
+
+if __name__ == '__main__':
+    main()
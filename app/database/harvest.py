@@ -0,0 +1,213 @@
+# app/database/harvest.py
+
+import json
+from itertools import islice
+from .DatabaseManager import INGEST_BATCH_SIZE
+from .pipeline import IngestionPipeline, format_stats
+
+
+class ResumableHarvest:
+    """
+    Progress of one (source, query) harvest, persisted in the harvest_checkpoints table.
+    A rerun resumes from 'resume_from', the API handler's position after the last stored
+    result, and a harvest that reached the end of its results (or 'max_results') is done,
+    unless 'refresh' starts it over.
+    """
+
+    def __init__(self, db_manager, source, query, max_results=None, refresh=False):
+        self.db_manager = db_manager
+        self.source = source
+        self.query = query
+        self.max_results = max_results
+        self.resume_from = None
+        self.records = 0
+        self.exhausted = False
+        checkpoint = None if refresh else db_manager.get_harvest_checkpoint(source, query)
+        if checkpoint:
+            position, self.records, self.exhausted = checkpoint
+            self.resume_from = json.loads(position) if position else None
+        self.start_records = self.records
+        self.position = self.resume_from
+
+    @property
+    def done(self):
+        """True if there is nothing left to fetch for this run."""
+        return self.exhausted or (self.max_results is not None and self.records >= self.max_results)
+
+    @property
+    def remaining(self):
+        """Results still to fetch to reach 'max_results', or None without a limit."""
+        if self.max_results is None:
+            return None
+        return max(self.max_results - self.records, 0)
+
+    def save(self, position, processed):
+        """
+        IngestionPipeline checkpoint callback: 'processed' results of this run are stored,
+        up to and including the one at 'position'. Committed together with the papers.
+        """
+        self.position = position
+        self.records = self.start_records + processed
+        self.db_manager.set_harvest_checkpoint(self.source, self.query, json.dumps(position), self.records)
+        self.db_manager.commit_batch()
+
+    def finish(self, exhausted):
+        """Record the final position; an exhausted harvest is skipped by later runs."""
+        self.exhausted = exhausted
+        position = json.dumps(self.position) if self.position is not None else None
+        self.db_manager.set_harvest_checkpoint(self.source, self.query, position, self.records, exhausted)
+        self.db_manager.commit_batch()
+
+
+class HarvestWrapper:
+    """
+    Query harvesting shared by the source wrappers: a resumable IngestionPipeline from the
+    source's API into the database, with the dedup filter and the run's QuotaAllocator.
+    A source sets HARVEST_SOURCE and SOURCE_NAME, creates its 'api_handler' (whose
+    harvest(query, max_results, resume_from) yields (position, result) pairs) and its
+    'db_manager', and implements store_result and dedup_record.
+    """
+
+    # Name of the source's harvests in the harvest_checkpoints table and in the QuotaAllocator
+    HARVEST_SOURCE = None
+    # Name of the source in messages
+    SOURCE_NAME = None
+
+    def __init__(self, batch_size=INGEST_BATCH_SIZE, dedup=None):
+        self.batch_size = batch_size
+        # Shared DedupFilter of stored papers; without one every result is written
+        self.dedup = dedup
+        self.deduplicated = 0
+        # QuotaAllocator of the current run, if its quota is shared with other sources
+        self.quota = None
+
+    def query_and_store(self, query, max_results=None, refresh=False, quota=None):
+        """
+        Fetch results from the source for the query and store them in the database.
+        Fetching, normalizing (if the source has a normalize_result stage) and writing run as
+        overlapping stages of an IngestionPipeline. Progress is checkpointed per query, so a rerun
+        resumes where this one stopped and a finished harvest is skipped unless 'refresh' is set.
+        With a QuotaAllocator 'quota', results are fetched only while it grants this source more
+        of a request shared with other sources.
+        Returns {'processed', 'inserted', 'deduplicated', 'error', 'stages'} for the run.
+        """
+        harvest = ResumableHarvest(self.db_manager, self.HARVEST_SOURCE, query, max_results, refresh)
+        if harvest.done:
+            print(f"Skipping {self.SOURCE_NAME} harvest for '{query}': already completed with {harvest.records} results.")
+            self.db_manager.close()
+            return {'processed': 0, 'inserted': 0, 'error': None, 'skipped': True}
+        error = None
+        self.deduplicated = 0
+        self.quota = quota
+        print(f"Querying {self.SOURCE_NAME} for: '{query}'...")
+        self.db_manager.set_autocommit(False)
+        remaining = harvest.remaining
+        pipeline = IngestionPipeline(
+            lambda: self.limit_to_quota(islice(
+                self.api_handler.harvest(query, max_results=remaining, resume_from=harvest.resume_from),
+                remaining
+            )),
+            self.write_batch,
+            normalize=getattr(self, 'normalize_result', None),
+            batch_size=self.batch_size,
+            checkpoint=harvest.save
+        )
+        try:
+            pipeline.run()
+            # Fewer results than asked for means the source has no more, unless the quota went to other sources
+            cut_short = quota is not None and self.HARVEST_SOURCE in quota.cut_short
+            harvest.finish(exhausted=not cut_short and (remaining is None or pipeline.processed < remaining))
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            error = str(e)
+        finally:
+            print(f"Processed {pipeline.processed} results from {self.SOURCE_NAME}. "
+                  f"Inserted {pipeline.inserted} new papers into the database.")
+            if self.dedup:
+                print(f"Skipped {self.deduplicated} results whose papers are already stored.")
+            print(f"{self.SOURCE_NAME} ingestion throughput: {format_stats(pipeline.stats())}")
+            self.finish_run()
+            self.db_manager.close()
+        return {
+            'processed': pipeline.processed, 'inserted': pipeline.inserted, 'deduplicated': self.deduplicated,
+            'error': error, 'stages': pipeline.stats()
+        }
+
+    def write_batch(self, results):
+        """
+        Store a batch of results in one transaction and return the number of papers committed.
+        A result that fails is rolled back on its own, and the results before and after it in
+        the batch are still committed. Results after the first one kept are written under a
+        savepoint for this; until then a rollback discards only the failing result anyway.
+        Results the dedup filter has seen with all of their fields are skipped.
+        """
+        batch_papers = 0
+        new_papers = 0
+        stored = []
+        written = 0
+        for result in results:
+            record = self.dedup_record(result) if self.dedup else None
+            if self.dedup and self.dedup.seen(*record, self.HARVEST_SOURCE):
+                self.deduplicated += 1
+                continue
+            # Without the dedup filter every stored paper counts as new
+            known = self.dedup is not None and self.dedup.known(*record[:2])
+            # Earlier results of the batch are in the transaction and must survive a failure
+            guarded = written > 0
+            if guarded:
+                self.db_manager.savepoint()
+            try:
+                paper_id = self.store_result(result)
+                kept = not self.db_manager.batch_failed()
+            except Exception as e:
+                print(f"An error occurred while processing paper '{self.result_title(result)}': {e}. Rolling back this paper.")
+                kept = False
+            if not kept:
+                if guarded:
+                    self.db_manager.rollback_to_savepoint()
+                else:
+                    self.db_manager.rollback_batch()
+                self.discard_result()
+                continue
+            if guarded:
+                self.db_manager.release_savepoint()
+            written += 1
+            if paper_id:
+                batch_papers += 1
+                new_papers += not known
+                stored.append(result)
+        self.flush_batch()
+        committed = self.db_manager.commit_batch()
+        if self.quota:
+            self.quota.record(self.HARVEST_SOURCE, len(results), new_papers if committed else 0)
+        if not committed:
+            return 0
+        if self.dedup:
+            for result in stored:
+                self.dedup.add(*self.dedup_record(result), self.HARVEST_SOURCE)
+        return batch_papers
+
+    def limit_to_quota(self, results):
+        """Pass 'results' through this run's QuotaAllocator, if there is one."""
+        return self.quota.limit(self.HARVEST_SOURCE, results) if self.quota else results
+
+    def result_title(self, result):
+        """Title of a result, for messages."""
+        return result.get('title')
+
+    def flush_batch(self):
+        """Called before a batch commits, to write what the source queued for the whole batch."""
+
+    def discard_result(self):
+        """Called when the last stored result is rolled back, to drop what the source queued for it."""
+
+    def finish_run(self):
+        """Called once a query_and_store run is over, before the connection is closed."""
+
+    def store_result(self, result):
+        """Store one result with its links. Returns the paper's id, or None if it was not stored."""
+        raise NotImplementedError
+
+    def dedup_record(self, result):
+        """(DOI, source id, {field: value}) of a result, as the dedup filter keys it."""
+        raise NotImplementedError
@@ -0,0 +1,238 @@
+# app/database/job_worker.py
+
+import os
+import time
+import socket
+import argparse
+import threading
+from dotenv import load_dotenv
+from .DatabaseManager import DatabaseManager
+
+load_dotenv()
+
+# Seconds an idle worker waits before looking for a queued job again
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '2'))
+
+# Seconds between heartbeats of a running job
+JOB_HEARTBEAT_INTERVAL = float(os.getenv('JOB_HEARTBEAT_INTERVAL', '15'))
+
+# Seconds without a heartbeat after which a running job's worker is presumed dead and the job is requeued
+JOB_STALE_AFTER = float(os.getenv('JOB_STALE_AFTER', '120'))
+
+# Runs of a job (including requeues after a worker died) before it is failed
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+
+# Job kinds that refresh paper_features; each success queues a 'snapshot' job so the ranking
+# snapshot follows the refresh (empty to export snapshots only on request)
+SNAPSHOT_AFTER_JOBS = [kind for kind in os.getenv('SNAPSHOT_AFTER_JOBS', 'ingest,enrich,metrics,compress').split(',') if kind]
+
+# Directory holding the ranking model files (ml_model.pkl, scaler.pkl, top100MLpapers.txt)
+MODEL_DIR = os.getenv('MODEL_DIR', os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_ingest(params):
+    """Harvest 'query' from every source. Params: query, num_articles, refresh."""
+    from .populate_db import DatabaseSearchService
+    search_service = DatabaseSearchService(
+        query=params['query'],
+        num_articles=int(params.get('num_articles', 1000)),
+        refresh=bool(params.get('refresh', False))
+    )
+    return search_service.search_and_store()
+
+
+def run_enrich(params):
+    """One placeholder enrichment sweep. Params: source ('openalex' or 'semantic_scholar'), max_pages."""
+    from .open_alex_db_wrapper import OpenAlexDbWrapper, ENRICH_PAGE_SIZE, ENRICH_WORKERS
+    from .semantic_scholar_db_wrapper import SemanticScholarDbWrapper
+    from .APIs.semantic_scholar.semantic_scholar_wrapper import BATCH_SIZE
+    max_pages = params.get('max_pages')
+    if params.get('source') == 'semantic_scholar':
+        wrapper = SemanticScholarDbWrapper()
+        run_sweep = lambda: wrapper.update_existing_entries(BATCH_SIZE, max_pages)
+    else:
+        wrapper = OpenAlexDbWrapper()
+        run_sweep = lambda: wrapper.update_existing_entries(ENRICH_PAGE_SIZE, ENRICH_WORKERS, max_pages)
+    # Enrichment opens its own connection for every sweep
+    wrapper.db_manager.close()
+    updated = run_sweep()
+    if updated:
+        # Publish the filled-in citation counts and abstracts to the ranking features
+        db_manager = DatabaseManager()
+        try:
+            db_manager.refresh_paper_features()
+        finally:
+            db_manager.close()
+    return {'updated': updated}
+
+
+def run_metrics(params):
+    """Recompute author, paper and journal metrics and refresh the ranking features."""
+    from . import compute_metrics
+    compute_metrics.main()
+    return {}
+
+
+def run_retrain(params):
+    """Retrain the ranking model on the current corpus and save it where the app loads it from."""
+    # RankModel imports 'database.*' like the Reflex app, so the worker runs with the app directory on PYTHONPATH
+    from model.RankModel import RankModel
+    working_directory = os.getcwd()
+    os.chdir(MODEL_DIR)
+    try:
+        # Without saved model files, creating the model already trains it
+        has_model = os.path.exists('ml_model.pkl') and os.path.exists('scaler.pkl')
+        rank_model = RankModel()
+        try:
+            if has_model:
+                rank_model.train_ml_model()
+        finally:
+            rank_model.close()
+    finally:
+        os.chdir(working_directory)
+    return {'model_dir': MODEL_DIR}
+
+
+def run_compress(params):
+    """Move inline abstracts into compressed storage. Params: retrain."""
+    from .compress_abstracts import compress_abstracts
+    db_manager = DatabaseManager()
+    try:
+        stats = compress_abstracts(db_manager, retrain=bool(params.get('retrain', False)))
+        db_manager.refresh_paper_features()
+    finally:
+        db_manager.close()
+    return stats
+
+
+def run_snapshot(params):
+    """
+    Export the ranking corpus to a new snapshot, read by the app's RankModel instead of the
+    database. Params: force (export even if the current snapshot is still fresh).
+    """
+    # Like run_retrain: 'model.*' needs the app directory on PYTHONPATH, and the app resolves
+    # a relative RANKING_SNAPSHOT_DIR from MODEL_DIR
+    import psycopg2
+    from model.snapshot import export_snapshot
+    working_directory = os.getcwd()
+    os.chdir(MODEL_DIR)
+    connection = psycopg2.connect(os.getenv('DATABASE_URL'))
+    try:
+        manifest = export_snapshot(connection, force=bool(params.get('force', False)))
+    finally:
+        connection.close()
+        os.chdir(working_directory)
+    return {'version': manifest['version'], 'row_count': manifest['row_count']}
+
+
+# Job kind -> handler taking the job's params and returning its JSON-serializable result
+JOB_HANDLERS = {
+    'ingest': run_ingest,
+    'enrich': run_enrich,
+    'metrics': run_metrics,
+    'retrain': run_retrain,
+    'compress': run_compress,
+    'snapshot': run_snapshot,
+}
+
+
+class JobHeartbeat:
+    """Refresh a running job's heartbeat from a background thread, on its own connection."""
+
+    def __init__(self, job_id, interval=JOB_HEARTBEAT_INTERVAL):
+        self.job_id = job_id
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f'job-heartbeat-{job_id}', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self):
+        db_manager = None
+        try:
+            while not self.stopped.wait(self.interval):
+                db_manager = db_manager or DatabaseManager()
+                db_manager.heartbeat_job(self.job_id)
+        except Exception as e:
+            print(f"Heartbeat of job {self.job_id} stopped: {e}")
+        finally:
+            if db_manager is not None:
+                db_manager.close()
+
+
+def run_job(db_manager, job_id, kind, params):
+    """Run one claimed job and record its result or error. Returns True if it succeeded."""
+    print(f"Running {kind} job {job_id} with {params}.")
+    start_time = time.perf_counter()
+    heartbeat = JobHeartbeat(job_id).start()
+    try:
+        handler = JOB_HANDLERS.get(kind)
+        if handler is None:
+            raise ValueError(f"Unknown job kind '{kind}'.")
+        result = handler(params)
+    except (Exception, SystemExit) as e:
+        # compute_metrics exits when it cannot connect; that fails the job, not the worker
+        print(f"{kind} job {job_id} failed: {e}")
+        db_manager.finish_job(job_id, error=str(e) or type(e).__name__)
+        return False
+    finally:
+        heartbeat.stop()
+    db_manager.finish_job(job_id, result=result)
+    print(f"{kind} job {job_id} finished in {time.perf_counter() - start_time:.2f}s.")
+    if kind in SNAPSHOT_AFTER_JOBS:
+        # One queued export covers every refresh before it runs
+        db_manager.enqueue_job('snapshot', created_by=f"{kind} job {job_id}", unless_queued=True)
+    return True
+
+
+def run_worker(kinds=None, poll_interval=JOB_POLL_INTERVAL, once=False, worker=None):
+    """
+    Claim and run queued jobs (of 'kinds', if given) one at a time until interrupted, or until
+    the queue is empty with 'once'. Run several workers to run jobs concurrently.
+    Returns the number of jobs run.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    db_manager = DatabaseManager()
+    ran = 0
+    print(f"Job worker {worker} started for {', '.join(kinds) if kinds else 'all'} jobs.")
+    try:
+        while True:
+            requeued = db_manager.requeue_stale_jobs(JOB_STALE_AFTER, JOB_MAX_ATTEMPTS)
+            if requeued:
+                print(f"Requeued {requeued} jobs whose worker stopped responding.")
+            job = db_manager.claim_job(worker, kinds)
+            if job is None:
+                if once:
+                    break
+                time.sleep(poll_interval)
+                continue
+            run_job(db_manager, *job)
+            ran += 1
+    except KeyboardInterrupt:
+        print(f"Job worker stopped; a job it was running is requeued after {JOB_STALE_AFTER:.0f}s.")
+    finally:
+        db_manager.close()
+    return ran
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run queued ingest, enrichment, metrics, retraining, compression and snapshot jobs.")
+    parser.add_argument('--kinds', nargs='+', choices=sorted(JOB_HANDLERS), default=None,
+                        help="Only run jobs of these kinds (default: all).")
+    parser.add_argument('--poll-interval', type=float, default=JOB_POLL_INTERVAL,
+                        help="Seconds to wait between looks at an empty queue.")
+    parser.add_argument('--once', action='store_true', help="Exit once the queue is empty.")
+    args = parser.parse_args(argv)
+
+    ran = run_worker(args.kinds, args.poll_interval, args.once)
+    print(f"Ran {ran} jobs.")
+
+
+if __name__ == '__main__':
+    main()
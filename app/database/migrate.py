@@ -0,0 +1,177 @@
+# app/database/migrate.py
+
+import os
+import re
+import argparse
+import psycopg2
+from .DatabaseManager import DatabaseManager
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# Migrations are pairs of files named like '0002_hot_path_indexes.up.sql' / '0002_hot_path_indexes.down.sql'
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d+)_(\w+)\.(up|down)\.sql$')
+
+
+# Oldest version downgrade() can return to: 0001 adopts existing tables, and rolling it back would drop the corpus
+BASELINE_VERSION = 1
+
+
+class Migration:
+    def __init__(self, version, name, up_path, down_path):
+        self.version = version
+        self.name = name
+        self.up_path = up_path
+        self.down_path = down_path
+
+    def read(self, direction):
+        """Return the SQL script for 'up' or 'down'."""
+        path = self.up_path if direction == 'up' else self.down_path
+        if not path:
+            raise FileNotFoundError(f"Migration {self.version:04d}_{self.name} has no '{direction}' script.")
+        with open(path, 'r') as file:
+            return file.read()
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """
+    Find the versioned migration scripts in 'directory'.
+    Returns the migrations sorted by version.
+    """
+    migrations = {}
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        version, name, direction = int(match.group(1)), match.group(2), match.group(3)
+        migration = migrations.setdefault(version, Migration(version, name, None, None))
+        if migration.name != name:
+            raise ValueError(f"Migration version {version} is used by both '{migration.name}' and '{name}'.")
+        if direction == 'up':
+            migration.up_path = os.path.join(directory, filename)
+        else:
+            migration.down_path = os.path.join(directory, filename)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+class MigrationRunner:
+    """
+    Apply and roll back the SQL migrations in app/database/migrations.
+    Applied versions are recorded in the 'schema_migrations' table and every
+    migration runs in its own transaction, so a failing script leaves the schema untouched.
+    """
+
+    def __init__(self, db_manager=None, directory=MIGRATIONS_DIR):
+        self.db_manager = db_manager or DatabaseManager()
+        self.migrations = discover_migrations(directory)
+
+    def ensure_version_table(self):
+        self.db_manager.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP NOT NULL DEFAULT now()
+            )
+        """)
+        self.db_manager.connection.commit()
+
+    def applied_versions(self):
+        self.db_manager.cursor.execute("SELECT version FROM schema_migrations ORDER BY version")
+        return [row[0] for row in self.db_manager.cursor.fetchall()]
+
+    def status(self):
+        """Return (version, name, applied) for every known migration."""
+        self.ensure_version_table()
+        applied = set(self.applied_versions())
+        return [(m.version, m.name, m.version in applied) for m in self.migrations]
+
+    def upgrade(self, target=None):
+        """
+        Apply every pending migration up to and including 'target' (default: the latest).
+        Returns the list of applied versions.
+        """
+        self.db_manager.set_autocommit(False)
+        self.ensure_version_table()
+        applied = set(self.applied_versions())
+        done = []
+        for migration in self.migrations:
+            if migration.version in applied:
+                continue
+            if target is not None and migration.version > target:
+                break
+            self._run(migration, 'up')
+            done.append(migration.version)
+        return done
+
+    def downgrade(self, target):
+        """
+        Roll back every applied migration newer than 'target', which must be at least BASELINE_VERSION.
+        Returns the list of rolled back versions.
+        """
+        if target < BASELINE_VERSION:
+            raise ValueError(f"Cannot roll back below version {BASELINE_VERSION}: "
+                             f"migration 0001 holds the original tables and their data.")
+        self.db_manager.set_autocommit(False)
+        self.ensure_version_table()
+        applied = set(self.applied_versions())
+        done = []
+        for migration in reversed(self.migrations):
+            if migration.version <= target:
+                break
+            if migration.version not in applied:
+                continue
+            self._run(migration, 'down')
+            done.append(migration.version)
+        return done
+
+    def _run(self, migration, direction):
+        label = f"{migration.version:04d}_{migration.name}"
+        try:
+            self.db_manager.cursor.execute(migration.read(direction))
+            if direction == 'up':
+                self.db_manager.cursor.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (migration.version, migration.name)
+                )
+            else:
+                self.db_manager.cursor.execute(
+                    "DELETE FROM schema_migrations WHERE version = %s", (migration.version,)
+                )
+            self.db_manager.connection.commit()
+            print(f"Migration {label} {'applied' if direction == 'up' else 'rolled back'}.")
+        except psycopg2.Error as e:
+            self.db_manager.connection.rollback()
+            print(f"Error running migration {label} ({direction}): {e}")
+            raise
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply or roll back database schema migrations.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    upgrade_parser = subparsers.add_parser('upgrade', help="Apply pending migrations.")
+    upgrade_parser.add_argument('target', type=int, nargs='?', default=None,
+                                help="Version to upgrade to (default: latest).")
+    downgrade_parser = subparsers.add_parser('downgrade', help="Roll back applied migrations.")
+    downgrade_parser.add_argument('target', type=int,
+                                  help=f"Version to roll back to (at least {BASELINE_VERSION}).")
+    subparsers.add_parser('status', help="List migrations and whether they are applied.")
+    args = parser.parse_args(argv)
+    if args.command == 'downgrade' and args.target < BASELINE_VERSION:
+        parser.error(f"migration 0001 cannot be rolled back; the oldest target is {BASELINE_VERSION}.")
+
+    runner = MigrationRunner()
+    try:
+        if args.command == 'upgrade':
+            applied = runner.upgrade(args.target)
+            print(f"Applied {len(applied)} migration(s).")
+        elif args.command == 'downgrade':
+            rolled_back = runner.downgrade(args.target)
+            print(f"Rolled back {len(rolled_back)} migration(s).")
+        else:
+            for version, name, applied in runner.status():
+                print(f"{version:04d}_{name}: {'applied' if applied else 'pending'}")
+    finally:
+        runner.db_manager.close()
+
+
+if __name__ == '__main__':
+    main()
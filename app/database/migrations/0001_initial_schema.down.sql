@@ -0,0 +1,7 @@
+-- 0001 adopts the tables of databases created before migrations existed, so rolling it back
+-- would drop the whole corpus. It is irreversible; MigrationRunner.downgrade stops at version 1.
+DO $$
+BEGIN
+    RAISE EXCEPTION 'Migration 0001_initial_schema cannot be rolled back: it would drop every stored paper.';
+END
+$$;
@@ -0,0 +1,83 @@
+-- Baseline schema matching app/models.py.
+-- Every statement is IF NOT EXISTS so databases created before migrations existed can adopt it.
+
+CREATE TABLE IF NOT EXISTS journals (
+    id SERIAL PRIMARY KEY,
+    journal_name VARCHAR(255) NOT NULL UNIQUE,
+    mean_citations_per_paper DOUBLE PRECISION,
+    delta_mean_citations_per_paper DOUBLE PRECISION,
+    journal_h_index INTEGER,
+    delta_journal_h_index INTEGER,
+    max_citations_paper INTEGER,
+    total_papers_published INTEGER,
+    delta_total_papers_published INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS authors (
+    id SERIAL PRIMARY KEY,
+    openalex_id VARCHAR(50) NOT NULL UNIQUE,
+    name VARCHAR(500) NOT NULL,
+    first_publication_year INTEGER,
+    author_age INTEGER,
+    h_index INTEGER,
+    delta_h_index INTEGER,
+    adopters INTEGER,
+    total_papers INTEGER,
+    delta_total_papers INTEGER,
+    recent_coauthors INTEGER,
+    coauthor_pagerank DOUBLE PRECISION,
+    total_citations INTEGER,
+    citations_per_paper DOUBLE PRECISION,
+    max_citations INTEGER,
+    total_journals INTEGER,
+    mean_journal_citations_per_paper DOUBLE PRECISION
+);
+
+CREATE TABLE IF NOT EXISTS papers (
+    id SERIAL PRIMARY KEY,
+    openalex_id VARCHAR(50) UNIQUE,
+    title VARCHAR(2000) NOT NULL,
+    abstract TEXT,
+    publication_year INTEGER,
+    journal_id INTEGER REFERENCES journals (id),
+    total_citations INTEGER,
+    citations_per_year DOUBLE PRECISION,
+    rank_citations_per_year INTEGER,
+    pdf_url VARCHAR(1000),
+    doi VARCHAR(255) UNIQUE,
+    influential_citations INTEGER,
+    delta_citations INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS paper_authors (
+    paper_id INTEGER NOT NULL REFERENCES papers (id),
+    author_id INTEGER NOT NULL REFERENCES authors (id),
+    PRIMARY KEY (paper_id, author_id)
+);
+
+CREATE TABLE IF NOT EXISTS citations (
+    id SERIAL PRIMARY KEY,
+    paper_id INTEGER REFERENCES papers (id),
+    author_id INTEGER REFERENCES authors (id),
+    citation_year INTEGER,
+    citation_count INTEGER,
+    citing_paper_id INTEGER REFERENCES papers (id)
+);
+
+CREATE TABLE IF NOT EXISTS concepts (
+    id SERIAL PRIMARY KEY,
+    openalex_id VARCHAR(50) NOT NULL UNIQUE,
+    name VARCHAR(255)
+);
+
+CREATE TABLE IF NOT EXISTS paper_concepts (
+    paper_id INTEGER NOT NULL REFERENCES papers (id),
+    concept_id INTEGER NOT NULL REFERENCES concepts (id),
+    score DOUBLE PRECISION,
+    PRIMARY KEY (paper_id, concept_id)
+);
+
+CREATE TABLE IF NOT EXISTS admins (
+    id SERIAL PRIMARY KEY,
+    email VARCHAR(255) NOT NULL UNIQUE
+);
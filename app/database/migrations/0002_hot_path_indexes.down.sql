@@ -0,0 +1,8 @@
+DROP INDEX IF EXISTS ix_authors_ranking_features;
+DROP INDEX IF EXISTS ix_papers_placeholder_citations;
+DROP INDEX IF EXISTS ix_citations_citing_paper_id;
+DROP INDEX IF EXISTS ix_citations_paper_id;
+DROP INDEX IF EXISTS ix_paper_concepts_concept_id;
+DROP INDEX IF EXISTS ix_papers_publication_year;
+DROP INDEX IF EXISTS ix_papers_journal_id;
+DROP INDEX IF EXISTS ix_paper_authors_author_id;
@@ -0,0 +1,22 @@
+-- Secondary indexes for the foreign keys and filters used by ranking, metrics and enrichment.
+
+-- compute_author_metrics looks up every paper of an author; (author_id, paper_id) answers it from the index alone
+CREATE INDEX IF NOT EXISTS ix_paper_authors_author_id ON paper_authors (author_id, paper_id);
+
+-- compute_journal_metrics loads the papers of each journal
+CREATE INDEX IF NOT EXISTS ix_papers_journal_id ON papers (journal_id);
+
+-- Author age and recent-coauthor windows filter on publication_year
+CREATE INDEX IF NOT EXISTS ix_papers_publication_year ON papers (publication_year);
+
+CREATE INDEX IF NOT EXISTS ix_paper_concepts_concept_id ON paper_concepts (concept_id);
+CREATE INDEX IF NOT EXISTS ix_citations_paper_id ON citations (paper_id);
+CREATE INDEX IF NOT EXISTS ix_citations_citing_paper_id ON citations (citing_paper_id);
+
+-- Partial index over the placeholder papers scanned by get_entries_with_placeholders, ordered by id
+CREATE INDEX IF NOT EXISTS ix_papers_placeholder_citations ON papers (id)
+    WHERE total_citations IS NULL OR total_citations = 0;
+
+-- Covering index for the per-paper author aggregates in get_articles_from_db
+CREATE INDEX IF NOT EXISTS ix_authors_ranking_features ON authors (id)
+    INCLUDE (h_index, total_papers, total_citations, name);
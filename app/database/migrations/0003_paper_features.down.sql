@@ -0,0 +1 @@
+DROP MATERIALIZED VIEW IF EXISTS paper_features;
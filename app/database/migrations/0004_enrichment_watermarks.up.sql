@@ -0,0 +1,7 @@
+-- Resume points for the background enrichment jobs that page through papers by id.
+-- last_paper_id is the highest id already processed in the current sweep (0 = start over).
+CREATE TABLE IF NOT EXISTS enrichment_watermarks (
+    job VARCHAR(64) PRIMARY KEY,
+    last_paper_id INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
@@ -0,0 +1,2 @@
+DROP INDEX IF EXISTS ux_citations_edge;
+DROP TABLE IF EXISTS pending_citations;
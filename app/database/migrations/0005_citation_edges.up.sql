@@ -0,0 +1,18 @@
+-- Citation edges captured from OpenAlex referenced_works.
+-- Edges whose cited work is not stored yet wait in pending_citations until it is ingested.
+CREATE TABLE IF NOT EXISTS pending_citations (
+    citing_paper_id INTEGER NOT NULL REFERENCES papers (id) ON DELETE CASCADE,
+    cited_openalex_id VARCHAR(50) NOT NULL,
+    PRIMARY KEY (citing_paper_id, cited_openalex_id)
+);
+
+-- Resolution joins pending edges to papers.openalex_id
+CREATE INDEX IF NOT EXISTS ix_pending_citations_cited_openalex_id ON pending_citations (cited_openalex_id);
+
+-- One row per (cited, citing) pair so resolved edges can be inserted with ON CONFLICT DO NOTHING
+DELETE FROM citations duplicate
+    USING citations kept
+    WHERE duplicate.id > kept.id
+      AND duplicate.paper_id = kept.paper_id
+      AND duplicate.citing_paper_id = kept.citing_paper_id;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_citations_edge ON citations (paper_id, citing_paper_id);
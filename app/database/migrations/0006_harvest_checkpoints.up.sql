@@ -0,0 +1,12 @@
+-- Resume points for query harvests, one row per (source, query).
+-- position is the source's resume token after the last processed result (JSON, NULL = from the start),
+-- records counts the results processed so far, and exhausted marks a harvest that reached the end of its results.
+CREATE TABLE IF NOT EXISTS harvest_checkpoints (
+    source VARCHAR(64) NOT NULL,
+    query TEXT NOT NULL,
+    position TEXT,
+    records INTEGER NOT NULL DEFAULT 0,
+    exhausted BOOLEAN NOT NULL DEFAULT false,
+    updated_at TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (source, query)
+);
@@ -0,0 +1,22 @@
+-- Persistent queue of background jobs (ingest, enrich, metrics, retrain), run by app/database/job_worker.py.
+-- Workers claim the oldest queued job with FOR UPDATE SKIP LOCKED, so concurrent workers never take the same job.
+-- params and result are JSON; heartbeat_at is refreshed while a job runs, so jobs of a crashed worker can be requeued.
+CREATE TABLE IF NOT EXISTS jobs (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR(32) NOT NULL,
+    params TEXT NOT NULL DEFAULT '{}',
+    status VARCHAR(16) NOT NULL DEFAULT 'queued',
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker VARCHAR(255),
+    created_by VARCHAR(255),
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    started_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- Keeps the claim query an index scan however many finished jobs pile up
+CREATE INDEX IF NOT EXISTS ix_jobs_queued ON jobs (id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS ix_jobs_running ON jobs (heartbeat_at) WHERE status = 'running';
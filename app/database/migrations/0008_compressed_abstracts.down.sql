@@ -0,0 +1,39 @@
+DROP MATERIALIZED VIEW IF EXISTS paper_features;
+
+-- SQL cannot decompress the bodies; run 'python -m app.database.compress_abstracts --inline' first
+-- to move them back into papers.abstract, or the compressed abstracts are lost.
+DROP TABLE IF EXISTS paper_abstracts;
+DROP TABLE IF EXISTS abstract_dictionaries;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS paper_features AS
+SELECT
+    p.id,
+    p.title,
+    p.abstract,
+    p.total_citations,
+    p.influential_citations,
+    p.publication_year,
+    p.delta_citations,
+    p.pdf_url,
+    j.journal_name,
+    j.journal_h_index,
+    j.mean_citations_per_paper,
+    j.total_papers_published,
+    COUNT(pa.author_id) AS num_authors,
+    AVG(a.h_index) AS avg_author_h_index,
+    AVG(a.total_papers) AS avg_author_total_papers,
+    AVG(a.total_citations) AS avg_author_total_citations,
+    array_agg(a.name) FILTER (WHERE a.name IS NOT NULL) AS authors
+FROM papers p
+LEFT JOIN journals j ON p.journal_id = j.id
+LEFT JOIN paper_authors pa ON p.id = pa.paper_id
+LEFT JOIN authors a ON pa.author_id = a.id
+GROUP BY
+    p.id,
+    j.journal_name,
+    j.journal_h_index,
+    j.mean_citations_per_paper,
+    j.total_papers_published;
+
+-- REFRESH ... CONCURRENTLY requires a unique index
+CREATE UNIQUE INDEX IF NOT EXISTS ux_paper_features_id ON paper_features (id);
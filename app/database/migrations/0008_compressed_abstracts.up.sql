@@ -0,0 +1,58 @@
+-- Compressed abstract storage (ABSTRACT_STORAGE=compressed, see app/database/compress_abstracts.py).
+-- Abstracts are moved out of papers into paper_abstracts as raw deflate streams compressed with a preset
+-- dictionary trained on sample abstracts; the moved papers.abstract values are set to NULL.
+CREATE TABLE IF NOT EXISTS abstract_dictionaries (
+    id SERIAL PRIMARY KEY,
+    dictionary BYTEA NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS paper_abstracts (
+    paper_id INTEGER PRIMARY KEY REFERENCES papers(id) ON DELETE CASCADE,
+    dictionary_id INTEGER NOT NULL REFERENCES abstract_dictionaries(id),
+    body BYTEA NOT NULL
+);
+
+-- The bodies are compressed already; keep TOAST from trying again
+ALTER TABLE paper_abstracts ALTER COLUMN body SET STORAGE EXTERNAL;
+
+-- paper_features carries the compressed body next to the inline abstract, so the ranking corpus
+-- is transferred compressed and decompressed by RankModel as the vectorizer reads it
+DROP MATERIALIZED VIEW IF EXISTS paper_features;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS paper_features AS
+SELECT
+    p.id,
+    p.title,
+    p.abstract,
+    pab.dictionary_id AS abstract_dictionary_id,
+    pab.body AS abstract_body,
+    p.total_citations,
+    p.influential_citations,
+    p.publication_year,
+    p.delta_citations,
+    p.pdf_url,
+    j.journal_name,
+    j.journal_h_index,
+    j.mean_citations_per_paper,
+    j.total_papers_published,
+    COUNT(pa.author_id) AS num_authors,
+    AVG(a.h_index) AS avg_author_h_index,
+    AVG(a.total_papers) AS avg_author_total_papers,
+    AVG(a.total_citations) AS avg_author_total_citations,
+    array_agg(a.name) FILTER (WHERE a.name IS NOT NULL) AS authors
+FROM papers p
+LEFT JOIN journals j ON p.journal_id = j.id
+LEFT JOIN paper_abstracts pab ON p.id = pab.paper_id
+LEFT JOIN paper_authors pa ON p.id = pa.paper_id
+LEFT JOIN authors a ON pa.author_id = a.id
+GROUP BY
+    p.id,
+    pab.paper_id,
+    j.journal_name,
+    j.journal_h_index,
+    j.mean_citations_per_paper,
+    j.total_papers_published;
+
+-- REFRESH ... CONCURRENTLY requires a unique index
+CREATE UNIQUE INDEX IF NOT EXISTS ux_paper_features_id ON paper_features (id);
@@ -0,0 +1,7 @@
+-- Time of the last refresh of each materialized view. Ranking snapshots record the paper_features
+-- refresh they were exported from, so a refresh that changes features but not papers (metrics,
+-- enrichment, abstract compaction) makes them stale.
+CREATE TABLE IF NOT EXISTS view_refreshes (
+    view_name VARCHAR(64) PRIMARY KEY,
+    refreshed_at TIMESTAMP NOT NULL DEFAULT now()
+);
@@ -1,11 +1,49 @@
+import os
+import re
 import requests
-from .DatabaseManager import DatabaseManager
+from concurrent.futures import ThreadPoolExecutor
+from .DatabaseManager import DatabaseManager, INGEST_BATCH_SIZE
+from .harvest import HarvestWrapper
+from .dedup import normalize_doi
 from .APIs.open_alex.open_alex_wrapper import OpenAlexAPIHandler
+from .APIs.http_client import get_client
 
-class OpenAlexDbWrapper:
-    def __init__(self):
-        self.api_handler = OpenAlexAPIHandler()
+# Placeholder papers per keyset page, and concurrent OpenAlex requests per page
+ENRICH_PAGE_SIZE = int(os.getenv('ENRICH_PAGE_SIZE', '200'))
+ENRICH_WORKERS = int(os.getenv('ENRICH_WORKERS', '4'))
+
+# Ids per OpenAlex OR-filter request (filter=doi:a|b|c); OpenAlex accepts up to 50
+OPENALEX_FILTER_IDS = 50
+
+# Real OpenAlex work ids; other wrappers store generated ids such as 'CROSSREF_PAPER_<hash>'
+OPENALEX_WORK_ID_PATTERN = re.compile(r'^W\d+$')
+
+# Top-level work fields store_result and update_paper_entry read; requested with select=
+# so locations, related_works, counts_by_year etc. are not downloaded
+WORK_FIELDS = [
+    'id', 'doi', 'title', 'publication_year', 'abstract_inverted_index', 'primary_location',
+    'cited_by_count', 'referenced_works', 'authorships', 'concepts',
+]
+
+# Name of the placeholder enrichment job in the enrichment_watermarks table
+ENRICHMENT_JOB = 'openalex_placeholders'
+
+# Name of OpenAlex harvests in the harvest_checkpoints table
+HARVEST_SOURCE = 'openalex'
+
+
+class OpenAlexDbWrapper(HarvestWrapper):
+    HARVEST_SOURCE = HARVEST_SOURCE
+    SOURCE_NAME = 'OpenAlex'
+
+    def __init__(self, batch_size=INGEST_BATCH_SIZE, dedup=None):
+        super().__init__(batch_size, dedup)
+        self.api_handler = OpenAlexAPIHandler(select=WORK_FIELDS)
+        self.http = get_client('openalex')
         self.db_manager = DatabaseManager()
+        # (citing paper id, cited OpenAlex id) edges of the current batch, COPYed before it commits
+        self.citation_edges = []
+        self.result_edges_start = 0
 
     def run_query(self, query, max_results=None):
         """
@@ -14,119 +52,165 @@ class OpenAlexDbWrapper:
         self.query_and_store(query, max_results)
         self.update_existing_entries()
 
-    def query_and_store(self, query, max_results=None):
+    def flush_batch(self):
+        self.flush_citation_edges()
+
+    def discard_result(self):
+        del self.citation_edges[self.result_edges_start:]
+
+    def finish_run(self):
+        # Papers stored by this run may be the targets of edges that were pending
+        self.db_manager.resolve_pending_citations()
+        self.db_manager.commit_batch()
+
+    def dedup_record(self, result):
+        """(DOI, source id, {field: value}) of a work, as the dedup filter keys it."""
+        return result.get('doi'), result.get('id', '').replace('https://openalex.org/', ''), {
+            'title': result.get('title'),
+            'abstract': result.get('abstract') or result.get('abstract_inverted_index'),
+            'publication_year': result.get('publication_year'),
+            'pdf_url': (result.get('primary_location') or {}).get('pdf_url'),
+            'total_citations': result.get('cited_by_count'),
+            'influential_citations': result.get('referenced_works'),
+            'authors': result.get('authorships'),
+            'concepts': result.get('concepts'),
+            'references': result.get('referenced_works'),
+        }
+
+    def normalize_result(self, result):
         """
-        Fetch data from OpenAlex based on the query and store it in the database.
+        Pipeline normalize stage: rebuild the abstract from its inverted index off the writer thread.
+        The reconstructed abstract replaces the index, which store_result no longer needs.
         """
-        count = 0
-        inserted_papers = 0
-        print(f"Querying OpenAlex for: '{query}'...")
-        try:
-            for result in self.api_handler.query(query, max_results=max_results):
-                count += 1
-
-                try:
-                    # Extract necessary fields from the OpenAlex work
-                    paper_openalex_id = result.get('id', '').replace('https://openalex.org/', '')
-                    title = result.get('title', 'No Title')
-
-                    abstract_inverted_index = result.get('abstract_inverted_index', None)
-                    abstract = self.reconstruct_abstract(abstract_inverted_index)
-
-                    publication_year = result.get('publication_year', None)
-                    doi = result.get('doi', None)
-                    if not doi and not paper_openalex_id:
-                        print(f"Paper '{title}' has no DOI or OpenAlex ID. Skipping.")
-                        continue
-                    pdf_url = result.get('primary_location', {}).get('pdf_url', None)
-
-                    # Insert paper information into the database
-                    paper_id = self.db_manager.insert_paper(
-                        openalex_id=paper_openalex_id,
-                        title=title,
-                        abstract=abstract,
-                        publication_year=publication_year,
-                        total_citations=result.get('cited_by_count', 0),
-                        influential_citations=len(result.get('referenced_works', [])),
-                        pdf_url=pdf_url,
-                        doi=doi
-                    )
-
-                    if paper_id:
-                        inserted_papers += 1
-                        print(f"\nInserting paper {inserted_papers}: '{title}' with ID: {paper_id}.")
-                    else:
-                        print(f"\nFailed to insert/update paper: '{title}'. Skipping further processing for this paper.")
-                        continue
-
-                    # Insert author information
-                    for author in result.get('authorships', []):
-                        author_info = author.get('author', {})
-                        author_name = author_info.get('display_name', '').strip()
-                        if not author_name:
-                            print("Author name is missing. Skipping this author.")
-                            continue
-
-                        author_openalex_id = author_info.get('id', '')
-                        if not author_openalex_id:
-                            print("Author OpenAlex ID is missing. Skipping this author.")
-                            continue
-
-                        # Insert or update the author
-                        author_id = self.db_manager.insert_author(
-                            openalex_id=author_openalex_id,
-                            name=author_name
-                        )
-
-                        if not author_id:
-                            print(f"Failed to insert/update author: '{author_name}'. Skipping this author.")
-                            continue
-
-                        # Insert paper-author relationship
-                        self.db_manager.insert_paper_author(paper_id, author_id)
-
-                    # Insert concept (subject) information
-                    for concept in result.get('concepts', []):
-                        concept_name = concept.get('display_name', None)
-                        if not concept_name:
-                            print("Concept name is missing. Skipping this concept.")
-                            continue
-
-                        concept_openalex_id = concept.get('id', '')
-                        if not concept_openalex_id:
-                            print("Concept OpenAlex ID is missing. Skipping this concept.")
-                            continue
-
-                        # Insert or update the concept
-                        concept_id = self.db_manager.insert_concept(
-                            openalex_id=concept_openalex_id,
-                            name=concept_name
-                        )
-
-                        if not concept_id:
-                            print(f"Failed to insert/update concept: '{concept_name}'. Skipping this concept.")
-                            continue
-
-                        # Insert paper-concept relationship
-                        self.db_manager.insert_paper_concept(
-                            paper_id=paper_id,
-                            concept_id=concept_id,
-                            score=concept.get('score', None)
-                        )
-
-                except Exception as e:
-                    print(f"An error occurred while processing paper '{title}': {e}. Skipping this paper.")
-                    continue
-
-                if max_results is not None and count >= max_results:
-                    break
-        except Exception as e:
-            print(f"An error occurred during querying: {e}")
-        finally:
-            print(f"Processed {count} results from OpenAlex. Inserted {inserted_papers} new papers into the database.")
-            self.db_manager.close()
+        result['abstract'] = self.reconstruct_abstract(result.pop('abstract_inverted_index', None))
+        return result
 
-    def reconstruct_abstract(self, abstract_inverted_index):
+    def store_result(self, result):
+        """
+        Insert one OpenAlex work together with its authors and concepts.
+        Returns the paper's id, or None if the paper could not be inserted.
+        """
+        # Edges queued from here on belong to this result (see discard_result)
+        self.result_edges_start = len(self.citation_edges)
+        fields = self.paper_fields(result)
+        title = fields['title']
+        if not fields['doi'] and not fields['openalex_id']:
+            print(f"Paper '{title}' has no DOI or OpenAlex ID. Skipping.")
+            return None
+
+        # Insert paper information into the database
+        paper_id = self.db_manager.insert_paper(**fields)
+
+        if paper_id:
+            print(f"\nInserting paper: '{title}' with ID: {paper_id}.")
+        else:
+            print(f"\nFailed to insert/update paper: '{title}'. Skipping further processing for this paper.")
+            return None
+
+        # Insert author information
+        for author_openalex_id, author_name in self.work_authors(result):
+            # Insert or update the author
+            author_id = self.db_manager.insert_author(
+                openalex_id=author_openalex_id,
+                name=author_name
+            )
+
+            if not author_id:
+                print(f"Failed to insert/update author: '{author_name}'. Skipping this author.")
+                continue
+
+            # Insert paper-author relationship
+            self.db_manager.insert_paper_author(paper_id, author_id)
+
+        # Insert concept (subject) information
+        concept_links = []
+        for concept_openalex_id, concept_name, score in self.work_concepts(result):
+            # Insert or update the concept
+            concept_id = self.db_manager.insert_concept(
+                openalex_id=concept_openalex_id,
+                name=concept_name
+            )
+
+            if not concept_id:
+                print(f"Failed to insert/update concept: '{concept_name}'. Skipping this concept.")
+                continue
+
+            # Queue paper-concept relationship
+            concept_links.append((paper_id, concept_id, score))
+
+        # Insert all paper-concept relationships in one statement
+        self.db_manager.upsert_paper_concepts(concept_links)
+
+        # Queue the referenced works; the whole batch is COPYed at once
+        self.citation_edges.extend(self.referenced_work_edges(paper_id, result))
+
+        return paper_id
+
+    @staticmethod
+    def paper_fields(work):
+        """
+        Map an OpenAlex work to the papers columns it fills. Shared by store_result and the
+        snapshot bulk loader, so both store a work the same way.
+        """
+        # Normalized results carry the abstract already (see normalize_result)
+        if 'abstract' in work:
+            abstract = work['abstract']
+        else:
+            abstract = OpenAlexDbWrapper.reconstruct_abstract(work.get('abstract_inverted_index', None))
+        return {
+            'openalex_id': (work.get('id') or '').replace('https://openalex.org/', ''),
+            'title': work.get('title', 'No Title'),
+            'abstract': abstract,
+            'publication_year': work.get('publication_year', None),
+            'total_citations': work.get('cited_by_count', 0),
+            'influential_citations': len(work.get('referenced_works') or []),
+            'pdf_url': (work.get('primary_location') or {}).get('pdf_url', None),
+            'doi': work.get('doi', None),
+        }
+
+    @staticmethod
+    def work_authors(work):
+        """(author OpenAlex id, name) of each authorship that has both."""
+        authors = []
+        for authorship in work.get('authorships') or []:
+            author_info = authorship.get('author') or {}
+            author_name = (author_info.get('display_name') or '').strip()
+            author_openalex_id = author_info.get('id', '')
+            if author_name and author_openalex_id:
+                authors.append((author_openalex_id, author_name))
+        return authors
+
+    @staticmethod
+    def work_concepts(work):
+        """(concept OpenAlex id, name, score) of each concept that has both an id and a name."""
+        concepts = []
+        for concept in work.get('concepts') or []:
+            concept_name = concept.get('display_name', None)
+            concept_openalex_id = concept.get('id', '')
+            if concept_name and concept_openalex_id:
+                concepts.append((concept_openalex_id, concept_name, concept.get('score', None)))
+        return concepts
+
+    @staticmethod
+    def referenced_work_ids(work):
+        """OpenAlex ids of the works an OpenAlex work references."""
+        return [
+            referenced_work.replace('https://openalex.org/', '')
+            for referenced_work in work.get('referenced_works') or [] if referenced_work
+        ]
+
+    def referenced_work_edges(self, paper_id, work):
+        """Return the (paper_id, cited OpenAlex id) citation edges of an OpenAlex work."""
+        return [(paper_id, cited_openalex_id) for cited_openalex_id in self.referenced_work_ids(work)]
+
+    def flush_citation_edges(self):
+        """COPY the queued citation edges into pending_citations."""
+        if self.citation_edges:
+            self.db_manager.copy_pending_citations(self.citation_edges)
+            self.citation_edges = []
+
+    @staticmethod
+    def reconstruct_abstract(abstract_inverted_index):
         """
         Reconstruct the abstract from the inverted index provided by OpenAlex.
         """
@@ -148,17 +232,118 @@ class OpenAlexDbWrapper:
             print(f"Error reconstructing abstract: {e}")
             return None
 
-    def update_existing_entries(self):
+    def update_existing_entries(self, page_size=ENRICH_PAGE_SIZE, max_workers=ENRICH_WORKERS, max_pages=None):
         """
         Update existing database entries with data from OpenAlex.
+        Pages through the placeholder papers by id, fetching each page from OpenAlex in batched
+        filter requests (see fetch_openalex_page) with up to 'max_workers' running concurrently. A page's updates commit together with the job's
+        watermark, so an interrupted run resumes after the last committed page; once a sweep
+        reaches the end the watermark is reset and the next run starts over.
+        Returns the number of papers updated.
         """
-        entries_to_update = self.db_manager.get_entries_with_placeholders()
-        print(f"Found {len(entries_to_update)} papers with placeholders to update.")
-        for entry in entries_to_update:
+        # query_and_store closes self.db_manager, so enrichment uses its own connection
+        db_manager = DatabaseManager()
+        db_manager.set_autocommit(False)
+        after_id = db_manager.get_enrichment_watermark(ENRICHMENT_JOB)
+        if after_id:
+            print(f"Resuming placeholder enrichment after paper ID {after_id}.")
+
+        updated_papers = 0
+        pages = 0
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                while max_pages is None or pages < max_pages:
+                    entries = db_manager.get_entries_with_placeholders(after_id=after_id, limit=page_size)
+                    if not entries:
+                        print("Placeholder enrichment sweep completed.")
+                        db_manager.resolve_pending_citations()
+                        db_manager.set_enrichment_watermark(ENRICHMENT_JOB, 0)
+                        db_manager.commit_batch()
+                        break
+
+                    openalex_results = self.fetch_openalex_page(entries, executor)
+                    page_updates = 0
+                    page_edges = []
+                    for paper_id, *_ in entries:
+                        openalex_data = openalex_results.get(paper_id)
+                        if openalex_data:
+                            db_manager.update_paper_entry(paper_id, openalex_data)
+                            page_edges.extend(self.referenced_work_edges(paper_id, openalex_data))
+                            page_updates += 1
+                    db_manager.copy_pending_citations(page_edges)
+
+                    after_id = entries[-1][0]
+                    db_manager.set_enrichment_watermark(ENRICHMENT_JOB, after_id)
+                    if db_manager.commit_batch():
+                        updated_papers += page_updates
+                    pages += 1
+                    print(f"Updated {page_updates} of {len(entries)} papers with placeholders up to paper ID {after_id}.")
+        finally:
+            db_manager.close()
+        return updated_papers
+
+    def fetch_openalex_page(self, entries, executor):
+        """
+        Fetch OpenAlex data for a page of placeholder entries (id, openalex_id, doi, title, publication_year).
+        Entries with a DOI or an OpenAlex work id are looked up OPENALEX_FILTER_IDS at a time with
+        OR-filters and matched back by DOI or id. DOIs the filter syntax cannot express (containing
+        '|' or ','), and entries with only a title and year, fall back to single lookups.
+        Returns {paper id: OpenAlex work} for the entries that were found.
+        """
+        by_doi = {}
+        by_openalex_id = {}
+        single_entries = []
+        for entry in entries:
             paper_id, openalex_id, doi, title, publication_year = entry
-            openalex_data = self.fetch_openalex_data(openalex_id, doi, title, publication_year)
-            if openalex_data:
-                self.db_manager.update_paper_entry(paper_id, openalex_data)
+            doi = normalize_doi(doi)
+            if doi and '|' not in doi and ',' not in doi:
+                by_doi.setdefault(doi, []).append(paper_id)
+            elif doi:
+                single_entries.append(entry)
+            elif openalex_id and OPENALEX_WORK_ID_PATTERN.match(openalex_id):
+                by_openalex_id.setdefault(openalex_id, []).append(paper_id)
+            elif title and publication_year:
+                single_entries.append((paper_id, None, None, title, publication_year))
+
+        futures = []
+        for field, keyed in (('doi', by_doi), ('openalex', by_openalex_id)):
+            keys = list(keyed)
+            for start in range(0, len(keys), OPENALEX_FILTER_IDS):
+                futures.append((field, keyed, executor.submit(
+                    self.fetch_openalex_batch, field, keys[start:start + OPENALEX_FILTER_IDS]
+                )))
+        single_futures = [
+            (entry[0], executor.submit(self.fetch_openalex_data, *entry[1:])) for entry in single_entries
+        ]
+
+        results = {}
+        for field, keyed, future in futures:
+            for work in future.result():
+                if field == 'doi':
+                    key = normalize_doi(work.get('doi'))
+                else:
+                    key = (work.get('id') or '').replace('https://openalex.org/', '')
+                for paper_id in keyed.get(key, []):
+                    results.setdefault(paper_id, work)
+        for paper_id, future in single_futures:
+            work = future.result()
+            if work:
+                results[paper_id] = work
+        return results
+
+    def fetch_openalex_batch(self, field, values):
+        """
+        Fetch the works whose 'field' ('doi' or 'openalex') is one of 'values' in a single
+        OR-filter request. Returns the list of works (empty on error).
+        """
+        params = {'filter': f"{field}:{'|'.join(values)}", 'per-page': 200, 'select': ','.join(WORK_FIELDS)}
+        try:
+            response = self.http.get('https://api.openalex.org/works', params=params)
+            response.raise_for_status()
+            return response.json().get('results', [])
+        except (requests.RequestException, ValueError) as e:
+            print(f"Error fetching a batch of {len(values)} works from OpenAlex: {e}")
+            return []
 
     def fetch_openalex_data(self, openalex_id, doi, title, publication_year):
         """
@@ -166,14 +351,14 @@ class OpenAlexDbWrapper:
         """
         try:
             if doi:
-                response = requests.get(f"https://api.openalex.org/works/doi:{doi}")
+                response = self.http.get(f"https://api.openalex.org/works/doi:{doi}")
             elif openalex_id:
-                response = requests.get(f"https://api.openalex.org/works/{openalex_id}")
+                response = self.http.get(f"https://api.openalex.org/works/{openalex_id}")
             elif title and publication_year:
                 # Replace spaces with '+' for URL encoding
                 encoded_title = title.replace(' ', '+')
                 query = f"title.search:{encoded_title} AND publication_year:{publication_year}"
-                response = requests.get(f"https://api.openalex.org/works?filter={query}")
+                response = self.http.get(f"https://api.openalex.org/works?filter={query}")
             else:
                 return None
 
@@ -0,0 +1,284 @@
+# app/database/pipeline.py
+
+import os
+import time
+import queue
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Items each queue between two stages may hold before the upstream stage blocks
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '500'))
+
+# Threads running the normalize stage
+NORMALIZE_WORKERS = int(os.getenv('NORMALIZE_WORKERS', '2'))
+
+# Seconds a blocked stage waits before re-checking whether the pipeline was stopped
+POLL_INTERVAL = 0.1
+
+# Seconds between checkpoint callbacks; the final position is always reported
+CHECKPOINT_INTERVAL = float(os.getenv('PIPELINE_CHECKPOINT_INTERVAL', '5'))
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class StageStats:
+    """Throughput counters for one pipeline stage, updated by all of its workers."""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self.lock = threading.Lock()
+
+    def record(self, items, seconds, errors=0):
+        with self.lock:
+            self.items += items
+            self.errors += errors
+            self.busy_seconds += seconds
+
+    def as_dict(self):
+        """items, errors, busy seconds, wall seconds and items per wall-clock second of the stage."""
+        end = self.finished_at or time.perf_counter()
+        wall_seconds = end - self.started_at if self.started_at else 0.0
+        return {
+            'workers': self.workers,
+            'items': self.items,
+            'errors': self.errors,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'wall_seconds': round(wall_seconds, 3),
+            'per_second': round(self.items / wall_seconds, 1) if wall_seconds else 0.0,
+        }
+
+
+class IngestionPipeline:
+    """
+    Run ingestion as three stages connected by bounded queues, so fetching the next API page,
+    transforming records and writing to Postgres overlap instead of taking turns:
+
+        fetch (1 thread) -> normalize (normalize_workers threads) -> write (write_workers threads)
+
+    'fetch' is called on the fetch thread and returns the API handler's result iterator, so
+    errors raised while starting the query are reported like errors while iterating it.
+    'normalize' maps one result to a record, or None to drop it; without it results go straight
+    to the write stage. 'write_batch' receives up to 'batch_size' records at a time and returns
+    the number of papers it stored; a stage's queue filling up blocks the stage before it.
+    Every write worker calls 'write_batch' from its own thread, so it needs its own connection;
+    the DbWrappers use a single writer on their one connection.
+
+    With a 'checkpoint' callback, 'fetch' yields (position, result) pairs instead, and the
+    pipeline calls checkpoint(position, processed) on a writer thread, at most every
+    'checkpoint_interval' seconds and once at the end. 'position' belongs to the last result
+    of the contiguous prefix of results that has been written (or dropped), and 'processed'
+    is the length of that prefix, so results that are still queued or being written by
+    another worker are never skipped by a resume.
+    """
+
+    def __init__(self, fetch, write_batch, normalize=None, batch_size=1,
+                 normalize_workers=NORMALIZE_WORKERS, write_workers=1, queue_size=PIPELINE_QUEUE_SIZE,
+                 checkpoint=None, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.fetch = fetch
+        self.normalize = normalize
+        self.write_batch = write_batch
+        self.batch_size = max(1, batch_size)
+        self.normalize_workers = normalize_workers if normalize else 0
+        self.write_workers = write_workers
+        self.fetched = queue.Queue(maxsize=queue_size)
+        self.normalized = queue.Queue(maxsize=queue_size) if normalize else self.fetched
+        self.stages = {
+            'fetch': StageStats('fetch', 1),
+            'write': StageStats('write', write_workers),
+        }
+        if normalize:
+            self.stages['normalize'] = StageStats('normalize', self.normalize_workers)
+        self.inserted = 0
+        self.errors = []
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self._normalizers_left = self.normalize_workers
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        # Sequence numbers of finished results past the contiguous prefix, with their positions
+        self._finished = {}
+        self._contiguous = 0
+        self._contiguous_position = None
+        self._reported = 0
+        self._reported_at = time.perf_counter()
+
+    def run(self):
+        """
+        Run the pipeline to completion and return the number of papers written.
+        An exception in any stage stops the others and is re-raised here.
+        """
+        threads = [threading.Thread(target=self._fetch_worker, name='pipeline-fetch', daemon=True)]
+        threads += [
+            threading.Thread(target=self._normalize_worker, name=f'pipeline-normalize-{i}', daemon=True)
+            for i in range(self.normalize_workers)
+        ]
+        threads += [
+            threading.Thread(target=self._write_worker, name=f'pipeline-write-{i}', daemon=True)
+            for i in range(self.write_workers)
+        ]
+        for stats in self.stages.values():
+            stats.started_at = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
+        return self.inserted
+
+    def stats(self):
+        """{stage name: StageStats.as_dict()} in pipeline order."""
+        order = ['fetch', 'normalize', 'write']
+        return {name: self.stages[name].as_dict() for name in order if name in self.stages}
+
+    @property
+    def processed(self):
+        """Results fetched from the API so far."""
+        return self.stages['fetch'].items
+
+    def _fail(self, error, stop=True):
+        with self.lock:
+            self.errors.append(error)
+        if stop:
+            self.stopped.set()
+
+    def _put(self, target, item):
+        """Put 'item' on 'target', waiting while it is full. False if the pipeline was stopped."""
+        while not self.stopped.is_set():
+            try:
+                target.put(item, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source):
+        """Take the next item from 'source'. Returns _DONE if the pipeline was stopped."""
+        while not self.stopped.is_set():
+            try:
+                return source.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _finish(self, name):
+        self.stages[name].finished_at = time.perf_counter()
+
+    def _fetch_worker(self):
+        stats = self.stages['fetch']
+        downstream = self.normalize_workers if self.normalize else self.write_workers
+        try:
+            iterator = iter(self.fetch())
+            sequence = 0
+            while not self.stopped.is_set():
+                start = time.perf_counter()
+                result = next(iterator, _DONE)
+                if result is _DONE:
+                    stats.record(0, time.perf_counter() - start)
+                    break
+                stats.record(1, time.perf_counter() - start)
+                position, result = result if self.checkpoint else (None, result)
+                # Results travel as (sequence number, position, result) so progress can be tracked in order
+                if not self._put(self.fetched, (sequence, position, result)):
+                    break
+                sequence += 1
+        except Exception as e:
+            # Results fetched before the error are still normalized and written
+            self._fail(e, stop=False)
+        finally:
+            self._finish('fetch')
+            for _ in range(downstream):
+                self._put(self.fetched, _DONE)
+
+    def _normalize_worker(self):
+        stats = self.stages['normalize']
+        try:
+            while True:
+                item = self._get(self.fetched)
+                if item is _DONE:
+                    break
+                sequence, position, result = item
+                start = time.perf_counter()
+                try:
+                    record = self.normalize(result)
+                    stats.record(1, time.perf_counter() - start)
+                except Exception as e:
+                    print(f"An error occurred while normalizing a result: {e}. Skipping it.")
+                    stats.record(0, time.perf_counter() - start, errors=1)
+                    record = None
+                # Dropped results still pass on to the writers, which count them as processed
+                if not self._put(self.normalized, (sequence, position, record)):
+                    break
+        except Exception as e:
+            self._fail(e)
+        finally:
+            # The last normalizer to finish tells the writers that no more records are coming
+            with self.lock:
+                self._normalizers_left -= 1
+                last = self._normalizers_left == 0
+            if last:
+                self._finish('normalize')
+                for _ in range(self.write_workers):
+                    self._put(self.normalized, _DONE)
+
+    def _write_worker(self):
+        stats = self.stages['write']
+        batch = []
+        try:
+            while True:
+                item = self._get(self.normalized)
+                if item is not _DONE:
+                    batch.append(item)
+                if batch and (item is _DONE or len(batch) >= self.batch_size):
+                    records = [record for _, _, record in batch if record is not None]
+                    start = time.perf_counter()
+                    inserted = self.write_batch(records) if records else 0
+                    stats.record(len(records), time.perf_counter() - start)
+                    with self.lock:
+                        self.inserted += inserted or 0
+                    self._advance(batch)
+                    batch = []
+                if item is _DONE:
+                    break
+            self._report_checkpoint(final=True)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._finish('write')
+
+    def _advance(self, batch):
+        """Mark a written batch as finished and report the checkpoint if it is due."""
+        if not self.checkpoint:
+            return
+        with self.lock:
+            for sequence, position, _ in batch:
+                self._finished[sequence] = position
+            while self._contiguous in self._finished:
+                self._contiguous_position = self._finished.pop(self._contiguous)
+                self._contiguous += 1
+        self._report_checkpoint()
+
+    def _report_checkpoint(self, final=False):
+        if not self.checkpoint:
+            return
+        with self.lock:
+            due = final or time.perf_counter() - self._reported_at >= self.checkpoint_interval
+            if not due or self._contiguous == self._reported:
+                return
+            position, processed = self._contiguous_position, self._contiguous
+            self._reported, self._reported_at = processed, time.perf_counter()
+        self.checkpoint(position, processed)
+
+
+def format_stats(stats):
+    """One line summarizing IngestionPipeline.stats(), e.g. 'fetch 120.0/s, normalize 118.5/s, write 117.9/s'."""
+    return ', '.join(f"{name} {stage['per_second']}/s ({stage['items']} items)" for name, stage in stats.items())
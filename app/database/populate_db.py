@@ -1,31 +1,121 @@
-from .arXiv_db_wrapper import ArxivDbWrapper
-from .crossref_db_wrapper import CrossRefDbWrapper
-from .open_alex_db_wrapper import OpenAlexDbWrapper
-from .semantic_scholar_db_wrapper import SemanticScholarDbWrapper
+import time
+import math
+from concurrent.futures import ThreadPoolExecutor
+from .DatabaseManager import DatabaseManager
+from .dedup import get_dedup_filter
+from .quota import QuotaAllocator, QUOTA_ALLOCATION
+from .abstracts import ABSTRACT_STORAGE
+from .compress_abstracts import compress_abstracts
+from .arXiv_db_wrapper import ArxivDbWrapper, HARVEST_SOURCE as ARXIV_SOURCE
+from .crossref_db_wrapper import CrossRefDbWrapper, HARVEST_SOURCE as CROSSREF_SOURCE
+from .open_alex_db_wrapper import OpenAlexDbWrapper, HARVEST_SOURCE as OPENALEX_SOURCE
+from .semantic_scholar_db_wrapper import SemanticScholarDbWrapper, HARVEST_SOURCE as SEMANTIC_SCHOLAR_SOURCE
+
+# Name of each source in QuotaAllocator reports (its harvest source)
+QUOTA_SOURCES = {
+    'arXiv': ARXIV_SOURCE,
+    'CrossRef': CROSSREF_SOURCE,
+    'OpenAlex': OPENALEX_SOURCE,
+    'Semantic Scholar': SEMANTIC_SCHOLAR_SOURCE,
+}
 
 class DatabaseSearchService:
-    def __init__(self, query: str, num_articles: int = 1000):
+    def __init__(self, query: str, num_articles: int = 1000, refresh: bool = False, allocation: str = QUOTA_ALLOCATION,
+                 abstract_storage: str = ABSTRACT_STORAGE):
         self.query = query
+        # Papers requested across all sources
         self.num_articles = num_articles
+        # 'adaptive' shifts the request toward the sources yielding new papers fastest; 'even' splits it equally
+        self.allocation = allocation
+        # Re-harvest the query from the start even where an earlier run completed it
+        self.refresh = refresh
+        # 'compressed' moves the new abstracts into paper_abstracts once the sources are done
+        self.abstract_storage = abstract_storage
+
+        # Every wrapper holds its own connection, borrowed from the shared pool
+        DatabaseManager.open_pool()
+
+        # One filter of stored papers for all four sources, so a DOI one source just stored
+        # is not written again by the others
+        self.dedup = get_dedup_filter()
 
         # Initialize the database wrappers
-        self.arxiv_db = ArxivDbWrapper()
-        self.crossref_db = CrossRefDbWrapper()
-        self.openalex_db = OpenAlexDbWrapper()
-        self.semantic_scholar_db = SemanticScholarDbWrapper()
+        self.arxiv_db = ArxivDbWrapper(dedup=self.dedup)
+        self.crossref_db = CrossRefDbWrapper(dedup=self.dedup)
+        self.openalex_db = OpenAlexDbWrapper(dedup=self.dedup)
+        self.semantic_scholar_db = SemanticScholarDbWrapper(dedup=self.dedup)
 
     def search_and_store(self):
-        """Search and store results from all databases using the provided query and number of articles."""
+        """
+        Search and store results from all databases using the provided query and number of articles.
+        The four sources run concurrently. With adaptive allocation they share one QuotaAllocator
+        for the requested number of new papers; otherwise each fetches an equal share.
+        Returns {source: {'processed', 'inserted', 'error', 'seconds'}}, plus 'new' and
+        'new_per_second' with adaptive allocation.
+        """
+        sources = {
+            'arXiv': self.arxiv_db,
+            'CrossRef': self.crossref_db,
+            'OpenAlex': self.openalex_db,
+            'Semantic Scholar': self.semantic_scholar_db,
+        }
+        summary = {}
         try:
             print(f"Searching for '{self.query}' and retrieving {self.num_articles} results...")
+            if self.allocation == 'adaptive':
+                quota = QuotaAllocator(self.num_articles, [QUOTA_SOURCES[name] for name in sources])
+                max_results = self.num_articles
+            else:
+                quota = None
+                max_results = math.ceil(self.num_articles / len(sources))
 
             # Query and store results in each database
-            self.arxiv_db.query_and_store(self.query, self.num_articles)
-            self.crossref_db.query_and_store(self.query, self.num_articles)
-            self.openalex_db.query_and_store(self.query, self.num_articles)
-            self.semantic_scholar_db.query_and_store(self.query, self.num_articles)
+            with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix='ingest') as executor:
+                futures = {
+                    name: executor.submit(self.run_source, wrapper, max_results, quota, QUOTA_SOURCES[name])
+                    for name, wrapper in sources.items()
+                }
+            summary = {name: future.result() for name, future in futures.items()}
+            if quota:
+                for name in sources:
+                    stats = quota.stats(QUOTA_SOURCES[name])
+                    summary[name].update(new=stats['new'], new_per_second=stats['new_per_second'])
 
             print("Search completed and results stored in all databases.")
+            for name, stats in summary.items():
+                status = f"failed: {stats['error']}" if stats['error'] else "skipped" if stats.get('skipped') else "ok"
+                print(f"  {name}: {stats['processed']} processed, {stats['inserted']} inserted, "
+                      f"{stats.get('deduplicated', 0)} already stored in {stats['seconds']:.2f}s ({status})")
+            if quota:
+                print(f"Stored {quota.new} of {self.num_articles} requested new papers.")
+
+            # Make the new papers visible to ranking
+            db_manager = DatabaseManager()
+            try:
+                if self.abstract_storage == 'compressed':
+                    compress_abstracts(db_manager)
+                db_manager.refresh_paper_features()
+            finally:
+                db_manager.close()
 
         except Exception as e:
-            print(f"An error occurred during search: {e}")
\ No newline at end of file
+            print(f"An error occurred during search: {e}")
+        return summary
+
+    def run_source(self, wrapper, max_results, quota=None, source=None):
+        """
+        Run one wrapper's query_and_store and time it. Exceptions are reported in the result.
+        'source' names the wrapper in 'quota', which stops granting it quota once it returns.
+        """
+        start_time = time.perf_counter()
+        stats = {'processed': 0, 'inserted': 0, 'error': None}
+        try:
+            stats.update(wrapper.query_and_store(self.query, max_results, refresh=self.refresh, quota=quota) or {})
+        except Exception as e:
+            stats['error'] = str(e)
+        finally:
+            # A skipped or failed harvest never reached the quota's end of results
+            if quota:
+                quota.finish(source)
+        stats['seconds'] = time.perf_counter() - start_time
+        return stats
@@ -0,0 +1,174 @@
+# app/database/quota.py
+
+import os
+import math
+import time
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 'adaptive' shares a populate request's quota among the sources by their yield of new papers;
+# 'even' gives every source an equal, fixed share
+QUOTA_ALLOCATION = os.getenv('QUOTA_ALLOCATION', 'adaptive')
+
+# Weight of the latest measurement in a source's moving average of new papers per second
+QUOTA_EWMA_ALPHA = float(os.getenv('QUOTA_EWMA_ALPHA', '0.3'))
+
+# Most results a source may fetch per grant; smaller grants follow changes in yield sooner
+QUOTA_MAX_GRANT = int(os.getenv('QUOTA_MAX_GRANT', '50'))
+
+# Seconds a source waits for results in flight to be written before it is granted one more anyway
+QUOTA_STALL_SECONDS = float(os.getenv('QUOTA_STALL_SECONDS', '10'))
+
+# Marks the end of a source's results
+_DONE = object()
+
+
+class SourceYield:
+    """Counters and the moving average of new papers per second of one source."""
+
+    def __init__(self):
+        self.granted = 0
+        self.taken = 0
+        self.processed = 0
+        self.new = 0
+        self.rate = None
+        self.active = True
+        self.started_at = time.perf_counter()
+        self.measured_at = self.started_at
+
+    @property
+    def expected_yield(self):
+        """Share of fetched results expected to be new papers (smoothed toward 1/2 while there are few)."""
+        return (self.new + 1) / (self.processed + 2)
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            'processed': self.processed,
+            'new': self.new,
+            'new_per_second': round(self.rate or 0.0, 2),
+            'seconds': round(elapsed, 2),
+        }
+
+
+class QuotaAllocator:
+    """
+    Share a request for 'total' new papers among concurrently harvested 'sources'. Each source
+    takes one grant of results at a time; a grant is its weight's share of the papers still
+    needed, divided by the share of its results that turn out to be new. Weights are the moving
+    averages of new papers per second, so the remaining quota shifts toward sources that are
+    fast and return papers the database does not have yet. Once the papers written and the
+    papers expected from results in flight cover 'total', sources wait, and they stop when
+    'total' is reached.
+    """
+
+    def __init__(self, total, sources, alpha=QUOTA_EWMA_ALPHA, max_grant=QUOTA_MAX_GRANT,
+                 stall_seconds=QUOTA_STALL_SECONDS):
+        self.total = total
+        self.alpha = alpha
+        self.max_grant = max_grant
+        self.stall_seconds = stall_seconds
+        self.sources = {source: SourceYield() for source in sources}
+        self.condition = threading.Condition()
+        # Sources stopped because the quota ran out rather than because their results did
+        self.cut_short = set()
+
+    @property
+    def new(self):
+        return sum(state.new for state in self.sources.values())
+
+    def _weights(self):
+        """
+        New papers per second of every active source; sources without a measurement yet get
+        the average, and while no source has yielded a new paper they all weigh the same.
+        """
+        active = {source: state for source, state in self.sources.items() if state.active}
+        measured = [state.rate for state in active.values() if state.rate is not None]
+        prior = sum(measured) / len(measured) if measured else 1.0
+        rates = {source: prior if state.rate is None else state.rate for source, state in active.items()}
+        if not any(rates.values()):
+            return {source: 1.0 for source in rates}
+        return rates
+
+    def _grant(self, source):
+        """
+        Results 'source' may fetch next, or 0 while results in flight cover the rest of the quota.
+        Sources that yield no new papers are still granted one result at a time, so a change in
+        their yield is noticed.
+        """
+        expected = sum(
+            (state.granted - state.processed) * state.expected_yield for state in self.sources.values()
+        )
+        needed = self.total - self.new - expected
+        if needed <= 0:
+            return 0
+        weights = self._weights()
+        share = needed * weights[source] / sum(weights.values())
+        return max(1, min(self.max_grant, math.ceil(share / self.sources[source].expected_yield)))
+
+    def take(self, source):
+        """
+        Called by 'source' before it fetches a result. Returns True if it may, waiting while
+        the results in flight could still cover the quota, and False once the quota is met.
+        """
+        state = self.sources[source]
+        with self.condition:
+            waited_since = None
+            while True:
+                if self.new >= self.total:
+                    self.cut_short.add(source)
+                    return False
+                if state.taken < state.granted:
+                    state.taken += 1
+                    return True
+                grant = self._grant(source)
+                if grant == 0 and waited_since is not None and time.perf_counter() - waited_since >= self.stall_seconds:
+                    # Results dropped before the writer never report back; keep the source moving
+                    grant = 1
+                if grant:
+                    state.granted += grant
+                    continue
+                waited_since = waited_since or time.perf_counter()
+                self.condition.wait(timeout=1.0)
+
+    def record(self, source, processed, new):
+        """Called by a source's writer after a batch: 'processed' results were written, 'new' of them new papers."""
+        state = self.sources[source]
+        with self.condition:
+            now = time.perf_counter()
+            state.processed += processed
+            state.new += new
+            rate = new / max(now - state.measured_at, 1e-3)
+            state.rate = rate if state.rate is None else self.alpha * rate + (1 - self.alpha) * state.rate
+            state.measured_at = now
+            self.condition.notify_all()
+
+    def finish(self, source):
+        """Called when 'source' stops fetching; its unused grant goes back to the others."""
+        state = self.sources[source]
+        with self.condition:
+            state.active = False
+            state.granted = state.taken
+            self.condition.notify_all()
+
+    def limit(self, source, results):
+        """Yield from 'results' for as long as 'source' is granted quota."""
+        try:
+            iterator = iter(results)
+            while self.take(source):
+                result = next(iterator, _DONE)
+                if result is _DONE:
+                    # Return the unused result of this take
+                    with self.condition:
+                        self.sources[source].taken -= 1
+                    break
+                yield result
+        finally:
+            self.finish(source)
+
+    def stats(self, source):
+        """{'processed', 'new', 'new_per_second', 'seconds'} of 'source'."""
+        with self.condition:
+            return self.sources[source].as_dict()
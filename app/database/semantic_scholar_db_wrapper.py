@@ -1,11 +1,23 @@
 import os
 import hashlib
 
-from .DatabaseManager import DatabaseManager
-from .APIs.semantic_scholar.semantic_scholar_wrapper import api_handler
+from .DatabaseManager import DatabaseManager, INGEST_BATCH_SIZE
+from .harvest import HarvestWrapper
+from .dedup import normalize_doi
+from .APIs.semantic_scholar.semantic_scholar_wrapper import api_handler, BATCH_SIZE
 
-class SemanticScholarDbWrapper:
-    def __init__(self):
+# Name of the Semantic Scholar placeholder enrichment job in the enrichment_watermarks table
+ENRICHMENT_JOB = 'semantic_scholar_placeholders'
+
+# Name of Semantic Scholar harvests in the harvest_checkpoints table
+HARVEST_SOURCE = 'semantic_scholar'
+
+class SemanticScholarDbWrapper(HarvestWrapper):
+    HARVEST_SOURCE = HARVEST_SOURCE
+    SOURCE_NAME = 'Semantic Scholar'
+
+    def __init__(self, batch_size=INGEST_BATCH_SIZE, dedup=None):
+        super().__init__(batch_size, dedup)
         self.api_handler = api_handler(api_key=os.getenv("SEMANTIC_SCHOLAR_API_KEY"))
         self.db_manager = DatabaseManager()
 
@@ -22,88 +34,143 @@ class SemanticScholarDbWrapper:
         hex_dig = hash_object.hexdigest()
         return f"{prefix}{hex_dig[:10]}"  # Truncate for brevity
 
-    def query_and_store(self, query, max_results=None):
-        count = 0
-        inserted_papers = 0
-        print(f"Querying Semantic Scholar for: {query}...")
+    def dedup_record(self, result):
+        """(DOI, source id, {field: value}) of a paper, as the dedup filter keys it."""
+        doi = result.get("externalIds", {}).get("DOI")
+        return doi, doi, {
+            'title': result.get("title"),
+            'abstract': result.get("abstract"),
+            'publication_year': result.get("year"),
+            'pdf_url': result.get("url"),
+            'total_citations': result.get("influentialCitationCount"),
+            'authors': result.get("authors"),
+        }
+
+    def store_result(self, result):
+        """
+        Insert one Semantic Scholar paper together with its authors.
+        Args:
+            result (dict): A paper from the Semantic Scholar API.
+        Returns:
+            int or None: The paper's id, or None if the paper could not be inserted.
+        """
+        # Insert paper information into the database
+        paper_openalex_id = result.get("externalIds", {}).get("DOI", None)  # Assuming DOI is unique and suitable
+        if not paper_openalex_id:
+            print(f"No DOI found for paper: {result.get('title', 'No Title')}. Skipping.")
+            return None
+
+        print(f"\nInserting paper: {result.get('title')}")
+        paper_id = self.db_manager.insert_paper(
+            openalex_id=paper_openalex_id,
+            title=result.get("title"),
+            abstract=result.get("abstract"),
+            publication_year=result.get("year"),
+            journal_id=None,  # Assuming journal info is not available directly from Semantic Scholar
+            total_citations=result.get("influentialCitationCount", 0),
+            citations_per_year=0.0,  # Placeholder
+            rank_citations_per_year=0,  # Placeholder
+            pdf_url=result.get("url"),
+            doi=paper_openalex_id,
+            influential_citations=0,  # Placeholder
+            delta_citations=0  # Placeholder
+        )
+
+        if not paper_id:
+            print(f"\nFailed to insert/update paper: {result.get('title')}. Skipping further processing for this paper.")
+            return None
+
+        # Insert author information
+        for author in result.get("authors", []):
+            author_name = author.get("name")
+            if not author_name:
+                print("Author name is missing. Skipping this author.")
+                continue
+
+            # Generate a unique openalex_id for the author
+            author_openalex_id = self.generate_openalex_id('SEM_SCHOLAR_AUTHOR_', author_name)
+
+            # Insert or update the author
+            author_id = self.db_manager.insert_author(
+                openalex_id=author_openalex_id,
+                name=author_name,
+                first_publication_year=0,  # Using 0 as a placeholder
+                author_age=0,  # Using 0 as a placeholder
+                h_index=0,  # Using 0 as a placeholder
+                delta_h_index=0,  # Using 0 as a placeholder
+                adopters=0,  # Using 0 as a placeholder
+                total_papers=0,  # Using 0 as a placeholder
+                delta_total_papers=0,  # Using 0 as a placeholder
+                recent_coauthors=0,  # Using 0 as a placeholder
+                coauthor_pagerank=0.0,  # Using 0.0 as a placeholder
+                total_citations=0,  # Using 0 as a placeholder
+                citations_per_paper=0.0,  # Using 0.0 as a placeholder
+                max_citations=0,  # Using 0 as a placeholder
+                total_journals=0  # Using 0 as a placeholder
+            )
+
+            if not author_id:
+                print(f"Failed to insert/update author: {author_name}. Skipping this author.")
+                continue
+
+            # Insert paper-author relationship
+            self.db_manager.insert_paper_author(paper_id=paper_id, author_id=author_id)
+
+        return paper_id
+
+    def update_existing_entries(self, page_size=BATCH_SIZE, max_pages=None):
+        """
+        Fill placeholder citation counts and abstracts of papers with a DOI from Semantic Scholar.
+        Pages through the placeholder papers by id and looks each page up with one /paper/batch
+        request. Like the OpenAlex enrichment, every page commits together with the job's
+        watermark and a finished sweep resets it.
+        Returns the number of papers updated.
+        """
+        db_manager = DatabaseManager()
+        db_manager.set_autocommit(False)
+        after_id = db_manager.get_enrichment_watermark(ENRICHMENT_JOB)
+        if after_id:
+            print(f"Resuming Semantic Scholar enrichment after paper ID {after_id}.")
+
+        updated_papers = 0
+        pages = 0
         try:
-            for result in self.api_handler.query(query, max_results=max_results):
-                count += 1
-
-                try:
-                    # Insert paper information into the database
-                    paper_openalex_id = result.get("externalIds", {}).get("DOI", None)  # Assuming DOI is unique and suitable
-                    if not paper_openalex_id:
-                        print(f"No DOI found for paper: {result.get('title', 'No Title')}. Skipping.")
-                        continue
-
-                    inserted_papers += 1
-                    print(f"\nInserting paper {inserted_papers}: {result.get('title')}")
-                    paper_id = self.db_manager.insert_paper(
-                        openalex_id=paper_openalex_id,
-                        title=result.get("title"),
-                        abstract=result.get("abstract"),
-                        publication_year=result.get("year"),
-                        journal_id=None,  # Assuming journal info is not available directly from Semantic Scholar
-                        total_citations=result.get("influentialCitationCount", 0),
-                        citations_per_year=0.0,  # Placeholder
-                        rank_citations_per_year=0,  # Placeholder
-                        pdf_url=result.get("url"),
-                        doi=paper_openalex_id,
-                        influential_citations=0,  # Placeholder
-                        delta_citations=0  # Placeholder
-                    )
-
-                    if not paper_id:
-                        print(f"\nFailed to insert/update paper: {result.get('title')}. Skipping further processing for this paper.")
-                        continue
-
-                    # Insert author information
-                    for author in result.get("authors", []):
-                        author_name = author.get("name")
-                        if not author_name:
-                            print("Author name is missing. Skipping this author.")
-                            continue
-
-                        # Generate a unique openalex_id for the author
-                        author_openalex_id = self.generate_openalex_id('SEM_SCHOLAR_AUTHOR_', author_name)
-
-                        # Insert or update the author
-                        author_id = self.db_manager.insert_author(
-                            openalex_id=author_openalex_id,
-                            name=author_name,
-                            first_publication_year=0,  # Using 0 as a placeholder
-                            author_age=0,  # Using 0 as a placeholder
-                            h_index=0,  # Using 0 as a placeholder
-                            delta_h_index=0,  # Using 0 as a placeholder
-                            adopters=0,  # Using 0 as a placeholder
-                            total_papers=0,  # Using 0 as a placeholder
-                            delta_total_papers=0,  # Using 0 as a placeholder
-                            recent_coauthors=0,  # Using 0 as a placeholder
-                            coauthor_pagerank=0.0,  # Using 0.0 as a placeholder
-                            total_citations=0,  # Using 0 as a placeholder
-                            citations_per_paper=0.0,  # Using 0.0 as a placeholder
-                            max_citations=0,  # Using 0 as a placeholder
-                            total_journals=0  # Using 0 as a placeholder
-                        )
-
-                        if not author_id:
-                            print(f"Failed to insert/update author: {author_name}. Skipping this author.")
-                            continue
-
-                        # Insert paper-author relationship
-                        self.db_manager.insert_paper_author(paper_id=paper_id, author_id=author_id)
-
-                except Exception as e:
-                    print(f"An error occurred while processing paper '{result.get('title')}': {e}. Skipping this paper.")
-
-                if max_results is not None and count >= max_results:
+            while max_pages is None or pages < max_pages:
+                entries = db_manager.get_entries_with_placeholders(after_id=after_id, limit=page_size)
+                if not entries:
+                    print("Semantic Scholar enrichment sweep completed.")
+                    db_manager.set_enrichment_watermark(ENRICHMENT_JOB, 0)
+                    db_manager.commit_batch()
                     break
-        except Exception as e:
-            print(f"An error occurred: {e}")
+
+                # OpenAlex stores DOIs as https://doi.org/... URLs, which /paper/batch does not resolve
+                paper_ids = {}
+                for paper_id, _, doi, _, _ in entries:
+                    doi = normalize_doi(doi)
+                    if doi:
+                        paper_ids.setdefault(doi, []).append(paper_id)
+
+                page_updates = 0
+                for doi, paper in self.api_handler.batch(list(paper_ids)):
+                    update_fields = {
+                        'total_citations': paper.get('citationCount'),
+                        'influential_citations': paper.get('influentialCitationCount'),
+                        'abstract': paper.get('abstract'),
+                    }
+                    update_fields = {field: value for field, value in update_fields.items() if value}
+                    for paper_id in paper_ids[doi]:
+                        if db_manager.update_placeholder_fields(paper_id, update_fields):
+                            page_updates += 1
+
+                after_id = entries[-1][0]
+                db_manager.set_enrichment_watermark(ENRICHMENT_JOB, after_id)
+                if db_manager.commit_batch():
+                    updated_papers += page_updates
+                pages += 1
+                print(f"Updated {page_updates} of {len(entries)} papers with placeholders up to paper ID {after_id}.")
         finally:
-            print(f"Processed {count} results from Semantic Scholar. Inserted {inserted_papers} new papers into the database.")
-            self.db_manager.close()
+            db_manager.close()
+        return updated_papers
 
 if __name__ == "__main__":
     sem_scholar_wrapper = SemanticScholarDbWrapper()
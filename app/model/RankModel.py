@@ -3,17 +3,163 @@ import psycopg2
 import pandas as pd
 import pickle
 import re
+import numpy as np
+from itertools import chain
 from datetime import datetime
 from sklearn.neural_network import MLPClassifier  # Using classifier instead of regressor
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from database.DatabaseManager import DatabaseManager
+from database.abstracts import AbstractDecoder
+from model.snapshot import load_snapshot
 from dotenv import load_dotenv
 from sklearn.preprocessing import MinMaxScaler, StandardScaler
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import classification_report, roc_auc_score
 from sklearn.inspection import permutation_importance
 
+# Rows fetched per round trip from the server-side cursor that streams the ranking corpus
+RANKING_CHUNK_SIZE = int(os.getenv('RANKING_CHUNK_SIZE', '5000'))
+
+# Per-paper ranking features, precomputed by the paper_features materialized view.
+# Column name -> numpy dtype of the array it is loaded into (object for text and arrays).
+PAPER_FEATURE_DTYPES = {
+    'id': np.int64,
+    'title': object,
+    'total_citations': np.float64,
+    'influential_citations': np.float64,
+    'publication_year': np.float64,
+    'delta_citations': np.float64,
+    'pdf_url': object,
+    'journal_name': object,
+    'journal_h_index': np.float64,
+    'mean_citations_per_paper': np.float64,
+    'total_papers_published': np.float64,
+    'num_authors': np.float64,
+    'avg_author_h_index': np.float64,
+    'avg_author_total_papers': np.float64,
+    'avg_author_total_citations': np.float64,
+    'authors': object,
+}
+
+PAPER_FEATURES_COLUMNS = ", ".join(PAPER_FEATURE_DTYPES)
+
+# Abstracts are selected last so they can be split off each row without being stored.
+# Compressed abstracts (migration 0008) travel as their deflate body and are decoded client-side.
+ABSTRACT_COLUMNS = ", abstract, abstract_dictionary_id, abstract_body"
+
+# Same shape for views and tables without compressed abstracts
+INLINE_ABSTRACT_COLUMNS = ", abstract, NULL::integer, NULL::bytea"
+
+PAPER_FEATURES_QUERY = "SELECT {columns} FROM paper_features"
+
+# Same columns computed from the base tables, used when the view does not exist
+PAPER_FEATURES_JOIN_QUERY = """
+    SELECT {columns} FROM (
+        SELECT
+            p.id,
+            p.title,
+            p.abstract,
+            p.total_citations,
+            p.influential_citations,
+            p.publication_year,
+            p.delta_citations,
+            p.pdf_url,
+            j.journal_name,
+            j.journal_h_index,
+            j.mean_citations_per_paper,
+            j.total_papers_published,
+            COUNT(pa.author_id) AS num_authors,
+            AVG(a.h_index) AS avg_author_h_index,
+            AVG(a.total_papers) AS avg_author_total_papers,
+            AVG(a.total_citations) AS avg_author_total_citations,
+            array_agg(a.name) FILTER (WHERE a.name IS NOT NULL) AS authors
+        FROM papers p
+        LEFT JOIN journals j ON p.journal_id = j.id
+        LEFT JOIN paper_authors pa ON p.id = pa.paper_id
+        LEFT JOIN authors a ON pa.author_id = a.id
+        GROUP BY
+            p.id,
+            j.journal_name,
+            j.journal_h_index,
+            j.mean_citations_per_paper,
+            j.total_papers_published
+    ) AS paper_features
+"""
+
+
+def iter_article_rows(connection, with_abstracts=False, chunk_size=RANKING_CHUNK_SIZE):
+    """
+    Yield ranking corpus rows in chunks of 'chunk_size' through a named (server-side) cursor,
+    so only one chunk is held client-side at a time. Rows follow PAPER_FEATURE_DTYPES,
+    with the abstract appended as the last value if 'with_abstracts' is set. Compressed
+    abstracts are decompressed one chunk at a time, as the chunk is yielded.
+    """
+    if with_abstracts:
+        queries = [
+            PAPER_FEATURES_QUERY.format(columns=PAPER_FEATURES_COLUMNS + ABSTRACT_COLUMNS),
+            # paper_features predates compressed abstracts (migration 0008)
+            PAPER_FEATURES_QUERY.format(columns=PAPER_FEATURES_COLUMNS + INLINE_ABSTRACT_COLUMNS),
+            PAPER_FEATURES_JOIN_QUERY.format(columns=PAPER_FEATURES_COLUMNS + INLINE_ABSTRACT_COLUMNS),
+        ]
+    else:
+        queries = [
+            PAPER_FEATURES_QUERY.format(columns=PAPER_FEATURES_COLUMNS),
+            PAPER_FEATURES_JOIN_QUERY.format(columns=PAPER_FEATURES_COLUMNS),
+        ]
+    decoder = AbstractDecoder(connection)
+    missing_dictionaries = set()
+
+    def decode(abstract, dictionary_id, body):
+        try:
+            return decoder.decode(abstract, dictionary_id, body)
+        except LookupError as e:
+            # The paper is still ranked, without its abstract
+            if dictionary_id not in missing_dictionaries:
+                missing_dictionaries.add(dictionary_id)
+                print(f"Skipping abstracts that cannot be decompressed: {e}")
+            return None
+
+    try:
+        for index, query in enumerate(queries):
+            cur = connection.cursor(name='ranking_corpus')
+            cur.itersize = chunk_size
+            try:
+                cur.execute(query)
+                break
+            except (psycopg2.errors.UndefinedTable, psycopg2.errors.UndefinedColumn):
+                # paper_features has not been created (migration 0003) or updated yet; try the next query
+                connection.rollback()
+                if index == len(queries) - 1:
+                    raise
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            if with_abstracts:
+                rows = [row[:-3] + (decode(*row[-3:]),) for row in rows]
+            yield rows
+        cur.close()
+    finally:
+        # End the read transaction so the server releases the cursor and its snapshot
+        connection.rollback()
+
+
+def features_refreshed_at(connection):
+    """
+    Return the time of the last paper_features refresh as an ISO string, or None before
+    migration 0009 or the first refresh. Snapshots record it when exported and are only
+    used while it still matches, which costs one primary-key lookup per search.
+    """
+    with connection.cursor() as cur:
+        try:
+            cur.execute("SELECT refreshed_at FROM view_refreshes WHERE view_name = 'paper_features'")
+            row = cur.fetchone()
+        except psycopg2.errors.UndefinedTable:
+            row = None
+    connection.rollback()
+    return row[0].isoformat() if row else None
+
 
 class RankModel:
     def __init__(self):
@@ -22,9 +168,16 @@ class RankModel:
         self.database_url = os.getenv('DATABASE_URL')
         self.connection = psycopg2.connect(self.database_url)
         self.db_manager = DatabaseManager()
+        # Ranking snapshot in use, if a fresh one was found by get_articles()
+        self.snapshot = None
         self.scaler = None
         self.model = self.load_model()
     
+    def close(self):
+        """Close the database connections opened by this model."""
+        self.connection.close()
+        self.db_manager.close()
+
     def load_model(self):
         model_file = 'ml_model.pkl'
         scaler_file = 'scaler.pkl'
@@ -41,7 +194,7 @@ class RankModel:
     
     def train_ml_model(self):
         # Fetch articles data from the database
-        articles = self.get_articles_from_db()
+        articles = self.get_articles()
 
         # Parse the list of influential articles
         influential_titles = self.get_influential_titles('top100MLpapers.txt')
@@ -186,61 +339,116 @@ class RankModel:
             print(f"File {filepath} not found.")
             return set()
 
-    def get_articles_from_db(self):
-        # Fetch articles and related data from the database
-        query = """
-            SELECT
-                p.id,
-                p.title,
-                p.abstract,
-                p.total_citations,
-                p.influential_citations,
-                p.publication_year,
-                p.delta_citations,
-                p.pdf_url,
-                j.journal_name,  
-                j.journal_h_index,
-                j.mean_citations_per_paper,
-                j.total_papers_published,
-                COUNT(pa.author_id) AS num_authors,
-                AVG(a.h_index) AS avg_author_h_index,
-                AVG(a.total_papers) AS avg_author_total_papers,
-                AVG(a.total_citations) AS avg_author_total_citations,
-                array_agg(a.name) FILTER (WHERE a.name IS NOT NULL) AS authors
-            FROM papers p
-            LEFT JOIN journals j ON p.journal_id = j.id
-            LEFT JOIN paper_authors pa ON p.id = pa.paper_id
-            LEFT JOIN authors a ON pa.author_id = a.id
-            GROUP BY
-                p.id,
-                j.journal_name,  
-                j.journal_h_index,
-                j.mean_citations_per_paper,
-                j.total_papers_published
+    def get_articles(self, abstract_consumer=None):
         """
-        try:
-            with self.connection.cursor() as cur:
-                cur.execute(query)
-                rows = cur.fetchall()
-                columns = [desc[0] for desc in cur.description]
-                articles = pd.DataFrame(rows, columns=columns)
+        Load the ranking corpus like get_articles_from_db, from the memory-mapped snapshot
+        when it is still fresh and from the database otherwise.
+        """
+        snapshot = load_snapshot()
+        if snapshot is not None and not snapshot.is_fresh(features_refreshed_at(self.connection)):
+            print(f"Ranking snapshot {snapshot.manifest['version']} is stale. Loading articles from the database.")
+            snapshot = None
+        self.snapshot = snapshot
+        if snapshot is None:
+            return self.get_articles_from_db(abstract_consumer)
+
+        articles = snapshot.to_frame()
+        if abstract_consumer is None:
             return articles
-        except psycopg2.Error as e:
+        return articles, abstract_consumer(snapshot.iter_abstracts())
+
+    def get_articles_from_db(self, abstract_consumer=None):
+        """
+        Load the ranking corpus into a DataFrame of typed columns, without abstracts.
+        If 'abstract_consumer' is given it is called once with an iterable over the abstracts
+        (in row order, '' for missing ones), which it must consume in a single pass; the
+        abstracts are never stored. Returns (articles, consumer result) in that case.
+        """
+        chunks = {column: [] for column in PAPER_FEATURE_DTYPES}
+
+        def add_chunk(rows):
+            for index, (column, dtype) in enumerate(PAPER_FEATURE_DTYPES.items()):
+                values = [row[index] for row in rows]
+                if dtype is object:
+                    array = np.empty(len(values), dtype=object)
+                    array[:] = values
+                else:
+                    array = np.array(values, dtype=dtype)
+                chunks[column].append(array)
+
+        def abstracts():
+            for rows in iter_article_rows(self.connection, with_abstracts=True):
+                add_chunk(rows)
+                for row in rows:
+                    yield row[-1] or ''
+
+        consumed = None
+        try:
+            if abstract_consumer is None:
+                for rows in iter_article_rows(self.connection):
+                    add_chunk(rows)
+            else:
+                stream = abstracts()
+                consumed = abstract_consumer(stream)
+                # Load whatever the consumer did not read
+                for _ in stream:
+                    pass
+            articles = pd.DataFrame({
+                column: np.concatenate(arrays) if arrays else np.empty(0, dtype=PAPER_FEATURE_DTYPES[column])
+                for column, arrays in chunks.items()
+            })
+        except (psycopg2.Error, LookupError) as e:
             print(f"Error fetching articles: {e}")
-            return pd.DataFrame()
+            articles = pd.DataFrame()
+        if abstract_consumer is None:
+            return articles
+        return articles, consumed
+
+    def get_abstracts(self, paper_ids):
+        """Return {paper id: abstract} for the given papers."""
+        if not paper_ids:
+            return {}
+        if self.snapshot is not None:
+            return self.snapshot.get_abstracts(paper_ids)
+        try:
+            # Only the requested abstracts are decompressed
+            with self.connection.cursor() as cur:
+                try:
+                    cur.execute("""
+                        SELECT p.id, p.abstract, pab.dictionary_id, pab.body
+                        FROM papers p
+                        LEFT JOIN paper_abstracts pab ON pab.paper_id = p.id
+                        WHERE p.id = ANY(%s)
+                    """, (list(paper_ids),))
+                except psycopg2.errors.UndefinedTable:
+                    # paper_abstracts has not been created yet (migration 0008)
+                    self.connection.rollback()
+                    cur.execute("SELECT id, abstract, NULL, NULL FROM papers WHERE id = ANY(%s)", (list(paper_ids),))
+                decoder = AbstractDecoder(self.connection)
+                return {row[0]: decoder.decode(*row[1:]) for row in cur.fetchall()}
+        except (psycopg2.Error, LookupError) as e:
+            print(f"Error fetching abstracts: {e}")
+            self.connection.rollback()
+            return {}
 
     def rank_articles(self, user_query, num_articles=10):
-        articles = self.get_articles_from_db()
+        # Stream the abstracts straight into the TF-IDF vectorizer, user query first
+        vectorizer = TfidfVectorizer(stop_words='english')
+
+        def vectorize(abstracts):
+            abstracts = iter(abstracts)
+            first = next(abstracts, None)
+            if first is None:
+                # Empty corpus: a query of stop words alone would leave the vectorizer without a vocabulary
+                return None
+            return vectorizer.fit_transform(chain([user_query, first], abstracts))
+
+        articles, tfidf_matrix = self.get_articles(abstract_consumer=vectorize)
 
         if articles.empty:
             print("No articles found in the database.")
             return pd.DataFrame()
 
-        # Combine user query and article abstracts to create TF-IDF matrix
-        combined_texts = [user_query] + articles['abstract'].fillna('').tolist()
-        vectorizer = TfidfVectorizer(stop_words='english')
-        tfidf_matrix = vectorizer.fit_transform(combined_texts)
-
         # Calculate cosine similarity between user query and articles
         cosine_similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:]).flatten()
 
@@ -306,5 +514,8 @@ class RankModel:
         # Sort articles by combined score
         ranked_articles = articles.sort_values(by='combined_score', ascending=False)
 
-        # Return the top N articles
-        return ranked_articles.head(num_articles)
+        # Return the top N articles, with the abstracts fetched for just those
+        top_articles = ranked_articles.head(num_articles).copy()
+        abstracts = self.get_abstracts(top_articles['id'].tolist())
+        top_articles['abstract'] = top_articles['id'].map(abstracts)
+        return top_articles
@@ -0,0 +1,224 @@
+# app/model/snapshot.py
+
+import os
+import json
+import shutil
+import argparse
+from datetime import datetime, timezone
+import numpy as np
+import pyarrow as pa
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Directory holding the ranking corpus snapshot (manifest.json plus one sub-directory per version)
+SNAPSHOT_DIR = os.getenv('RANKING_SNAPSHOT_DIR', 'snapshots')
+
+# A snapshot older than this many seconds is treated as stale (0 = no age limit)
+SNAPSHOT_MAX_AGE = int(os.getenv('RANKING_SNAPSHOT_MAX_AGE', '86400'))
+
+# Bumped whenever the file layout changes, so old snapshots are ignored instead of misread
+SNAPSHOT_FORMAT = 2
+
+MANIFEST_FILE = 'manifest.json'
+DATA_FILE = 'paper_features.arrow'
+
+# Numpy dtype of a ranking column -> Arrow type it is stored as
+ARROW_TYPES = {
+    np.int64: pa.int64(),
+    np.float64: pa.float64(),
+}
+
+
+def arrow_schema(dtypes):
+    """Arrow schema for the ranking columns in 'dtypes' (see RankModel.PAPER_FEATURE_DTYPES) plus the abstract."""
+    fields = []
+    for column, dtype in dtypes.items():
+        if column == 'authors':
+            fields.append(pa.field(column, pa.list_(pa.string())))
+        else:
+            fields.append(pa.field(column, ARROW_TYPES.get(dtype, pa.string())))
+    fields.append(pa.field('abstract', pa.string()))
+    return pa.schema(fields)
+
+
+def write_snapshot(row_chunks, dtypes, features_refreshed_at, directory=SNAPSHOT_DIR):
+    """
+    Write the ranking corpus to a new snapshot version in 'directory'.
+    'row_chunks' yields lists of rows in 'dtypes' column order with the abstract last,
+    as produced by RankModel.iter_article_rows(with_abstracts=True). The data goes to an
+    uncompressed Arrow IPC file so readers can memory-map it, one record batch per chunk.
+    The manifest is replaced atomically once the data file is complete, and
+    'features_refreshed_at' (the paper_features refresh the rows were read from, see
+    RankModel.features_refreshed_at) is recorded in it for staleness checks.
+    Returns the manifest.
+    """
+    schema = arrow_schema(dtypes)
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    version_dir = os.path.join(directory, version)
+    os.makedirs(version_dir, exist_ok=True)
+
+    row_count = 0
+    with pa.OSFile(os.path.join(version_dir, DATA_FILE), 'wb') as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            for rows in row_chunks:
+                arrays = []
+                for index, field in enumerate(schema):
+                    values = [row[index] for row in rows]
+                    if pa.types.is_floating(field.type):
+                        # Decimals and NULLs become float64 / NaN, as in the database loader
+                        values = np.array(values, dtype=np.float64)
+                    arrays.append(pa.array(values, type=field.type))
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                row_count += len(rows)
+
+    manifest = {
+        'format': SNAPSHOT_FORMAT,
+        'version': version,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'row_count': row_count,
+        'columns': schema.names,
+        'features_refreshed_at': features_refreshed_at,
+        'data_file': os.path.join(version, DATA_FILE),
+    }
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    with open(manifest_path + '.tmp', 'w') as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    remove_old_versions(directory, keep={version})
+    return manifest
+
+
+def remove_old_versions(directory, keep):
+    """Delete snapshot versions other than 'keep'. Workers that still map an old file keep their view of it."""
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name not in keep and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def read_manifest(directory=SNAPSHOT_DIR):
+    """Return the snapshot manifest in 'directory', or None if there is no usable snapshot."""
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), 'r') as file:
+            manifest = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if manifest.get('format') != SNAPSHOT_FORMAT:
+        return None
+    return manifest
+
+
+def is_fresh(manifest, features_refreshed_at, max_age=SNAPSHOT_MAX_AGE):
+    """
+    True if the snapshot of 'manifest' was exported from the current paper_features refresh and
+    is not too old. Every ingestion, metrics, enrichment and compaction run ends with a refresh.
+    """
+    if manifest['features_refreshed_at'] != features_refreshed_at:
+        return False
+    if max_age:
+        created_at = datetime.fromisoformat(manifest['created_at'])
+        if (datetime.now(timezone.utc) - created_at).total_seconds() > max_age:
+            return False
+    return True
+
+
+class Snapshot:
+    """A memory-mapped ranking corpus snapshot. Columns are read from the page cache without copying."""
+
+    def __init__(self, directory, manifest):
+        self.manifest = manifest
+        source = pa.memory_map(os.path.join(directory, manifest['data_file']), 'r')
+        self.table = pa.ipc.open_file(source).read_all()
+        self._positions = None
+
+    def is_fresh(self, features_refreshed_at, max_age=SNAPSHOT_MAX_AGE):
+        return is_fresh(self.manifest, features_refreshed_at, max_age)
+
+    def to_frame(self):
+        """The ranking columns, without abstracts, as a DataFrame."""
+        articles = self.table.drop_columns(['abstract', 'authors']).to_pandas()
+        # Author lists stay Python lists (or None), as when they are read from the database
+        articles['authors'] = self.table.column('authors').to_pylist()
+        return articles
+
+    def iter_abstracts(self):
+        """Yield the abstracts in row order ('' for missing ones), one record batch at a time."""
+        for chunk in self.table.column('abstract').chunks:
+            for abstract in chunk.to_pylist():
+                yield abstract or ''
+
+    def get_abstracts(self, paper_ids):
+        """Return {paper id: abstract} for the given papers."""
+        if self._positions is None:
+            ids = self.table.column('id').to_numpy()
+            self._positions = dict(zip(ids.tolist(), range(len(ids))))
+        positions = [self._positions[paper_id] for paper_id in paper_ids if paper_id in self._positions]
+        rows = self.table.select(['id', 'abstract']).take(pa.array(positions, type=pa.int64()))
+        return dict(zip(rows.column('id').to_pylist(), rows.column('abstract').to_pylist()))
+
+
+# (directory, version) -> Snapshot, shared by every RankModel in this process
+_loaded_snapshots = {}
+
+
+def load_snapshot(directory=SNAPSHOT_DIR):
+    """Return the current snapshot in 'directory' (mapped once per process), or None if there is none."""
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+    key = (os.path.abspath(directory), manifest['version'])
+    snapshot = _loaded_snapshots.get(key)
+    if snapshot is None:
+        try:
+            snapshot = Snapshot(directory, manifest)
+        except (OSError, pa.ArrowInvalid) as e:
+            print(f"Error loading ranking snapshot {manifest['version']}: {e}")
+            return None
+        # Older versions of this directory are no longer needed
+        for loaded_key in [k for k in _loaded_snapshots if k[0] == key[0]]:
+            del _loaded_snapshots[loaded_key]
+        _loaded_snapshots[key] = snapshot
+    return snapshot
+
+
+def export_snapshot(connection, directory=SNAPSHOT_DIR, force=True):
+    """
+    Export the ranking corpus read over 'connection' to a new snapshot version. Without 'force',
+    a snapshot that is still fresh is kept. Returns the manifest of the current snapshot.
+    """
+    # Imported here because RankModel itself reads snapshots through this module
+    from model.RankModel import PAPER_FEATURE_DTYPES, iter_article_rows, features_refreshed_at
+
+    # Read before the rows: a refresh during the export leaves the snapshot stale rather than wrongly fresh
+    refreshed_at = features_refreshed_at(connection)
+    manifest = read_manifest(directory)
+    if not force and manifest is not None and is_fresh(manifest, refreshed_at):
+        print(f"Ranking snapshot {manifest['version']} is still fresh.")
+        return manifest
+    manifest = write_snapshot(
+        iter_article_rows(connection, with_abstracts=True),
+        PAPER_FEATURE_DTYPES,
+        refreshed_at,
+        directory
+    )
+    print(f"Wrote ranking snapshot {manifest['version']} with {manifest['row_count']} papers to {directory}.")
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the ranking corpus to an Arrow snapshot for fast worker start-up.")
+    parser.add_argument('--directory', default=SNAPSHOT_DIR, help="Snapshot directory.")
+    args = parser.parse_args(argv)
+
+    import psycopg2
+    connection = psycopg2.connect(os.getenv('DATABASE_URL'))
+    try:
+        export_snapshot(connection, args.directory)
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
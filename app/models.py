@@ -1,6 +1,6 @@
 # app/database/models.py
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, Index, DateTime, Boolean, LargeBinary, text
 from sqlalchemy.orm import relationship, declarative_base
 
 Base = declarative_base()
@@ -26,6 +26,12 @@ class Author(Base):
     total_journals = Column(Integer)
     mean_journal_citations_per_paper = Column(Float)
 
+    __table_args__ = (
+        # Covering index for the per-paper author aggregates in RankModel.get_articles_from_db
+        Index('ix_authors_ranking_features', 'id',
+              postgresql_include=['h_index', 'total_papers', 'total_citations', 'name']),
+    )
+
     papers = relationship('PaperAuthor', back_populates='author', cascade='all, delete-orphan')
     citations = relationship('Citation', back_populates='author')
 
@@ -33,7 +39,7 @@ class Journal(Base):
     __tablename__ = 'journals'
 
     id = Column(Integer, primary_key=True)
-    journal_name = Column(String(255), nullable=False)
+    journal_name = Column(String(255), unique=True, nullable=False)
     mean_citations_per_paper = Column(Float)
     delta_mean_citations_per_paper = Column(Float)
     journal_h_index = Column(Integer)
@@ -51,8 +57,8 @@ class Paper(Base):
     openalex_id = Column(String(50), unique=True)
     title = Column(String(2000), nullable=False)
     abstract = Column(Text)
-    publication_year = Column(Integer)
-    journal_id = Column(Integer, ForeignKey('journals.id'))
+    publication_year = Column(Integer, index=True)
+    journal_id = Column(Integer, ForeignKey('journals.id'), index=True)
     total_citations = Column(Integer)
     citations_per_year = Column(Float)
     rank_citations_per_year = Column(Integer)
@@ -61,6 +67,12 @@ class Paper(Base):
     influential_citations = Column(Integer)
     delta_citations = Column(Integer)
 
+    __table_args__ = (
+        # Partial index over the placeholder papers scanned by DatabaseManager.get_entries_with_placeholders
+        Index('ix_papers_placeholder_citations', 'id',
+              postgresql_where=text('total_citations IS NULL OR total_citations = 0')),
+    )
+
     journal = relationship('Journal', back_populates='papers')
     authors = relationship('PaperAuthor', back_populates='paper', cascade='all, delete-orphan')
     citations = relationship('Citation', foreign_keys='Citation.paper_id', back_populates='paper')
@@ -71,6 +83,11 @@ class PaperAuthor(Base):
     __tablename__ = 'paper_authors'
     paper_id = Column(Integer, ForeignKey('papers.id'), primary_key=True)
     author_id = Column(Integer, ForeignKey('authors.id'), primary_key=True)
+
+    __table_args__ = (
+        Index('ix_paper_authors_author_id', 'author_id', 'paper_id'),
+    )
+
     paper = relationship('Paper', back_populates='authors')
     author = relationship('Author', back_populates='papers')
 
@@ -78,17 +95,28 @@ class Citation(Base):
     __tablename__ = 'citations'
 
     id = Column(Integer, primary_key=True)
-    paper_id = Column(Integer, ForeignKey('papers.id'))  # The paper being cited
+    paper_id = Column(Integer, ForeignKey('papers.id'), index=True)  # The paper being cited
     author_id = Column(Integer, ForeignKey('authors.id'))
     citation_year = Column(Integer)
     citation_count = Column(Integer)
-    citing_paper_id = Column(Integer, ForeignKey('papers.id'))  # The paper that cites
+    citing_paper_id = Column(Integer, ForeignKey('papers.id'), index=True)  # The paper that cites
+
+    __table_args__ = (
+        # One edge per (cited, citing) pair; resolved referenced_works are inserted ON CONFLICT DO NOTHING
+        Index('ux_citations_edge', 'paper_id', 'citing_paper_id', unique=True),
+    )
 
     # Resolve ambiguity by specifying foreign_keys
     paper = relationship('Paper', foreign_keys=[paper_id], back_populates='citations')
     citing_paper = relationship('Paper', foreign_keys=[citing_paper_id], back_populates='citing_citations')
     author = relationship('Author', back_populates='citations')
 
+class PendingCitation(Base):
+    __tablename__ = 'pending_citations'
+
+    citing_paper_id = Column(Integer, ForeignKey('papers.id', ondelete='CASCADE'), primary_key=True)
+    cited_openalex_id = Column(String(50), primary_key=True, index=True)  # Referenced work not stored yet
+
 class Concept(Base):
     __tablename__ = 'concepts'
 
@@ -102,10 +130,64 @@ class PaperConcept(Base):
     __tablename__ = 'paper_concepts'
 
     paper_id = Column(Integer, ForeignKey('papers.id'), primary_key=True)
-    concept_id = Column(Integer, ForeignKey('concepts.id'), primary_key=True)
+    concept_id = Column(Integer, ForeignKey('concepts.id'), primary_key=True, index=True)
     score = Column(Float)  # Relevance score
 
     paper = relationship('Paper', back_populates='concepts')
     concept = relationship('Concept', back_populates='papers')
 
 Paper.concepts = relationship('PaperConcept', back_populates='paper', cascade='all, delete-orphan')
+
+class EnrichmentWatermark(Base):
+    __tablename__ = 'enrichment_watermarks'
+
+    job = Column(String(64), primary_key=True)
+    last_paper_id = Column(Integer, nullable=False, server_default=text('0'))  # Highest paper id processed this sweep
+    updated_at = Column(DateTime, nullable=False, server_default=text('now()'))
+
+class HarvestCheckpoint(Base):
+    __tablename__ = 'harvest_checkpoints'
+
+    source = Column(String(64), primary_key=True)
+    query = Column(Text, primary_key=True)
+    position = Column(Text)  # JSON resume token after the last processed result; NULL = from the start
+    records = Column(Integer, nullable=False, server_default=text('0'))
+    exhausted = Column(Boolean, nullable=False, server_default=text('false'))  # Reached the end of the results
+    updated_at = Column(DateTime, nullable=False, server_default=text('now()'))
+
+class Job(Base):
+    __tablename__ = 'jobs'
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(32), nullable=False)  # ingest, enrich, metrics, retrain or compress
+    params = Column(Text, nullable=False, server_default=text("'{}'"))  # JSON arguments of the job
+    status = Column(String(16), nullable=False, server_default=text("'queued'"))  # queued, running, done or failed
+    result = Column(Text)  # JSON summary returned by the job
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, server_default=text('0'))
+    worker = Column(String(255))
+    created_by = Column(String(255))
+    created_at = Column(DateTime, nullable=False, server_default=text('now()'))
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        # Partial indexes behind the claim and stale-job queries of DatabaseManager.claim_job
+        Index('ix_jobs_queued', 'id', postgresql_where=text("status = 'queued'")),
+        Index('ix_jobs_running', 'heartbeat_at', postgresql_where=text("status = 'running'")),
+    )
+
+class AbstractDictionary(Base):
+    __tablename__ = 'abstract_dictionaries'
+
+    id = Column(Integer, primary_key=True)
+    dictionary = Column(LargeBinary, nullable=False)  # Preset deflate dictionary trained on sample abstracts
+    created_at = Column(DateTime, nullable=False, server_default=text('now()'))
+
+class PaperAbstract(Base):
+    __tablename__ = 'paper_abstracts'
+
+    paper_id = Column(Integer, ForeignKey('papers.id', ondelete='CASCADE'), primary_key=True)
+    dictionary_id = Column(Integer, ForeignKey('abstract_dictionaries.id'), nullable=False)
+    body = Column(LargeBinary, nullable=False)  # Raw deflate stream of the abstract; papers.abstract is NULL
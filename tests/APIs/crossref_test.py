@@ -7,9 +7,9 @@ import requests
 def handler():
     return api_handler()
 
-@patch("requests.get")
+@patch("app.database.APIs.http_client.HttpClient.get")
 def test_query_with_results(mock_get, handler):
-    # Mock the response from requests.get
+    # Mock the response from the HTTP client
     mock_response = MagicMock()
     mock_response.raise_for_status.return_value = None  # No exception
     mock_response.json.return_value = {
@@ -32,9 +32,9 @@ def test_query_with_results(mock_get, handler):
     assert results[1]["DOI"] == "10.1000/xyz124"
     assert results[1]["title"] == ["Sample Title 2"]
 
-@patch("requests.get")
+@patch("app.database.APIs.http_client.HttpClient.get")
 def test_query_no_results(mock_get, handler):
-    # Mock the response from requests.get with no items
+    # Mock the response from the HTTP client with no items
     mock_response = MagicMock()
     mock_response.raise_for_status.return_value = None  # No exception
     mock_response.json.return_value = {
@@ -50,18 +50,18 @@ def test_query_no_results(mock_get, handler):
     # Verify that no results are returned
     assert len(results) == 0
 
-@patch("requests.get")
+@patch("app.database.APIs.http_client.HttpClient.get")
 def test_query_request_exception(mock_get, handler):
-    # Mock the requests.get to raise a RequestException
+    # Mock the HTTP client to raise a RequestException
     mock_get.side_effect = requests.exceptions.RequestException("Request failed")
 
     # Call the query method and verify it handles the exception gracefully
     results = list(handler.query("sample query", max_results=2))
     assert len(results) == 0
 
-@patch("requests.get")
+@patch("app.database.APIs.http_client.HttpClient.get")
 def test_query_with_default_max_results(mock_get, handler):
-    # Mock the response from requests.get
+    # Mock the response from the HTTP client
     mock_response = MagicMock()
     mock_response.raise_for_status.return_value = None  # No exception
     mock_response.json.return_value = {
@@ -80,3 +80,57 @@ def test_query_with_default_max_results(mock_get, handler):
     assert len(results) == 1
     assert results[0]["DOI"] == "10.1000/xyz123"
     assert results[0]["title"] == ["Sample Title 1"]
+
+@patch("app.database.APIs.http_client.HttpClient.get")
+def test_query_pages_with_cursor(mock_get):
+    handler = api_handler(page_size=2)
+    pages = {
+        "*": {"next-cursor": "c1", "items": [{"DOI": "10.1/a"}, {"title": ["No DOI"]}]},
+        "c1": {"next-cursor": "c2", "items": [{"DOI": "10.1/b"}, {"DOI": "10.1/c"}]},
+        "c2": {"next-cursor": "c3", "items": []},
+    }
+    requested = []
+    def reply(url, params):
+        requested.append(dict(params))
+        response = MagicMock()
+        response.json.return_value = {"message": pages[params["cursor"]]}
+        return response
+    mock_get.side_effect = reply
+
+    results = list(handler.query("sample query", max_results=10))
+
+    assert [item["DOI"] for item in results] == ["10.1/a", "10.1/b", "10.1/c"]
+    assert [params["cursor"] for params in requested] == ["*", "c1", "c2"]
+    assert requested[0]["rows"] == 2
+    assert requested[0]["select"] == "DOI,title,abstract,published,link,author,subject"
+
+@patch("app.database.APIs.http_client.HttpClient.get")
+def test_query_stops_at_max_results(mock_get):
+    handler = api_handler(page_size=100)
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"message": {"next-cursor": "c", "items": [{"DOI": f"10.1/{i}"} for i in range(3)]}}
+    mock_get.return_value = mock_response
+
+    results = list(handler.query("sample query", max_results=3))
+
+    assert len(results) == 3
+    assert mock_get.call_count == 1
+    assert mock_get.call_args.kwargs["params"]["rows"] == 3
+
+@patch("app.database.APIs.http_client.HttpClient.get")
+def test_harvest_resumes_by_skipping_processed_works(mock_get):
+    handler = api_handler(page_size=2)
+    pages = {
+        "*": {"next-cursor": "c1", "items": [{"DOI": "10.1/a"}, {"DOI": "10.1/b"}]},
+        "c1": {"next-cursor": "c2", "items": [{"DOI": "10.1/c"}, {"DOI": "10.1/d"}]},
+        "c2": {"next-cursor": "c3", "items": []},
+    }
+    def reply(url, params):
+        response = MagicMock()
+        response.json.return_value = {"message": pages[params["cursor"]]}
+        return response
+    mock_get.side_effect = reply
+
+    results = list(handler.harvest("sample query", max_results=10, resume_from=3))
+
+    assert results == [(4, {"DOI": "10.1/d"})]
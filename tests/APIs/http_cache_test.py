@@ -0,0 +1,90 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from unittest.mock import patch
+import requests
+from app.database.APIs.http_cache import HttpCache, CacheMissError, normalize_request
+from app.database.APIs.http_client import HttpClient, JsonStream
+
+def response(status_code, body=b'', headers=None):
+    reply = requests.Response()
+    reply.status_code = status_code
+    reply._content = body
+    reply.headers.update(headers or {})
+    reply.url = 'https://api.openalex.org/works'
+    return reply
+
+def test_normalize_request_sorts_params():
+    a = normalize_request('get', 'HTTPS://API.openalex.org/works?b=2', params={'a': '1'})
+    b = normalize_request('GET', 'https://api.openalex.org/works', params={'b': '2', 'a': '1'})
+    assert a == b
+    assert normalize_request('POST', 'https://x.org/batch', json_body={'ids': [1]}) != \
+        normalize_request('POST', 'https://x.org/batch', json_body={'ids': [2]})
+
+def test_cache_hit_skips_network(tmp_path):
+    client = HttpClient(cache=HttpCache(str(tmp_path), mode='on', ttl=3600))
+    body = json.dumps({'results': [{'id': 'W1'}], 'meta': {'next_cursor': None}}).encode()
+    with patch.object(client.session, 'request', return_value=response(200, body)) as mock_request:
+        first = client.get('https://api.openalex.org/works', params={'search': 'graphs', 'per-page': 200})
+        second = client.get('https://api.openalex.org/works', params={'per-page': 200, 'search': 'graphs'}, stream=True)
+    assert mock_request.call_count == 1
+    assert first.json() == second.json()
+    assert second.from_cache
+    # Cached responses can be streamed like live ones
+    assert list(JsonStream(second.iter_content(chunk_size=5), 'results')) == [{'id': 'W1'}]
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    client = HttpClient(cache=HttpCache(str(tmp_path), mode='on'))
+    with patch.object(client.session, 'request', return_value=response(200, b'{"results": []}')):
+        client.get('https://api.openalex.org/works', params={'search': 'a'})
+        client.get('https://api.openalex.org/works', params={'search': 'b'})
+    assert len(list((tmp_path / 'entries').rglob('*.json'))) == 2
+    assert len(list((tmp_path / 'bodies').rglob('*.gz'))) == 1
+
+def test_stale_entry_is_revalidated_with_etag(tmp_path):
+    client = HttpClient(cache=HttpCache(str(tmp_path), mode='on', ttl=3600))
+    with patch.object(client.session, 'request', return_value=response(200, b'{"v": 1}', {'ETag': '"abc"'})):
+        client.get('https://api.crossref.org/works', params={'query': 'x'})
+
+    with patch('app.database.APIs.http_cache.time.time', return_value=10 ** 11), \
+         patch.object(client.session, 'request', return_value=response(304)) as mock_request:
+        revalidated = client.get('https://api.crossref.org/works', params={'query': 'x'})
+    assert mock_request.call_args.kwargs['headers']['If-None-Match'] == '"abc"'
+    assert revalidated.status_code == 200
+    assert revalidated.json() == {'v': 1}
+
+def test_errors_are_not_cached(tmp_path):
+    client = HttpClient(cache=HttpCache(str(tmp_path), mode='on'), max_retries=0)
+    with patch.object(client.session, 'request', return_value=response(404)) as mock_request:
+        client.get('https://api.crossref.org/works')
+        client.get('https://api.crossref.org/works')
+    assert mock_request.call_count == 2
+
+def test_replay_mode(tmp_path):
+    recorder = HttpClient(cache=HttpCache(str(tmp_path), mode='record'))
+    with patch.object(recorder.session, 'request', return_value=response(200, b'{"data": []}')):
+        recorder.post('https://api.semanticscholar.org/graph/v1/paper/batch', json={'ids': ['DOI:10.1/a']})
+
+    replayer = HttpClient(cache=HttpCache(str(tmp_path), mode='replay'))
+    with patch.object(replayer.session, 'request') as mock_request:
+        replayed = replayer.post('https://api.semanticscholar.org/graph/v1/paper/batch', json={'ids': ['DOI:10.1/a']})
+        with pytest.raises(CacheMissError):
+            replayer.post('https://api.semanticscholar.org/graph/v1/paper/batch', json={'ids': ['DOI:10.1/b']})
+    mock_request.assert_not_called()
+    assert replayed.json() == {'data': []}
+
+def test_concurrent_writes_of_one_file(tmp_path):
+    path = str(tmp_path / 'bodies' / 'shared.json')
+    contents = [bytes([index]) * 100000 for index in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda content: HttpCache._write(path, content), contents * 4))
+
+    # One complete write wins and no temporary files are left behind
+    with open(path, 'rb') as file:
+        assert file.read() in contents
+    assert os.listdir(tmp_path / 'bodies') == ['shared.json']
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        HttpCache('unused', mode='sometimes')
@@ -0,0 +1,123 @@
+import json
+import pytest
+import requests
+from unittest.mock import patch, MagicMock
+from app.database.APIs import http_client
+from app.database.APIs.http_client import (
+    HttpClient, JsonStream, TokenBucket, get_client, close_clients, parse_retry_after, rate_limit_for
+)
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    close_clients()
+    yield
+    close_clients()
+
+def test_get_client_is_shared_per_api():
+    client = get_client('openalex')
+    assert get_client('openalex') is client
+    assert get_client('crossref') is not client
+
+def test_pool_size_per_api(monkeypatch):
+    monkeypatch.setenv('HTTP_POOL_SIZE_OPENALEX', '32')
+    adapter = get_client('openalex').session.get_adapter('https://api.openalex.org/works')
+    assert adapter._pool_maxsize == 32
+    adapter = get_client('crossref').session.get_adapter('https://api.crossref.org/works')
+    assert adapter._pool_maxsize == http_client.HTTP_POOL_SIZE
+
+def test_default_headers_and_timeout():
+    client = HttpClient(timeout=7, headers={'Authorization': 'Bearer key'})
+    assert client.session.headers['Accept-Encoding'] == 'gzip, deflate'
+    assert client.session.headers['Authorization'] == 'Bearer key'
+    with patch.object(client.session, 'request', return_value=MagicMock(status_code=200)) as mock_request:
+        client.get('https://api.openalex.org/works', params={'search': 'x'})
+        mock_request.assert_called_once_with('GET', 'https://api.openalex.org/works', params={'search': 'x'}, timeout=7)
+        client.get('https://api.openalex.org/works', timeout=60)
+        assert mock_request.call_args.kwargs['timeout'] == 60
+
+def response(status_code, headers=None):
+    return MagicMock(status_code=status_code, headers=headers or {})
+
+@patch("app.database.APIs.http_client.time.sleep")
+def test_retries_throttled_and_failed_requests(mock_sleep):
+    client = HttpClient(max_retries=3)
+    replies = [response(429, {'Retry-After': '7'}), response(503), response(200)]
+    with patch.object(client.session, 'request', side_effect=replies) as mock_request:
+        result = client.get('https://api.crossref.org/works')
+    assert result.status_code == 200
+    assert mock_request.call_count == 3
+    # Retry-After is a lower bound on the wait before the next attempt
+    assert mock_sleep.call_args_list[0].args[0] >= 7
+
+@patch("app.database.APIs.http_client.time.sleep")
+def test_gives_up_after_max_retries(mock_sleep):
+    client = HttpClient(max_retries=2)
+    with patch.object(client.session, 'request', return_value=response(500)) as mock_request:
+        result = client.get('https://api.crossref.org/works')
+    assert result.status_code == 500
+    assert mock_request.call_count == 3
+
+    with patch.object(client.session, 'request', side_effect=requests.ConnectionError("reset")):
+        with pytest.raises(requests.ConnectionError):
+            client.get('https://api.crossref.org/works')
+
+@patch("app.database.APIs.http_client.time.sleep")
+def test_client_errors_are_not_retried(mock_sleep):
+    client = HttpClient(max_retries=3)
+    with patch.object(client.session, 'request', return_value=response(404)) as mock_request:
+        assert client.get('https://api.crossref.org/works').status_code == 404
+    assert mock_request.call_count == 1
+    mock_sleep.assert_not_called()
+
+def test_parse_retry_after():
+    assert parse_retry_after('12') == 12
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+    assert parse_retry_after('soon') is None
+
+def test_token_bucket_paces_requests():
+    clock = [0.0]
+    def sleep(seconds):
+        clock[0] += seconds
+    with patch("app.database.APIs.http_client.time.monotonic", side_effect=lambda: clock[0]), \
+         patch("app.database.APIs.http_client.time.sleep", side_effect=sleep):
+        bucket = TokenBucket(rate=2, capacity=2)
+        for _ in range(6):
+            bucket.acquire()
+        # Two requests fit in the burst, the other four wait half a second each
+        assert clock[0] == pytest.approx(2.0)
+
+        bucket.throttled(retry_after=10)
+        assert bucket.rate == 1
+        bucket.acquire()
+        assert clock[0] >= 12.0
+        for _ in range(40):
+            bucket.succeeded()
+        assert bucket.rate == 2
+
+def test_rate_limits(monkeypatch):
+    monkeypatch.delenv('SEMANTIC_SCHOLAR_API_KEY', raising=False)
+    assert rate_limit_for('arxiv')[0] == pytest.approx(1 / 3)
+    assert rate_limit_for('semantic_scholar')[0] < 1
+    monkeypatch.setenv('SEMANTIC_SCHOLAR_API_KEY', 'key')
+    assert rate_limit_for('semantic_scholar') == (1.0, 1)
+    monkeypatch.setenv('HTTP_RATE_LIMIT_OPENALEX', '4')
+    assert rate_limit_for('openalex') == (4.0, 4)
+    assert get_client('openalex').bucket.max_rate == 4
+
+def test_json_stream_yields_items_across_chunks():
+    body = json.dumps({
+        'meta': {'count': 2},
+        'results': [{'id': 'W1', 'title': 'Café'}, {'id': 'W2', 'cited_by_count': 12345}],
+        'group_by': [],
+    }, ensure_ascii=False).encode()
+    # Chunk boundaries fall inside strings, numbers and multi-byte characters
+    for size in (1, 3, 7, len(body)):
+        page = JsonStream([body[i:i + size] for i in range(0, len(body), size)], 'results')
+        assert list(page) == [{'id': 'W1', 'title': 'Café'}, {'id': 'W2', 'cited_by_count': 12345}]
+        assert page.fields == {'meta': {'count': 2}, 'group_by': []}
+
+def test_json_stream_rejects_truncated_body():
+    page = JsonStream([b'{"results": [{"id": 1}, {"id"'], 'results')
+    with pytest.raises(ValueError):
+        list(page)
@@ -2,6 +2,16 @@ import unittest
 from unittest.mock import patch, MagicMock
 from app.database.APIs.open_alex.open_alex_wrapper import OpenAlexAPIHandler
 import requests
+import json
+
+def json_response(payload, chunk_size=16):
+    """A mocked streamed response whose body is 'payload' as JSON, read in small chunks."""
+    body = json.dumps(payload).encode()
+    response = MagicMock()
+    response.iter_content.side_effect = lambda **kwargs: iter(
+        [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    )
+    return response
 
 class TestOpenAlexAPIHandler(unittest.TestCase):
 
@@ -11,7 +21,7 @@ class TestOpenAlexAPIHandler(unittest.TestCase):
     def test_init(self):
         self.assertIsInstance(self.api_handler, OpenAlexAPIHandler)
 
-    # @patch('app.database.APIs.open_alex.open_alex_wrapper.requests.get')
+    # @patch('app.database.APIs.http_client.HttpClient.get')
     # def test_query_success(self, mock_get):
     #     mock_response = MagicMock()
     #     mock_response.json.return_value = {
@@ -38,11 +48,11 @@ class TestOpenAlexAPIHandler(unittest.TestCase):
     #         timeout=30
     #     )
 
-    @patch('app.database.APIs.open_alex.open_alex_wrapper.requests.get')
+    @patch('app.database.APIs.http_client.HttpClient.get')
     def test_query_multiple_pages(self, mock_get):
         mock_responses = [
-            MagicMock(json=lambda: {'results': [{'id': 1}, {'id': 2}], 'meta': {'next_cursor': 'next_page'}}),
-            MagicMock(json=lambda: {'results': [{'id': 3}], 'meta': {'next_cursor': None}})
+            json_response({'meta': {'next_cursor': 'next_page'}, 'results': [{'id': 1}, {'id': 2}]}),
+            json_response({'meta': {'next_cursor': None}, 'results': [{'id': 3}]})
         ]
         mock_get.side_effect = mock_responses
 
@@ -52,31 +62,27 @@ class TestOpenAlexAPIHandler(unittest.TestCase):
         self.assertEqual([r['id'] for r in results], [1, 2, 3])
         self.assertEqual(mock_get.call_count, 2)
 
-    @patch('app.database.APIs.open_alex.open_alex_wrapper.requests.get')
+    @patch('app.database.APIs.http_client.HttpClient.get')
     def test_query_max_results(self, mock_get):
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_get.return_value = json_response({
             'results': [{'id': i} for i in range(1, 6)],
             'meta': {'next_cursor': 'next_page'}
-        }
-        mock_get.return_value = mock_response
+        })
 
         results = list(self.api_handler.query('test query', max_results=3))
 
         self.assertEqual(len(results), 3)
         self.assertEqual([r['id'] for r in results], [1, 2, 3])
 
-    @patch('app.database.APIs.open_alex.open_alex_wrapper.requests.get')
+    @patch('app.database.APIs.http_client.HttpClient.get')
     def test_query_no_results(self, mock_get):
-        mock_response = MagicMock()
-        mock_response.json.return_value = {'results': [], 'meta': {'next_cursor': None}}
-        mock_get.return_value = mock_response
+        mock_get.return_value = json_response({'results': [], 'meta': {'next_cursor': None}})
 
         results = list(self.api_handler.query('test query'))
 
         self.assertEqual(len(results), 0)
 
-    @patch('app.database.APIs.open_alex.open_alex_wrapper.requests.get')
+    @patch('app.database.APIs.http_client.HttpClient.get')
     def test_query_request_exception(self, mock_get):
         mock_get.side_effect = requests.RequestException("Test error")
 
@@ -86,5 +92,34 @@ class TestOpenAlexAPIHandler(unittest.TestCase):
         self.assertEqual(len(results), 0)
         mock_print.assert_called_once_with("An error occurred: Test error")
 
+    @patch('app.database.APIs.http_client.HttpClient.get')
+    def test_query_select_and_stream(self, mock_get):
+        handler = OpenAlexAPIHandler(select=['id', 'title'])
+        # Paging metadata may come after the results
+        mock_get.side_effect = [
+            json_response({'results': [{'id': 1, 'title': 'A'}], 'meta': {'next_cursor': 'c1'}}),
+            json_response({'results': [], 'meta': {'next_cursor': None}}),
+        ]
+
+        results = list(handler.query('test query'))
+
+        self.assertEqual(results, [{'id': 1, 'title': 'A'}])
+        params = mock_get.call_args_list[0].kwargs['params']
+        self.assertEqual(params['select'], 'id,title')
+        self.assertTrue(mock_get.call_args_list[0].kwargs['stream'])
+        self.assertEqual(mock_get.call_args_list[1].kwargs['params']['cursor'], 'c1')
+
+    @patch('app.database.APIs.http_client.HttpClient.get')
+    def test_harvest_resumes_inside_a_page(self, mock_get):
+        mock_get.side_effect = [
+            json_response({'meta': {'next_cursor': 'c2'}, 'results': [{'id': 1}, {'id': 2}, {'id': 3}]}),
+            json_response({'meta': {'next_cursor': None}, 'results': [{'id': 4}]}),
+        ]
+
+        results = list(self.api_handler.harvest('test query', resume_from=['c1', 2]))
+
+        self.assertEqual(results, [(['c1', 3], {'id': 3}), (['c2', 1], {'id': 4})])
+        self.assertEqual(mock_get.call_args_list[0].kwargs['params']['cursor'], 'c1')
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
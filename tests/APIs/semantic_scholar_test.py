@@ -13,9 +13,9 @@ def handler():
     api_key = os.getenv("SEMANTIC_SCHOLAR_API_KEY")
     return api_handler(api_key=api_key)
 
-@patch("requests.get")
+@patch("app.database.APIs.http_client.HttpClient.get")
 def test_query_with_results(mock_get, handler):
-    # Mock the response from requests.get
+    # Mock the response from the HTTP client
     mock_response = MagicMock()
     mock_response.raise_for_status.return_value = None  # No exception
     mock_response.json.return_value = {
@@ -36,9 +36,9 @@ def test_query_with_results(mock_get, handler):
     assert results[1]["title"] == "Sample Title 2"
     assert results[1]["externalIds"]["DOI"] == "10.1000/xyz124"
 
-@patch("requests.get")
+@patch("app.database.APIs.http_client.HttpClient.get")
 def test_query_no_results(mock_get, handler):
-    # Mock the response from requests.get with no items
+    # Mock the response from the HTTP client with no items
     mock_response = MagicMock()
     mock_response.raise_for_status.return_value = None  # No exception
     mock_response.json.return_value = {
@@ -52,18 +52,18 @@ def test_query_no_results(mock_get, handler):
     # Verify that no results are returned
     assert len(results) == 0
 
-@patch("requests.get")
+@patch("app.database.APIs.http_client.HttpClient.get")
 def test_query_request_exception(mock_get, handler):
-    # Mock the requests.get to raise a RequestException
+    # Mock the HTTP client to raise a RequestException
     mock_get.side_effect = requests.exceptions.RequestException("Request failed")
 
     # Call the query method and verify it handles the exception gracefully
     results = list(handler.query("sample query", max_results=2))
     assert len(results) == 0
 
-@patch("requests.get")
+@patch("app.database.APIs.http_client.HttpClient.get")
 def test_query_with_default_max_results(mock_get, handler):
-    # Mock the response from requests.get
+    # Mock the response from the HTTP client
     mock_response = MagicMock()
     mock_response.raise_for_status.return_value = None  # No exception
     mock_response.json.return_value = {
@@ -81,9 +81,9 @@ def test_query_with_default_max_results(mock_get, handler):
     assert results[0]["title"] == "Sample Title 1"
     assert results[0]["externalIds"]["DOI"] == "10.1000/xyz123"
 
-@patch("requests.get")
+@patch("app.database.APIs.http_client.HttpClient.get")
 def test_query_no_doi(mock_get, handler):
-    # Mock the response from requests.get with an item that has no DOI
+    # Mock the response from the HTTP client with an item that has no DOI
     mock_response = MagicMock()
     mock_response.raise_for_status.return_value = None  # No exception
     mock_response.json.return_value = {
@@ -98,3 +98,81 @@ def test_query_no_doi(mock_get, handler):
 
     # Verify that no results are returned since the item has no DOI
     assert len(results) == 0
+
+def search_page(offset, total, size=100):
+    page = {
+        "total": total,
+        "offset": offset,
+        "data": [{"paperId": f"p{i}", "externalIds": {"DOI": f"10.1/{i}"}} for i in range(offset, min(offset + size, total))]
+    }
+    if offset + size < min(total, 1000):
+        page["next"] = offset + size
+    return page
+
+@patch("app.database.APIs.http_client.HttpClient.get")
+def test_query_pages_through_offsets(mock_get, handler):
+    def reply(url, params, headers):
+        response = MagicMock()
+        response.json.return_value = search_page(params["offset"], 450)
+        return response
+    mock_get.side_effect = reply
+
+    results = list(handler.query("sample query", max_results=420))
+
+    assert len(results) == 420
+    assert results[-1]["paperId"] == "p419"
+    offsets = sorted(call.kwargs["params"]["offset"] for call in mock_get.call_args_list)
+    assert offsets == [0, 100, 200, 300, 400]
+
+@patch("app.database.APIs.http_client.HttpClient.get")
+def test_query_continues_with_bulk_search(mock_get, handler):
+    def reply(url, params, headers):
+        response = MagicMock()
+        if url.endswith("/bulk"):
+            # The bulk endpoint returns papers already seen through relevance search as well
+            if "token" not in params:
+                response.json.return_value = {"token": "t1", "data": [{"paperId": "p0", "externalIds": {"DOI": "10.1/0"}}]}
+            else:
+                response.json.return_value = {"token": None, "data": [{"paperId": "extra", "externalIds": {"DOI": "10.1/x"}}]}
+        else:
+            response.json.return_value = search_page(params["offset"], 5000)
+        return response
+    mock_get.side_effect = reply
+
+    results = list(handler.query("sample query", max_results=2000))
+
+    assert len(results) == 1001
+    assert results[-1]["paperId"] == "extra"
+
+@patch("app.database.APIs.http_client.HttpClient.get")
+def test_harvest_resumes_from_offset_and_bulk_token(mock_get, handler):
+    def reply(url, params, headers):
+        response = MagicMock()
+        if url.endswith("/bulk"):
+            response.json.return_value = {"token": None, "data": [{"paperId": f"b{i}", "externalIds": {"DOI": f"10.2/{i}"}} for i in range(3)]}
+        else:
+            response.json.return_value = search_page(params["offset"], 250)
+        return response
+    mock_get.side_effect = reply
+
+    results = list(handler.harvest("sample query", max_results=1000, resume_from=["search", 240]))
+    assert [position for position, _ in results] == [["search", n] for n in range(241, 251)]
+    assert mock_get.call_args_list[0].kwargs["params"]["offset"] == 240
+
+    results = list(handler.harvest("sample query", resume_from=["bulk", "t1", 1]))
+    assert [(position, paper["paperId"]) for position, paper in results] == [(["bulk", "t1", 2], "b1"), (["bulk", "t1", 3], "b2")]
+    assert mock_get.call_args.kwargs["params"]["token"] == "t1"
+
+@patch("app.database.APIs.http_client.HttpClient.post")
+def test_batch_lookup(mock_post, handler):
+    mock_response = MagicMock()
+    mock_response.json.return_value = [{"paperId": "a", "citationCount": 3}, None]
+    mock_post.return_value = mock_response
+
+    results = list(handler.batch([f"10.1/{i}" for i in range(502)]))
+
+    # 500 ids per request; each response lists one paper or null per id
+    assert mock_post.call_count == 2
+    assert len(mock_post.call_args_list[0].kwargs["json"]["ids"]) == 500
+    assert mock_post.call_args_list[1].kwargs["json"]["ids"] == ["DOI:10.1/500", "DOI:10.1/501"]
+    assert results == [("10.1/0", {"paperId": "a", "citationCount": 3}), ("10.1/500", {"paperId": "a", "citationCount": 3})]
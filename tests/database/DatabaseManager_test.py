@@ -1,7 +1,8 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from app.database.DatabaseManager import DatabaseManager
+from app.database.DatabaseManager import DatabaseManager, upsert_statement, placeholder_condition
 import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_INERROR, TRANSACTION_STATUS_INTRANS
 
 @pytest.fixture
 def db_manager():
@@ -67,6 +68,33 @@ def test_insert_paper(db_manager):
     assert paper_id == 1
     db_manager.cursor.execute.assert_called_once()
 
+def test_upsert_statement_is_cached_per_shape():
+    statement = upsert_statement('papers', ('openalex_id', 'title', 'doi'), 'doi')
+    assert upsert_statement('papers', ('openalex_id', 'title', 'doi'), 'doi') is statement
+    assert upsert_statement('papers', ('openalex_id', 'title', 'doi'), 'openalex_id') is not statement
+
+def test_insert_paper_prepares_recurring_shape(db_manager):
+    db_manager.cursor.fetchone.return_value = [1]
+    for _ in range(3):
+        db_manager.insert_paper(openalex_id='P1', title='T', doi='10.1/x', publication_year=2021)
+    statement = upsert_statement('papers', ('openalex_id', 'title', 'doi', 'publication_year'), 'doi')
+    queries = [call[0][0] for call in db_manager.cursor.execute.call_args_list]
+    # Planned ad hoc the first time, PREPAREd once on reuse, then only EXECUTEd
+    assert queries == [statement.query, statement.prepare, statement.execute, statement.execute]
+
+def test_compressed_abstract_is_not_a_placeholder(db_manager):
+    # Compaction leaves papers.abstract NULL; enrichment must not write the text back inline
+    assert db_manager.update_placeholder_fields(1, {'abstract': 'Inline again', 'total_citations': 3}) is True
+    query, params = db_manager.cursor.execute.call_args[0]
+    abstract_clause, citations_clause = query.rsplit('WHERE', 1)[0].split('END,')
+    assert "NOT EXISTS (SELECT 1 FROM paper_abstracts WHERE paper_abstracts.paper_id = papers.id)" in abstract_clause
+    assert "paper_abstracts" not in citations_clause
+    assert params == ['Inline again', 3, 1]
+
+    # Upserts and the bulk loader share the condition
+    assert "paper_abstracts" in placeholder_condition('papers', 'abstract')
+    assert "paper_abstracts" not in placeholder_condition('papers', 'title')
+
 def test_insert_paper_author(db_manager):
     db_manager.insert_paper_author(paper_id=1, author_id=1)
     db_manager.cursor.execute.assert_called_once()
@@ -93,11 +121,148 @@ def test_insert_concept(db_manager):
     db_manager.cursor.execute.assert_called_once()
 
 def test_insert_paper_concept(db_manager):
-    db_manager.cursor.fetchone.return_value = None
     db_manager.insert_paper_concept(paper_id=1, concept_id=1, score=0.95)
-    assert db_manager.cursor.execute.call_count == 2
+    # A single upsert replaces the old SELECT-then-INSERT/UPDATE round trips
+    db_manager.cursor.execute.assert_called_once()
+    query, params = db_manager.cursor.execute.call_args[0]
+    assert "ON CONFLICT (paper_id, concept_id)" in query
+    assert params == (1, 1, 0.95)
+
+def test_upsert_paper_concepts(db_manager):
+    db_manager.cursor.connection.encoding = "UTF8"
+    db_manager.cursor.mogrify.side_effect = lambda template, args: repr(args).encode()
+    db_manager.upsert_paper_concepts([(1, 1, None), (1, 1, 0.5), (1, 2, 0.7), (None, 3, 0.1)])
+    # One statement for the whole batch, duplicates collapsed and incomplete rows dropped
+    db_manager.cursor.execute.assert_called_once()
+    query = db_manager.cursor.execute.call_args[0][0]
+    assert b"(1, 1, 0.5),(1, 2, 0.7)" in query
+    assert b"ON CONFLICT (paper_id, concept_id)" in query
+
+def test_upsert_paper_concepts_empty(db_manager):
+    db_manager.upsert_paper_concepts([])
+    db_manager.cursor.execute.assert_not_called()
+
+def test_copy_pending_citations(db_manager):
+    copied = db_manager.copy_pending_citations([(1, 'W10'), (1, 'W11'), (None, 'W12'), (2, '')])
+    assert copied == 2
+    statement, buffer = db_manager.cursor.copy_expert.call_args[0]
+    assert statement.startswith("COPY citation_edges_staging")
+    assert buffer.getvalue() == "1\tW10\n1\tW11\n"
+    assert "INSERT INTO pending_citations" in db_manager.cursor.execute.call_args[0][0]
+
+def test_copy_pending_citations_empty(db_manager):
+    assert db_manager.copy_pending_citations([]) == 0
+    db_manager.cursor.copy_expert.assert_not_called()
+
+def test_resolve_pending_citations(db_manager):
+    db_manager.cursor.rowcount = 3
+    assert db_manager.resolve_pending_citations() == 3
+    query = db_manager.cursor.execute.call_args[0][0]
+    assert "DELETE FROM pending_citations" in query
+    assert "ON CONFLICT (paper_id, citing_paper_id) DO NOTHING" in query
+
+def test_commit_batch(db_manager):
+    db_manager.connection.autocommit = False
+    db_manager.connection.info.transaction_status = TRANSACTION_STATUS_INTRANS
+    assert db_manager.commit_batch() is True
+    db_manager.connection.commit.assert_called_once()
+    db_manager.connection.rollback.assert_not_called()
+
+def test_commit_batch_rolls_back_failed_batch(db_manager):
+    db_manager.connection.autocommit = False
+    db_manager.connection.info.transaction_status = TRANSACTION_STATUS_INERROR
+    assert db_manager.commit_batch() is False
+    db_manager.connection.commit.assert_not_called()
+    db_manager.connection.rollback.assert_called_once()
+
+def test_commit_batch_autocommit(db_manager):
+    db_manager.connection.autocommit = True
+    assert db_manager.commit_batch() is True
+    db_manager.connection.commit.assert_not_called()
+
+def test_savepoint(db_manager):
+    db_manager.connection.autocommit = False
+    db_manager.savepoint()
+    db_manager.release_savepoint()
+    db_manager.savepoint()
+    db_manager.rollback_to_savepoint()
+    assert [c.args[0] for c in db_manager.cursor.execute.call_args_list] == [
+        "SAVEPOINT paper", "RELEASE SAVEPOINT paper",
+        "SAVEPOINT paper", "ROLLBACK TO SAVEPOINT paper", "RELEASE SAVEPOINT paper"]
+    db_manager.connection.rollback.assert_not_called()
+
+def test_batch_failed(db_manager):
+    db_manager.connection.autocommit = False
+    db_manager.connection.info.transaction_status = TRANSACTION_STATUS_INTRANS
+    assert db_manager.batch_failed() is False
+    db_manager.connection.info.transaction_status = TRANSACTION_STATUS_INERROR
+    assert db_manager.batch_failed() is True
+
+def test_savepoint_autocommit(db_manager):
+    db_manager.connection.autocommit = True
+    db_manager.savepoint()
+    db_manager.release_savepoint()
+    db_manager.rollback_to_savepoint()
+    db_manager.cursor.execute.assert_not_called()
+    assert db_manager.batch_failed() is False
+
+def test_refresh_paper_features(db_manager):
+    db_manager.connection.autocommit = False
+    assert db_manager.refresh_paper_features() is True
+    executed = [c.args[0] for c in db_manager.cursor.execute.call_args_list]
+    assert executed[0] == "REFRESH MATERIALIZED VIEW CONCURRENTLY paper_features"
+    assert "INSERT INTO view_refreshes" in executed[1]
+    db_manager.connection.commit.assert_called_once()
+
+def test_refresh_paper_features_error(db_manager):
+    db_manager.connection.autocommit = False
+    db_manager.cursor.execute.side_effect = psycopg2.Error("relation does not exist")
+    assert db_manager.refresh_paper_features() is False
+    db_manager.connection.rollback.assert_called_once()
+
+def test_connection_borrowed_from_pool():
+    pool = MagicMock(closed=False)
+    with patch.object(DatabaseManager, "pool", pool):
+        db_manager = DatabaseManager()
+        assert db_manager.connection is pool.getconn.return_value
+        db_manager.close()
+    pool.putconn.assert_called_once_with(pool.getconn.return_value)
+    pool.getconn.return_value.close.assert_not_called()
 
 def test_close_connection(db_manager):
     db_manager.close()
     db_manager.cursor.close.assert_called_once()
     db_manager.connection.close.assert_called_once()
+
+def test_enqueue_job(db_manager):
+    db_manager.cursor.fetchone.return_value = (12,)
+    assert db_manager.enqueue_job('ingest', {'query': 'graphene'}, 'admin@tamu.edu') == 12
+    args = db_manager.cursor.execute.call_args[0][1]
+    assert args == ('ingest', '{"query": "graphene"}', 'admin@tamu.edu', False, 'ingest')
+
+def test_enqueue_job_unless_queued(db_manager):
+    # The INSERT ... SELECT returns no row while a job of the kind is still queued
+    db_manager.cursor.fetchone.return_value = None
+    assert db_manager.enqueue_job('snapshot', unless_queued=True) is None
+    query, args = db_manager.cursor.execute.call_args[0]
+    assert "NOT EXISTS (SELECT 1 FROM jobs WHERE kind = %s AND status = 'queued')" in query
+    assert args[3:] == (True, 'snapshot')
+
+def test_claim_job(db_manager):
+    db_manager.connection.autocommit = True
+    db_manager.cursor.fetchone.return_value = (12, 'ingest', '{"query": "graphene"}')
+    assert db_manager.claim_job('worker-1', ['ingest']) == (12, 'ingest', {'query': 'graphene'})
+    query = db_manager.cursor.execute.call_args[0][0]
+    assert "FOR UPDATE SKIP LOCKED" in query
+
+    db_manager.cursor.fetchone.return_value = None
+    assert db_manager.claim_job('worker-1') is None
+
+@patch('app.database.DatabaseManager.execute_values')
+def test_store_compressed_abstracts(mock_execute_values, db_manager):
+    assert db_manager.store_compressed_abstracts([(3, 1, b'\x01\x02'), (8, 1, b'\x03')]) == 2
+    rows = mock_execute_values.call_args[0][2]
+    assert [(paper_id, dictionary_id, body.adapted) for paper_id, dictionary_id, body in rows] == [(3, 1, b'\x01\x02'), (8, 1, b'\x03')]
+    db_manager.cursor.execute.assert_called_once_with("UPDATE papers SET abstract = NULL WHERE id = ANY(%s)", ([3, 8],))
+
+    assert db_manager.store_compressed_abstracts([]) == 0
@@ -10,6 +10,8 @@ def arxiv_wrapper():
          patch.object(api_handler, "__init__", lambda x: None):
         wrapper = ArxivDbWrapper()
         wrapper.db_manager = MagicMock(spec=DatabaseManager)
+        wrapper.db_manager.batch_failed.return_value = False
+        wrapper.db_manager.get_harvest_checkpoint.return_value = None
         wrapper.api_handler = MagicMock(spec=api_handler)
         return wrapper
 
@@ -39,12 +41,12 @@ def test_query_and_store_paper(arxiv_wrapper):
     
     mock_result.categories = ["Category1", "Category2"]
     
-    arxiv_wrapper.api_handler.query.return_value = [mock_result]
+    arxiv_wrapper.api_handler.harvest.return_value = [(None, mock_result)]
     arxiv_wrapper.db_manager.insert_paper.return_value = 1
     arxiv_wrapper.db_manager.insert_author.return_value = 2
     arxiv_wrapper.db_manager.insert_concept.return_value = 3
     arxiv_wrapper.db_manager.insert_paper_author.return_value = None
-    arxiv_wrapper.db_manager.insert_paper_concept.return_value = None
+    arxiv_wrapper.db_manager.upsert_paper_concepts.return_value = None
     
     with patch.object(arxiv_wrapper.db_manager, 'insert_author', wraps=arxiv_wrapper.db_manager.insert_author) as mock_insert_author:
         with patch.object(arxiv_wrapper.db_manager, 'insert_paper_author', wraps=arxiv_wrapper.db_manager.insert_paper_author) as mock_insert_paper_author:
@@ -55,7 +57,7 @@ def test_query_and_store_paper(arxiv_wrapper):
             assert mock_insert_author.call_count == len(mock_result.authors)
             assert arxiv_wrapper.db_manager.insert_concept.call_count == len(mock_result.categories)
             assert mock_insert_paper_author.call_count == len(mock_result.authors)
-            assert arxiv_wrapper.db_manager.insert_paper_concept.call_count == len(mock_result.categories)
+            arxiv_wrapper.db_manager.upsert_paper_concepts.assert_called_once_with([(1, 3, None)] * len(mock_result.categories))
 
 def test_query_and_store_with_missing_data(arxiv_wrapper):
     mock_result = MagicMock()
@@ -72,7 +74,7 @@ def test_query_and_store_with_missing_data(arxiv_wrapper):
     mock_result.authors = [author]  # Missing author name
     mock_result.categories = []  # No categories
     
-    arxiv_wrapper.api_handler.query.return_value = [mock_result]
+    arxiv_wrapper.api_handler.harvest.return_value = [(None, mock_result)]
     arxiv_wrapper.db_manager.insert_paper.return_value = None  # Paper insertion fails
     
     arxiv_wrapper.query_and_store(query="artificial intelligence", max_results=1)
@@ -83,10 +85,10 @@ def test_query_and_store_with_missing_data(arxiv_wrapper):
     arxiv_wrapper.db_manager.insert_author.assert_not_called()
     arxiv_wrapper.db_manager.insert_concept.assert_not_called()
     arxiv_wrapper.db_manager.insert_paper_author.assert_not_called()
-    arxiv_wrapper.db_manager.insert_paper_concept.assert_not_called()
+    arxiv_wrapper.db_manager.upsert_paper_concepts.assert_not_called()
 
 def test_query_and_store_exception_handling(arxiv_wrapper):
-    arxiv_wrapper.api_handler.query.side_effect = Exception("API Error")
+    arxiv_wrapper.api_handler.harvest.side_effect = Exception("API Error")
     
     arxiv_wrapper.query_and_store(query="quantum computing", max_results=1)
     
@@ -95,7 +97,7 @@ def test_query_and_store_exception_handling(arxiv_wrapper):
     arxiv_wrapper.db_manager.insert_author.assert_not_called()
     arxiv_wrapper.db_manager.insert_concept.assert_not_called()
     arxiv_wrapper.db_manager.insert_paper_author.assert_not_called()
-    arxiv_wrapper.db_manager.insert_paper_concept.assert_not_called()
+    arxiv_wrapper.db_manager.upsert_paper_concepts.assert_not_called()
 
 def test_generate_openalex_id_uniqueness(arxiv_wrapper):
     prefix = "ARXIV_CONCEPT_"
@@ -109,3 +111,76 @@ def test_db_manager_close(arxiv_wrapper):
     arxiv_wrapper.db_manager.close = MagicMock()
     arxiv_wrapper.query_and_store(query="deep learning", max_results=1)
     arxiv_wrapper.db_manager.close.assert_called_once()
+
+def test_query_and_store_rolls_back_failed_paper(arxiv_wrapper):
+    mock_result = MagicMock()
+    mock_result.title = "Broken Paper"
+    arxiv_wrapper.api_handler.harvest.return_value = [(None, mock_result)]
+    arxiv_wrapper.db_manager.insert_paper.side_effect = Exception("Unexpected error")
+
+    arxiv_wrapper.query_and_store(query="machine learning", max_results=1)
+
+    # The failed paper is undone instead of committed half-written. It is alone in its
+    # transaction, so no savepoint is needed to roll back only this paper
+    arxiv_wrapper.db_manager.set_autocommit.assert_called_once_with(False)
+    arxiv_wrapper.db_manager.rollback_batch.assert_called_once()
+    arxiv_wrapper.db_manager.savepoint.assert_not_called()
+    arxiv_wrapper.db_manager.close.assert_called_once()
+
+def test_query_and_store_keeps_papers_before_failed_paper(arxiv_wrapper):
+    results = []
+    for i in range(3):
+        result = MagicMock()
+        result.title = f"Paper {i}"
+        result.authors = []
+        result.categories = []
+        results.append((None, result))
+    arxiv_wrapper.api_handler.harvest.return_value = results
+    arxiv_wrapper.batch_size = 3
+    arxiv_wrapper.db_manager.insert_paper.side_effect = [1, Exception("Unexpected error"), 3]
+
+    stored = arxiv_wrapper.query_and_store(query="machine learning", max_results=3)
+
+    # Papers 0 and 2 are committed with the batch; paper 1 is rolled back to its savepoint.
+    # Paper 0 is written first, so it needs no savepoint
+    assert stored['inserted'] == 2
+    assert arxiv_wrapper.db_manager.savepoint.call_count == 2
+    arxiv_wrapper.db_manager.rollback_to_savepoint.assert_called_once()
+    arxiv_wrapper.db_manager.release_savepoint.assert_called_once()
+    arxiv_wrapper.db_manager.rollback_batch.assert_not_called()
+
+def test_query_and_store_rolls_back_paper_whose_statement_failed(arxiv_wrapper):
+    results = []
+    for i in range(2):
+        result = MagicMock()
+        result.title = f"Paper {i}"
+        result.authors = []
+        result.categories = []
+        results.append((None, result))
+    arxiv_wrapper.api_handler.harvest.return_value = results
+    arxiv_wrapper.batch_size = 2
+    # insert_paper prints and swallows its error, leaving the transaction failed
+    arxiv_wrapper.db_manager.batch_failed.side_effect = [False, True]
+
+    stored = arxiv_wrapper.query_and_store(query="machine learning", max_results=2)
+
+    assert stored['inserted'] == 1
+    arxiv_wrapper.db_manager.rollback_to_savepoint.assert_called_once()
+    arxiv_wrapper.db_manager.release_savepoint.assert_not_called()
+
+def test_query_and_store_commits_in_batches(arxiv_wrapper):
+    arxiv_wrapper.batch_size = 2
+    results = []
+    for i in range(5):
+        result = MagicMock()
+        result.title = f"Paper {i}"
+        result.authors = []
+        result.categories = []
+        results.append(result)
+    arxiv_wrapper.api_handler.harvest.return_value = [(None, result) for result in results]
+    arxiv_wrapper.db_manager.insert_paper.return_value = 1
+
+    arxiv_wrapper.query_and_store(query="machine learning", max_results=5)
+
+    # Two full batches plus the final partial batch, then the last checkpoint and the finished harvest
+    assert arxiv_wrapper.db_manager.commit_batch.call_count == 5
@@ -0,0 +1,86 @@
+import gzip
+import json
+from unittest.mock import MagicMock, patch
+from app.database import bulk_load
+from app.database.bulk_load import parse_works, find_partitions, load_partition, CHECKPOINT_SOURCE
+
+def make_work(number, **fields):
+    work = {
+        'id': f'https://openalex.org/W{number}',
+        'doi': f'https://doi.org/10.1000/{number}',
+        'title': f'Work {number}',
+        'publication_year': 2020,
+        'cited_by_count': 4,
+        'abstract_inverted_index': {'Snapshot': [0], 'works': [1]},
+        'referenced_works': ['https://openalex.org/W1', 'https://openalex.org/W2'],
+        'primary_location': {'pdf_url': None},
+        'authorships': [{'author': {'id': 'https://openalex.org/A1', 'display_name': 'Ada Lovelace'}}],
+        'concepts': [{'id': 'https://openalex.org/C1', 'display_name': 'Physics', 'score': 0.8}],
+    }
+    work.update(fields)
+    return json.dumps(work)
+
+def write_partition(path, works):
+    with gzip.open(path, 'wt', encoding='utf-8') as file:
+        file.write('\n'.join(works) + '\n')
+
+def test_parse_works_uses_the_wrapper_mapping():
+    rows = parse_works([make_work(7), ''])
+
+    assert rows['works'] == [('W7', 'https://doi.org/10.1000/7', 'Work 7', 'Snapshot works', 2020, 4, 2, None)]
+    assert rows['authorships'] == [('W7', 'https://openalex.org/A1', 'Ada Lovelace')]
+    assert rows['concepts'] == [('W7', 'https://openalex.org/C1', 'Physics', 0.8)]
+    assert rows['references'] == [('W7', 'W1'), ('W7', 'W2')]
+    assert rows['skipped'] == 0
+
+def test_parse_works_skips_works_that_would_not_insert():
+    rows = parse_works([make_work(1, title=None), make_work(2, doi='10.1/' + 'x' * 300), make_work(3, id=None)])
+
+    assert rows['works'] == []
+    assert rows['authorships'] == []
+    assert rows['skipped'] == 3
+
+def test_find_partitions_walks_the_snapshot_in_order(tmp_path):
+    for name in ['updated_date=2024-02-01/part_001.gz', 'updated_date=2024-01-01/part_000.gz']:
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        write_partition(tmp_path / name, [make_work(1)])
+    (tmp_path / 'manifest').write_text('{}')
+
+    partitions = find_partitions(str(tmp_path))
+
+    assert [partition for _, partition in partitions] == [
+        'updated_date=2024-01-01/part_000.gz', 'updated_date=2024-02-01/part_001.gz'
+    ]
+    assert find_partitions(partitions[0][0]) == [(partitions[0][0], 'part_000.gz')]
+
+@patch('app.database.bulk_load.load_chunk')
+@patch('app.database.bulk_load.DatabaseManager')
+def test_load_partition_resumes_after_the_last_chunk(mock_db_manager, mock_load_chunk, tmp_path):
+    path = tmp_path / 'part_000.gz'
+    write_partition(path, [make_work(number) for number in range(1, 6)])
+    db_manager = mock_db_manager.return_value
+    # Two lines of the partition were loaded by an earlier run
+    db_manager.get_harvest_checkpoint.return_value = ('2', 2, False)
+
+    stats = load_partition(str(path), 'part_000.gz', chunk_size=2)
+
+    chunks = [call.args for call in mock_load_chunk.call_args_list]
+    assert [[work[0] for work in rows['works']] for _, rows, _, _, _ in chunks] == [['W3', 'W4'], ['W5']]
+    assert [(position, records) for _, _, _, position, records in chunks] == [(4, 4), (5, 5)]
+    db_manager.set_harvest_checkpoint.assert_called_with(CHECKPOINT_SOURCE, 'part_000.gz', '5', 5, exhausted=True)
+    db_manager.close.assert_called_once()
+    assert stats['works'] == 3
+
+@patch('app.database.bulk_load.DatabaseManager')
+def test_load_chunk_retries_a_deadlocked_merge(mock_db_manager):
+    db_manager = mock_db_manager.return_value
+    deadlock = bulk_load.psycopg2.errors.DeadlockDetected()
+    db_manager.cursor.execute.side_effect = [None, None, deadlock, None, None]
+    db_manager.commit_batch.return_value = True
+    rows = parse_works([make_work(1)])
+
+    bulk_load.load_chunk(db_manager, rows, 'part_000.gz', 1, 1)
+
+    db_manager.rollback_batch.assert_called_once()
+    db_manager.set_harvest_checkpoint.assert_called_once_with(CHECKPOINT_SOURCE, 'part_000.gz', '1', 1)
+    assert db_manager.copy_rows.call_count == 4
@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import MagicMock
+from app.database.abstracts import AbstractDecoder, train_dictionary, compress_abstract, decompress_abstract
+from app.database.compress_abstracts import compress_abstracts, inline_abstracts
+
+ABSTRACTS = [
+    "In this paper we propose a graph neural network for molecular property prediction and show "
+    "that it outperforms state of the art methods on several benchmark datasets.",
+    "In this paper we propose a transformer model for protein structure prediction and show "
+    "that it outperforms state of the art methods on the CASP benchmark.",
+    "We study the convergence of stochastic gradient descent for non-convex objectives "
+    "and derive new bounds on its sample complexity.",
+]
+
+def test_compress_round_trip():
+    dictionary = train_dictionary(ABSTRACTS[:2])
+    for abstract in ABSTRACTS + ["", "Ünïcödé abstract ∑"]:
+        assert decompress_abstract(compress_abstract(abstract, dictionary), dictionary) == abstract
+
+def test_dictionary_shrinks_abstracts_like_its_samples():
+    dictionary = train_dictionary(ABSTRACTS[:1])
+    abstract = ABSTRACTS[1]
+    with_dictionary = len(compress_abstract(abstract, dictionary))
+    without_dictionary = len(compress_abstract(abstract, b''))
+    assert with_dictionary < without_dictionary < len(abstract.encode('utf-8'))
+
+def test_train_dictionary_keeps_the_last_bytes():
+    dictionary = train_dictionary(['a' * 10, None, 'b' * 10], size=8)
+    assert dictionary == b'b' * 8
+    assert train_dictionary([]) == b''
+
+def test_decoder_prefers_inline_abstracts_and_caches_dictionaries():
+    dictionary = train_dictionary(ABSTRACTS)
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = (memoryview(dictionary),)
+    decoder = AbstractDecoder(connection)
+    bodies = [memoryview(compress_abstract(abstract, dictionary)) for abstract in ABSTRACTS]
+
+    assert decoder.decode("newer inline abstract", 1, bodies[0]) == "newer inline abstract"
+    assert decoder.decode(None, None, None) is None
+    assert [decoder.decode(None, 1, body) for body in bodies] == ABSTRACTS
+    cursor.execute.assert_called_once_with("SELECT dictionary FROM abstract_dictionaries WHERE id = %s", (1,))
+
+    cursor.fetchone.return_value = None
+    with pytest.raises(LookupError):
+        decoder.decode('', 2, bodies[0])
+    # The missing dictionary is not looked up again
+    with pytest.raises(LookupError):
+        decoder.decode('', 2, bodies[1])
+    assert cursor.execute.call_count == 2
+
+def test_compress_abstracts_trains_a_dictionary_and_moves_batches():
+    db_manager = MagicMock()
+    db_manager.get_abstract_dictionary.return_value = None
+    db_manager.get_abstract_samples.return_value = ABSTRACTS
+    db_manager.save_abstract_dictionary.return_value = 3
+    db_manager.get_inline_abstracts.side_effect = [[(1, ABSTRACTS[0]), (2, ABSTRACTS[1])], [(5, ABSTRACTS[2])], []]
+    db_manager.commit_batch.return_value = True
+
+    stats = compress_abstracts(db_manager, batch_size=2)
+
+    dictionary = db_manager.save_abstract_dictionary.call_args.args[0]
+    assert dictionary == train_dictionary(ABSTRACTS)
+    assert [c.args for c in db_manager.get_inline_abstracts.call_args_list] == [(0, 2), (2, 2), (5, 2)]
+    stored = [row for c in db_manager.store_compressed_abstracts.call_args_list for row in c.args[0]]
+    assert [(paper_id, dictionary_id) for paper_id, dictionary_id, _ in stored] == [(1, 3), (2, 3), (5, 3)]
+    assert [decompress_abstract(body, dictionary) for _, _, body in stored] == ABSTRACTS
+    assert stats['compressed'] == 3
+    assert stats['dictionary_id'] == 3
+    assert stats['compressed_bytes'] < stats['inline_bytes']
+    db_manager.set_autocommit.assert_called_with(True)
+
+def test_compress_abstracts_uses_the_newest_dictionary():
+    db_manager = MagicMock()
+    dictionary = train_dictionary(ABSTRACTS)
+    db_manager.get_abstract_dictionary.return_value = (7, dictionary)
+    db_manager.get_inline_abstracts.side_effect = [[(4, ABSTRACTS[0])], []]
+    db_manager.commit_batch.return_value = False
+
+    stats = compress_abstracts(db_manager)
+
+    db_manager.save_abstract_dictionary.assert_not_called()
+    assert db_manager.store_compressed_abstracts.call_args.args[0][0][:2] == (4, 7)
+    # A batch that failed to commit stays inline
+    assert stats['compressed'] == 0
+
+def test_compress_abstracts_without_abstracts():
+    db_manager = MagicMock()
+    db_manager.get_abstract_dictionary.return_value = None
+    db_manager.get_abstract_samples.return_value = []
+
+    assert compress_abstracts(db_manager)['compressed'] == 0
+    db_manager.save_abstract_dictionary.assert_not_called()
+    db_manager.get_inline_abstracts.assert_not_called()
+
+def test_inline_abstracts_restores_text():
+    dictionary = train_dictionary(ABSTRACTS)
+    db_manager = MagicMock()
+    cursor = db_manager.connection.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = (dictionary,)
+    db_manager.get_compressed_abstracts.side_effect = [
+        [(1, 1, compress_abstract(ABSTRACTS[0], dictionary)), (2, 1, compress_abstract(ABSTRACTS[1], dictionary))],
+        [],
+    ]
+    db_manager.commit_batch.return_value = True
+
+    assert inline_abstracts(db_manager)['inlined'] == 2
+    db_manager.restore_inline_abstracts.assert_called_once_with([(1, ABSTRACTS[0]), (2, ABSTRACTS[1])])
@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import patch, MagicMock
 from app.database.crossref_db_wrapper import CrossRefDbWrapper
 from app.database.DatabaseManager import DatabaseManager
+from app.database.dedup import DedupFilter
 from app.database.APIs.crossref.crossref_wrapper import api_handler
 
 @pytest.fixture
@@ -10,6 +11,8 @@ def crossref_wrapper():
          patch.object(api_handler, "__init__", lambda x: None):
         wrapper = CrossRefDbWrapper()
         wrapper.db_manager = MagicMock(spec=DatabaseManager)
+        wrapper.db_manager.batch_failed.return_value = False
+        wrapper.db_manager.get_harvest_checkpoint.return_value = None
         wrapper.api_handler = MagicMock(spec=api_handler)
         return wrapper
 
@@ -31,12 +34,12 @@ def test_query_and_store_paper(crossref_wrapper):
         "subject": ["Category1", "Category2"]
     }
 
-    crossref_wrapper.api_handler.query.return_value = [mock_result]
+    crossref_wrapper.api_handler.harvest.return_value = [(None, mock_result)]
     crossref_wrapper.db_manager.insert_paper.return_value = 1
     crossref_wrapper.db_manager.insert_author.return_value = 2
     crossref_wrapper.db_manager.insert_concept.return_value = 3
     crossref_wrapper.db_manager.insert_paper_author.return_value = None
-    crossref_wrapper.db_manager.insert_paper_concept.return_value = None
+    crossref_wrapper.db_manager.upsert_paper_concepts.return_value = None
 
     with patch.object(crossref_wrapper.db_manager, 'insert_author', wraps=crossref_wrapper.db_manager.insert_author) as mock_insert_author:
         with patch.object(crossref_wrapper.db_manager, 'insert_paper_author', wraps=crossref_wrapper.db_manager.insert_paper_author) as mock_insert_paper_author:
@@ -47,7 +50,7 @@ def test_query_and_store_paper(crossref_wrapper):
             assert mock_insert_author.call_count == len(mock_result['author'])
             assert crossref_wrapper.db_manager.insert_concept.call_count == len(mock_result['subject'])
             assert mock_insert_paper_author.call_count == len(mock_result['author'])
-            assert crossref_wrapper.db_manager.insert_paper_concept.call_count == len(mock_result['subject'])
+            crossref_wrapper.db_manager.upsert_paper_concepts.assert_called_once_with([(1, 3, None)] * len(mock_result['subject']))
 
 # def test_query_and_store_with_missing_data(crossref_wrapper):
 #     mock_result = {
@@ -75,7 +78,7 @@ def test_query_and_store_paper(crossref_wrapper):
 #     crossref_wrapper.db_manager.insert_paper_concept.assert_not_called()
 
 def test_query_and_store_exception_handling(crossref_wrapper):
-    crossref_wrapper.api_handler.query.side_effect = Exception("API Error")
+    crossref_wrapper.api_handler.harvest.side_effect = Exception("API Error")
 
     crossref_wrapper.query_and_store(query="quantum computing", max_results=1)
 
@@ -84,7 +87,7 @@ def test_query_and_store_exception_handling(crossref_wrapper):
     crossref_wrapper.db_manager.insert_author.assert_not_called()
     crossref_wrapper.db_manager.insert_concept.assert_not_called()
     crossref_wrapper.db_manager.insert_paper_author.assert_not_called()
-    crossref_wrapper.db_manager.insert_paper_concept.assert_not_called()
+    crossref_wrapper.db_manager.upsert_paper_concepts.assert_not_called()
 
 def test_generate_openalex_id_uniqueness(crossref_wrapper):
     prefix = "CROSSREF_CONCEPT_"
@@ -125,3 +128,37 @@ def test_db_manager_close(crossref_wrapper):
     crossref_wrapper.db_manager.close = MagicMock()
     crossref_wrapper.query_and_store(query="deep learning", max_results=1)
     crossref_wrapper.db_manager.close.assert_called_once()
+
+def test_query_and_store_skips_completed_harvest(crossref_wrapper):
+    crossref_wrapper.db_manager.get_harvest_checkpoint.return_value = ('50', 50, True)
+
+    stats = crossref_wrapper.query_and_store(query="machine learning", max_results=100)
+
+    assert stats['skipped']
+    crossref_wrapper.api_handler.harvest.assert_not_called()
+
+def test_query_and_store_resumes_and_checkpoints(crossref_wrapper):
+    crossref_wrapper.db_manager.get_harvest_checkpoint.return_value = ('40', 40, False)
+    crossref_wrapper.api_handler.harvest.return_value = [(41, {"DOI": "10.1/a"}), (42, {"DOI": "10.1/b"})]
+    crossref_wrapper.db_manager.insert_paper.return_value = 1
+
+    crossref_wrapper.query_and_store(query="machine learning", max_results=100)
+
+    crossref_wrapper.api_handler.harvest.assert_called_once_with("machine learning", max_results=60, resume_from=40)
+    # The source ran out before max_results, so later runs skip this query
+    crossref_wrapper.db_manager.set_harvest_checkpoint.assert_called_with('crossref', "machine learning", '42', 42, True)
+
+def test_write_batch_skips_papers_the_dedup_filter_has_seen(crossref_wrapper):
+    crossref_wrapper.dedup = DedupFilter(capacity=1000)
+    crossref_wrapper.db_manager.insert_paper.return_value = 1
+    crossref_wrapper.db_manager.commit_batch.return_value = True
+    work = {"DOI": "10.1/a", "title": ["Sample Paper"], "author": [], "subject": []}
+
+    assert crossref_wrapper.write_batch([work]) == 1
+    # The same work again, from this or another source, is not written
+    assert crossref_wrapper.write_batch([dict(work)]) == 0
+    assert crossref_wrapper.db_manager.insert_paper.call_count == 1
+    assert crossref_wrapper.deduplicated == 1
+    # An abstract the stored paper lacks is written
+    crossref_wrapper.write_batch([dict(work, abstract="New abstract")])
+    assert crossref_wrapper.db_manager.insert_paper.call_count == 2
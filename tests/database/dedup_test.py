@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock
+from app.database.dedup import BloomFilter, DedupFilter, record_keys, normalize_doi
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    keys = [f"doi:10.1/{i}" for i in range(10000)]
+    bloom.update(keys)
+
+    assert all(key in bloom for key in keys)
+    assert bloom.contains_all(keys)
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    bloom.update(f"doi:10.1/{i}" for i in range(10000))
+
+    false_positives = sum(f"doi:10.2/{i}" in bloom for i in range(10000))
+    assert false_positives < 200
+    # About 9.6 bits per key at 1%
+    assert bloom.nbytes < 13000
+
+def test_record_keys_use_normalized_doi_and_filled_fields():
+    keys = record_keys('https://doi.org/10.1/ABC', 'W1', {'title': 'T', 'abstract': '', 'total_citations': 0})
+    assert keys == ['doi:10.1/abc', 'doi:10.1/abc|title']
+    # Without a DOI the source id identifies the paper
+    assert record_keys(None, 'W1', ['title']) == ['id:W1', 'id:W1|title']
+    assert record_keys(None, None, {'title': 'T'}) == []
+    assert normalize_doi('doi:10.1/X') == '10.1/x'
+
+def test_dedup_filter_skips_only_records_without_new_fields():
+    dedup = DedupFilter(capacity=1000)
+    dedup.add('10.1/a', None, {'title': 'T', 'abstract': 'A'})
+
+    assert dedup.seen('10.1/A', None, {'title': 'Other title', 'abstract': 'A'})
+    assert dedup.seen('https://doi.org/10.1/a', 'W9', {'title': 'T'})
+    # A citation count would fill a placeholder, so the record is written
+    assert not dedup.seen('10.1/a', None, {'title': 'T', 'total_citations': 12})
+    assert not dedup.seen('10.1/b', None, {'title': 'T'})
+
+def test_dedup_filter_keys_links_by_source():
+    dedup = DedupFilter(capacity=1000)
+    dedup.add('10.1/a', None, {'title': 'T', 'authors': ['Ada'], 'concepts': []}, 'arxiv')
+
+    assert record_keys('10.1/a', None, {'title': 'T', 'authors': ['Ada']}, 'arxiv') == [
+        'doi:10.1/a', 'doi:10.1/a|title', 'doi:10.1/a|authors@arxiv']
+    assert dedup.seen('10.1/a', None, {'title': 'T', 'authors': ['Ada']}, 'arxiv')
+    # Another source links its own authors and concepts, so its record is written
+    assert not dedup.seen('10.1/a', None, {'title': 'T', 'authors': ['Ada']}, 'openalex')
+    assert not dedup.seen('10.1/a', None, {'title': 'T', 'concepts': ['ML']}, 'arxiv')
+
+def test_dedup_filter_warms_from_papers():
+    db_manager = MagicMock()
+    db_manager.get_paper_fields.side_effect = [
+        [(1, '10.1/a', 'W1', ['title', 'authors']), (2, None, 'W2', ['title'])],
+        [],
+    ]
+    dedup = DedupFilter(capacity=1000)
+    dedup.warm(db_manager, chunk_size=2)
+
+    assert dedup.papers == 2
+    assert dedup.seen(None, 'W2', {'title': 'T'})
+    # Stored links are not attributed to a source, so records with links are written again
+    assert not dedup.seen('10.1/a', None, {'title': 'T', 'authors': ['Ada']}, 'openalex')
+    assert not dedup.seen('10.1/a', None, {'title': 'T', 'abstract': 'new'})
+    db_manager.get_paper_fields.assert_called_with(2, 2)
@@ -0,0 +1,41 @@
+import json
+from unittest.mock import MagicMock
+from app.database.harvest import ResumableHarvest
+
+def test_new_harvest_starts_from_the_beginning():
+    db_manager = MagicMock()
+    db_manager.get_harvest_checkpoint.return_value = None
+
+    harvest = ResumableHarvest(db_manager, 'crossref', 'graphene', max_results=100)
+
+    assert harvest.resume_from is None
+    assert harvest.remaining == 100
+    assert not harvest.done
+
+def test_harvest_resumes_from_checkpoint():
+    db_manager = MagicMock()
+    db_manager.get_harvest_checkpoint.return_value = (json.dumps(['c1', 40]), 240, False)
+
+    harvest = ResumableHarvest(db_manager, 'openalex', 'graphene', max_results=1000)
+    assert harvest.resume_from == ['c1', 40]
+    assert harvest.remaining == 760
+
+    harvest.save(['c2', 10], 170)
+    db_manager.set_harvest_checkpoint.assert_called_with('openalex', 'graphene', json.dumps(['c2', 10]), 410)
+    db_manager.commit_batch.assert_called_once()
+
+    harvest.finish(exhausted=True)
+    db_manager.set_harvest_checkpoint.assert_called_with('openalex', 'graphene', json.dumps(['c2', 10]), 410, True)
+
+def test_completed_harvest_is_done_unless_refreshed():
+    db_manager = MagicMock()
+    db_manager.get_harvest_checkpoint.return_value = ('120', 120, True)
+
+    assert ResumableHarvest(db_manager, 'crossref', 'graphene', max_results=5000).done
+    # Reaching max_results also completes a harvest that could go on
+    db_manager.get_harvest_checkpoint.return_value = ('120', 120, False)
+    assert ResumableHarvest(db_manager, 'crossref', 'graphene', max_results=100).done
+
+    refreshed = ResumableHarvest(db_manager, 'crossref', 'graphene', max_results=100, refresh=True)
+    assert not refreshed.done
+    assert refreshed.resume_from is None
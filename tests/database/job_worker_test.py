@@ -0,0 +1,69 @@
+from unittest.mock import MagicMock, patch
+from app.database import job_worker
+from app.database.job_worker import run_job, run_worker
+
+@patch('app.database.job_worker.JobHeartbeat')
+def test_run_job_records_result(mock_heartbeat):
+    db_manager = MagicMock()
+    handler = MagicMock(return_value={'updated': 7})
+
+    with patch.dict(job_worker.JOB_HANDLERS, {'enrich': handler}):
+        assert run_job(db_manager, 3, 'enrich', {'source': 'openalex'})
+
+    handler.assert_called_once_with({'source': 'openalex'})
+    db_manager.finish_job.assert_called_once_with(3, result={'updated': 7})
+    mock_heartbeat.return_value.start.return_value.stop.assert_called_once()
+    # Enrichment refreshes paper_features, so the ranking snapshot is exported again
+    db_manager.enqueue_job.assert_called_once_with('snapshot', created_by='enrich job 3', unless_queued=True)
+
+@patch('app.database.job_worker.JobHeartbeat')
+def test_run_job_does_not_snapshot_after_other_jobs(mock_heartbeat):
+    db_manager = MagicMock()
+    with patch.dict(job_worker.JOB_HANDLERS, {'retrain': MagicMock(return_value={})}):
+        assert run_job(db_manager, 4, 'retrain', {})
+    db_manager.enqueue_job.assert_not_called()
+
+@patch('app.database.job_worker.JobHeartbeat')
+def test_run_job_records_failure(mock_heartbeat):
+    db_manager = MagicMock()
+    handler = MagicMock(side_effect=SystemExit(1))
+
+    with patch.dict(job_worker.JOB_HANDLERS, {'metrics': handler}):
+        assert not run_job(db_manager, 4, 'metrics', {})
+    assert not run_job(db_manager, 5, 'unknown', {})
+
+    db_manager.finish_job.assert_any_call(4, error='1')
+    db_manager.finish_job.assert_any_call(5, error="Unknown job kind 'unknown'.")
+
+@patch('app.database.job_worker.run_job')
+@patch('app.database.job_worker.DatabaseManager')
+def test_run_worker_once_drains_the_queue(mock_db_manager, mock_run_job):
+    db_manager = mock_db_manager.return_value
+    db_manager.requeue_stale_jobs.return_value = 0
+    db_manager.claim_job.side_effect = [(1, 'ingest', {'query': 'graphene'}), (2, 'retrain', {}), None]
+
+    assert run_worker(kinds=['ingest', 'retrain'], once=True, worker='w1') == 2
+
+    db_manager.claim_job.assert_called_with('w1', ['ingest', 'retrain'])
+    mock_run_job.assert_any_call(db_manager, 1, 'ingest', {'query': 'graphene'})
+    db_manager.close.assert_called_once()
+
+@patch('app.database.populate_db.DatabaseSearchService')
+def test_run_ingest_harvests_the_query(mock_search_service):
+    mock_search_service.return_value.search_and_store.return_value = {'OpenAlex': {'inserted': 2}}
+
+    assert job_worker.run_ingest({'query': 'graphene', 'num_articles': 25}) == {'OpenAlex': {'inserted': 2}}
+    mock_search_service.assert_called_once_with(query='graphene', num_articles=25, refresh=False)
+
+@patch('app.database.semantic_scholar_db_wrapper.SemanticScholarDbWrapper')
+@patch('app.database.job_worker.DatabaseManager')
+def test_run_enrich_refreshes_paper_features(mock_db_manager, mock_wrapper):
+    mock_wrapper.return_value.update_existing_entries.return_value = 4
+
+    assert job_worker.run_enrich({'source': 'semantic_scholar', 'max_pages': 1}) == {'updated': 4}
+    mock_db_manager.return_value.refresh_paper_features.assert_called_once()
+
+    mock_db_manager.reset_mock()
+    mock_wrapper.return_value.update_existing_entries.return_value = 0
+    job_worker.run_enrich({'source': 'semantic_scholar'})
+    mock_db_manager.return_value.refresh_paper_features.assert_not_called()
@@ -0,0 +1,54 @@
+import pytest
+from unittest.mock import MagicMock
+from app.database.migrate import MigrationRunner, discover_migrations, main
+
+@pytest.fixture
+def runner():
+    db_manager = MagicMock()
+    return MigrationRunner(db_manager=db_manager)
+
+def executed_sql(runner):
+    return [c.args[0] for c in runner.db_manager.cursor.execute.call_args_list]
+
+def test_discover_migrations():
+    migrations = discover_migrations()
+    versions = [migration.version for migration in migrations]
+    assert versions == sorted(versions)
+    assert versions[:2] == [1, 2]
+    # Every migration must be reversible
+    for migration in migrations:
+        assert migration.up_path and migration.down_path
+
+def test_upgrade_applies_pending_migrations(runner):
+    runner.db_manager.cursor.fetchall.return_value = [(1,)]
+    applied = runner.upgrade()
+    assert applied == [m.version for m in runner.migrations if m.version > 1]
+    runner.db_manager.set_autocommit.assert_called_once_with(False)
+    assert any("CREATE INDEX IF NOT EXISTS ix_paper_authors_author_id" in q for q in executed_sql(runner))
+
+def test_upgrade_to_target(runner):
+    runner.db_manager.cursor.fetchall.return_value = []
+    assert runner.upgrade(target=1) == [1]
+
+def test_downgrade(runner):
+    runner.db_manager.cursor.fetchall.return_value = [(m.version,) for m in runner.migrations]
+    rolled_back = runner.downgrade(1)
+    assert rolled_back == [m.version for m in reversed(runner.migrations) if m.version > 1]
+    assert any("DROP INDEX IF EXISTS ix_paper_authors_author_id" in q for q in executed_sql(runner))
+
+def test_downgrade_refuses_to_drop_initial_schema(runner):
+    with pytest.raises(ValueError):
+        runner.downgrade(0)
+    runner.db_manager.cursor.execute.assert_not_called()
+    with pytest.raises(SystemExit):
+        main(['downgrade', '0'])
+    # The down script fails on its own too, if it is ever run directly
+    initial_schema = runner.migrations[0]
+    assert "RAISE EXCEPTION" in initial_schema.read('down')
+    assert "DROP TABLE" not in initial_schema.read('down')
+
+def test_status(runner):
+    runner.db_manager.cursor.fetchall.return_value = [(1,)]
+    status = runner.status()
+    assert status[0] == (1, 'initial_schema', True)
+    assert status[1] == (2, 'hot_path_indexes', False)
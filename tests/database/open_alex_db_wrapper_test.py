@@ -114,8 +114,9 @@
 #     openalex_wrapper.db_manager.close.assert_called_once()
 
 import unittest
-from unittest.mock import Mock, patch
-from app.database.open_alex_db_wrapper import OpenAlexDbWrapper
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, MagicMock, patch
+from app.database.open_alex_db_wrapper import OpenAlexDbWrapper, normalize_doi
 
 class TestOpenAlexDbWrapper(unittest.TestCase):
 
@@ -123,6 +124,8 @@ class TestOpenAlexDbWrapper(unittest.TestCase):
     @patch('app.database.open_alex_db_wrapper.DatabaseManager')
     def setUp(self, mock_db_manager, mock_api_handler):
         self.mock_db_manager = mock_db_manager.return_value
+        self.mock_db_manager.get_harvest_checkpoint.return_value = None
+        self.mock_db_manager.batch_failed.return_value = False
         self.mock_api_handler = mock_api_handler.return_value
         self.wrapper = OpenAlexDbWrapper()
 
@@ -151,19 +154,21 @@ class TestOpenAlexDbWrapper(unittest.TestCase):
                 {'display_name': 'Computer Science', 'id': 'C123', 'score': 0.9}
             ]
         }
-        self.mock_api_handler.query.return_value = [mock_result]
+        self.mock_api_handler.harvest.return_value = [(None, mock_result)]
         self.mock_db_manager.insert_paper.return_value = 1
         self.mock_db_manager.insert_author.return_value = 1
         self.mock_db_manager.insert_concept.return_value = 1
 
         self.wrapper.query_and_store("test query", 1)
 
-        self.mock_api_handler.query.assert_called_once_with("test query", max_results=1)
+        self.mock_api_handler.harvest.assert_called_once_with("test query", max_results=1, resume_from=None)
         self.mock_db_manager.insert_paper.assert_called_once()
         self.mock_db_manager.insert_author.assert_called_once()
         self.mock_db_manager.insert_paper_author.assert_called_once()
         self.mock_db_manager.insert_concept.assert_called_once()
-        self.mock_db_manager.insert_paper_concept.assert_called_once()
+        self.mock_db_manager.upsert_paper_concepts.assert_called_once_with([(1, 1, 0.9)])
+        self.mock_db_manager.copy_pending_citations.assert_called_once_with([(1, 'ref1'), (1, 'ref2')])
+        self.mock_db_manager.resolve_pending_citations.assert_called_once()
         self.mock_db_manager.close.assert_called_once()
 
     def test_reconstruct_abstract(self):
@@ -179,7 +184,7 @@ class TestOpenAlexDbWrapper(unittest.TestCase):
         result = self.wrapper.reconstruct_abstract(None)
         self.assertIsNone(result)
 
-    # @patch('app.database.open_alex_db_wrapper.requests.get')
+    # @patch('app.database.APIs.http_client.HttpClient.get')
     # def test_update_existing_entries(self, mock_get):
     #     self.mock_db_manager.get_entries_with_placeholders.return_value = [
     #         (1, 'W123', '10.1234/test', 'Test Paper', 2023)
@@ -194,7 +199,7 @@ class TestOpenAlexDbWrapper(unittest.TestCase):
     #     mock_get.assert_called_once_with('https://api.openalex.org/works/W123')
     #     self.mock_db_manager.update_paper_entry.assert_called_once_with(1, {'id': 'W123', 'title': 'Updated Test Paper'})
 
-    @patch('app.database.open_alex_db_wrapper.requests.get')
+    @patch('app.database.APIs.http_client.HttpClient.get')
     def test_fetch_openalex_data_doi(self, mock_get):
         mock_response = Mock()
         mock_response.json.return_value = {'id': 'W123', 'title': 'Test Paper'}
@@ -205,7 +210,7 @@ class TestOpenAlexDbWrapper(unittest.TestCase):
         mock_get.assert_called_once_with('https://api.openalex.org/works/doi:10.1234/test')
         self.assertEqual(result, {'id': 'W123', 'title': 'Test Paper'})
 
-    @patch('app.database.open_alex_db_wrapper.requests.get')
+    @patch('app.database.APIs.http_client.HttpClient.get')
     def test_fetch_openalex_data_openalex_id(self, mock_get):
         mock_response = Mock()
         mock_response.json.return_value = {'id': 'W123', 'title': 'Test Paper'}
@@ -216,7 +221,7 @@ class TestOpenAlexDbWrapper(unittest.TestCase):
         mock_get.assert_called_once_with('https://api.openalex.org/works/W123')
         self.assertEqual(result, {'id': 'W123', 'title': 'Test Paper'})
 
-    @patch('app.database.open_alex_db_wrapper.requests.get')
+    @patch('app.database.APIs.http_client.HttpClient.get')
     def test_fetch_openalex_data_title_year(self, mock_get):
         mock_response = Mock()
         mock_response.json.return_value = {'results': [{'id': 'W123', 'title': 'Test Paper'}]}
@@ -227,7 +232,7 @@ class TestOpenAlexDbWrapper(unittest.TestCase):
         mock_get.assert_called_once_with('https://api.openalex.org/works?filter=title.search:Test+Paper AND publication_year:2023')
         self.assertEqual(result, {'id': 'W123', 'title': 'Test Paper'})
 
-    @patch('app.database.open_alex_db_wrapper.requests.get')
+    @patch('app.database.APIs.http_client.HttpClient.get')
     def test_fetch_openalex_data_no_match(self, mock_get):
         mock_response = Mock()
         mock_response.json.return_value = {'results': []}
@@ -237,7 +242,7 @@ class TestOpenAlexDbWrapper(unittest.TestCase):
 
         self.assertIsNone(result)
 
-    # @patch('app.database.open_alex_db_wrapper.requests.get')
+    # @patch('app.database.APIs.http_client.HttpClient.get')
     # def test_fetch_openalex_data_error(self, mock_get):
     #     mock_get.side_effect = Exception("API Error")
 
@@ -245,5 +250,84 @@ class TestOpenAlexDbWrapper(unittest.TestCase):
 
     #     self.assertIsNone(result)
 
+    @patch('builtins.print')
+    @patch('app.database.open_alex_db_wrapper.DatabaseManager')
+    def test_update_existing_entries_pages_from_watermark(self, mock_db_class, mock_print):
+        db_manager = mock_db_class.return_value
+        db_manager.get_enrichment_watermark.return_value = 10
+        db_manager.get_entries_with_placeholders.side_effect = [
+            [(11, 'W11', '10.1/a', 'A', 2020), (12, 'W12', None, 'B', 2021)],
+            [(15, 'W15', None, 'C', 2022)],
+            [],
+        ]
+        db_manager.commit_batch.return_value = True
+
+        def fetch_page(entries, executor):
+            return {entry[0]: {'id': entry[1]} for entry in entries if entry[1] != 'W12'}
+
+        with patch.object(self.wrapper, 'fetch_openalex_page', side_effect=fetch_page):
+            updated = self.wrapper.update_existing_entries(page_size=2, max_workers=2)
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(
+            [call.kwargs for call in db_manager.get_entries_with_placeholders.call_args_list],
+            [{'after_id': 10, 'limit': 2}, {'after_id': 12, 'limit': 2}, {'after_id': 15, 'limit': 2}]
+        )
+        db_manager.update_paper_entry.assert_any_call(11, {'id': 'W11'})
+        db_manager.update_paper_entry.assert_any_call(15, {'id': 'W15'})
+        self.assertEqual(db_manager.update_paper_entry.call_count, 2)
+        # Watermark advances with each page and is reset once the sweep is done
+        self.assertEqual(
+            [call.args[1] for call in db_manager.set_enrichment_watermark.call_args_list], [12, 15, 0]
+        )
+        db_manager.close.assert_called_once()
+
+    @patch('builtins.print')
+    @patch('app.database.open_alex_db_wrapper.DatabaseManager')
+    def test_update_existing_entries_max_pages(self, mock_db_class, mock_print):
+        db_manager = mock_db_class.return_value
+        db_manager.get_enrichment_watermark.return_value = 0
+        db_manager.get_entries_with_placeholders.return_value = [(1, 'W1', None, 'A', 2020)]
+
+        with patch.object(self.wrapper, 'fetch_openalex_page', return_value={}):
+            self.wrapper.update_existing_entries(page_size=1, max_pages=1)
+
+        db_manager.get_entries_with_placeholders.assert_called_once_with(after_id=0, limit=1)
+        db_manager.set_enrichment_watermark.assert_called_once_with('openalex_placeholders', 1)
+
+    @patch('app.database.APIs.http_client.HttpClient.get')
+    def test_fetch_openalex_page_batches_ids(self, mock_get):
+        def reply(url, params):
+            response = MagicMock()
+            values = params['filter'].split(':', 1)[1].split('|')
+            if params['filter'].startswith('doi:'):
+                works = [{'id': f'https://openalex.org/W{i}', 'doi': f'https://doi.org/{doi.upper()}'} for i, doi in enumerate(values)]
+            else:
+                works = [{'id': f'https://openalex.org/{value}'} for value in values]
+            response.json.return_value = {'results': works}
+            return response
+        mock_get.side_effect = reply
+        entries = [(paper_id, None, f'https://doi.org/10.1/{paper_id}', 'T', 2020) for paper_id in range(1, 61)]
+        entries += [(61, 'W61', None, 'T', 2020), (62, 'W62', None, None, None),
+                    (63, 'CROSSREF_PAPER_x', None, 'Title Only', 2021)]
+
+        with ThreadPoolExecutor(max_workers=2) as executor, \
+                patch.object(self.wrapper, 'fetch_openalex_data', return_value={'id': 'single'}) as mock_single:
+            results = self.wrapper.fetch_openalex_page(entries, executor)
+
+        # 60 DOIs in two filter requests, two real work ids in one, the title-only paper on its own
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(len(mock_get.call_args_list[0].kwargs['params']['filter'].split('|')), 50)
+        self.assertEqual(mock_get.call_args_list[0].kwargs['params']['per-page'], 200)
+        mock_single.assert_called_once_with(None, None, 'Title Only', 2021)
+        self.assertEqual(len(results), 63)
+        self.assertEqual(results[61], {'id': 'https://openalex.org/W61'})
+        self.assertEqual(results[63], {'id': 'single'})
+
+    def test_normalize_doi(self):
+        self.assertEqual(normalize_doi('https://doi.org/10.1/ABC '), '10.1/abc')
+        self.assertEqual(normalize_doi('doi:10.1/x'), '10.1/x')
+        self.assertIsNone(normalize_doi(None))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
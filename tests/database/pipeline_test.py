@@ -0,0 +1,126 @@
+import time
+import threading
+import pytest
+from app.database.pipeline import IngestionPipeline, format_stats
+
+def test_pipeline_normalizes_and_writes_in_batches():
+    batches = []
+    def write_batch(records):
+        batches.append(list(records))
+        return len(records)
+
+    pipeline = IngestionPipeline(
+        lambda: iter(range(10)),
+        write_batch,
+        normalize=lambda n: None if n % 5 == 0 else n * 10,  # None drops a result
+        batch_size=3,
+        normalize_workers=3
+    )
+    assert pipeline.run() == 8
+
+    assert sorted(r for batch in batches for r in batch) == [10, 20, 30, 40, 60, 70, 80, 90]
+    assert all(len(batch) <= 3 for batch in batches)
+    stats = pipeline.stats()
+    assert list(stats) == ['fetch', 'normalize', 'write']
+    assert stats['fetch']['items'] == 10
+    assert stats['normalize']['items'] == 10
+    assert stats['write']['items'] == 8
+    assert pipeline.processed == 10
+    assert 'write' in format_stats(stats)
+
+def test_bounded_queue_applies_backpressure():
+    fetched = []
+    release = threading.Event()
+    def fetch():
+        for n in range(20):
+            fetched.append(n)
+            yield n
+    def write_batch(records):
+        release.wait(timeout=5)
+        return len(records)
+
+    pipeline = IngestionPipeline(fetch, write_batch, batch_size=1, queue_size=2)
+    runner = threading.Thread(target=pipeline.run)
+    runner.start()
+    time.sleep(0.3)
+    # The writer holds one record and the queue two more; fetching waits for room
+    assert len(fetched) <= 4
+    release.set()
+    runner.join(timeout=5)
+    assert pipeline.inserted == 20
+
+def test_fetch_error_still_writes_fetched_results():
+    written = []
+    def fetch():
+        yield 1
+        yield 2
+        raise RuntimeError("API went away")
+
+    pipeline = IngestionPipeline(fetch, lambda records: written.extend(records) or len(records))
+    with pytest.raises(RuntimeError, match="API went away"):
+        pipeline.run()
+    assert written == [1, 2]
+    assert pipeline.inserted == 2
+
+def test_write_error_stops_the_pipeline():
+    def write_batch(records):
+        raise ValueError("disk full")
+
+    pipeline = IngestionPipeline(lambda: iter(range(10000)), write_batch, queue_size=5)
+    with pytest.raises(ValueError, match="disk full"):
+        pipeline.run()
+    assert pipeline.processed < 10000
+
+def test_stages_overlap():
+    # Fetching and writing each take about 5 ms per item; run back to back that is 100 ms
+    def fetch():
+        for n in range(10):
+            time.sleep(0.005)
+            yield n
+    def write_batch(records):
+        time.sleep(0.005 * len(records))
+        return len(records)
+
+    start = time.perf_counter()
+    IngestionPipeline(fetch, write_batch).run()
+    assert time.perf_counter() - start < 0.09
+
+def test_checkpoint_reports_the_written_prefix():
+    checkpoints = []
+    def fetch():
+        for n in range(7):
+            yield f"pos{n}", n
+
+    pipeline = IngestionPipeline(
+        fetch,
+        lambda records: len(records),
+        normalize=lambda n: None if n == 3 else n,  # Dropped results still advance the checkpoint
+        batch_size=2,
+        normalize_workers=2,
+        checkpoint=lambda position, processed: checkpoints.append((position, processed)),
+        checkpoint_interval=0
+    )
+    assert pipeline.run() == 6
+
+    assert checkpoints[-1] == ("pos6", 7)
+    # Reported positions only move forward and always match their processed count
+    assert all(position == f"pos{processed - 1}" for position, processed in checkpoints)
+    assert [processed for _, processed in checkpoints] == sorted({processed for _, processed in checkpoints})
+
+def test_checkpoint_stops_before_a_failed_batch():
+    checkpoints = []
+    def write_batch(records):
+        if 4 in records:
+            raise ValueError("disk full")
+        return len(records)
+
+    pipeline = IngestionPipeline(
+        lambda: ((n, n) for n in range(10)),
+        write_batch,
+        batch_size=2,
+        checkpoint=lambda position, processed: checkpoints.append((position, processed)),
+        checkpoint_interval=0
+    )
+    with pytest.raises(ValueError, match="disk full"):
+        pipeline.run()
+    assert checkpoints[-1] == (3, 4)
@@ -1,9 +1,11 @@
 import pytest
-from unittest.mock import patch
+import threading
+from unittest.mock import patch, ANY
 from app.database.arXiv_db_wrapper import ArxivDbWrapper
 from app.database.crossref_db_wrapper import CrossRefDbWrapper
 from app.database.open_alex_db_wrapper import OpenAlexDbWrapper
 from app.database.semantic_scholar_db_wrapper import SemanticScholarDbWrapper
+from app.database.populate_db import DatabaseSearchService
 
 @pytest.fixture
 def mock_wrappers():
@@ -103,3 +105,99 @@ def test_all_wrappers_query_exception_handling(mock_wrappers):
     mock_wrappers['crossref'].assert_called_once_with(query, max_results)
     mock_wrappers['openalex'].assert_called_once_with(query, max_results)
     mock_wrappers['semanticscholar'].assert_called_once_with(query, max_results)
+
+
+@pytest.fixture
+def search_service():
+    with patch('app.database.populate_db.DatabaseManager') as mock_db_manager, \
+         patch('app.database.populate_db.get_dedup_filter') as mock_get_dedup_filter, \
+         patch('app.database.populate_db.ArxivDbWrapper'), \
+         patch('app.database.populate_db.CrossRefDbWrapper'), \
+         patch('app.database.populate_db.OpenAlexDbWrapper'), \
+         patch('app.database.populate_db.SemanticScholarDbWrapper'):
+        service = DatabaseSearchService("graph neural networks", 5)
+        service.db_manager_class = mock_db_manager
+        service.dedup_factory = mock_get_dedup_filter
+        yield service
+
+def test_search_and_store_runs_sources_concurrently(search_service):
+    # Every source waits for the other three, so this only completes if they run at the same time
+    barrier = threading.Barrier(4, timeout=5)
+
+    def query_and_store(query, max_results, refresh, quota):
+        barrier.wait()
+        return {'processed': max_results, 'inserted': 2, 'error': None}
+
+    wrappers = [search_service.arxiv_db, search_service.crossref_db,
+                search_service.openalex_db, search_service.semantic_scholar_db]
+    for wrapper in wrappers:
+        wrapper.query_and_store.side_effect = query_and_store
+
+    summary = search_service.search_and_store()
+
+    assert set(summary) == {'arXiv', 'CrossRef', 'OpenAlex', 'Semantic Scholar'}
+    for stats in summary.values():
+        assert stats['processed'] == 5
+        assert stats['inserted'] == 2
+        assert stats['error'] is None
+        assert stats['seconds'] >= 0
+    for wrapper in wrappers:
+        wrapper.query_and_store.assert_called_once_with("graph neural networks", 5, refresh=False, quota=ANY)
+    search_service.db_manager_class.open_pool.assert_called_once()
+    search_service.dedup_factory.assert_called_once()
+    search_service.db_manager_class.return_value.refresh_paper_features.assert_called_once()
+
+def test_search_and_store_reports_source_errors(search_service):
+    search_service.arxiv_db.query_and_store.side_effect = Exception("Arxiv API Error")
+    for wrapper in [search_service.crossref_db, search_service.openalex_db, search_service.semantic_scholar_db]:
+        wrapper.query_and_store.return_value = {'processed': 1, 'inserted': 1, 'error': None}
+
+    summary = search_service.search_and_store()
+
+    assert summary['arXiv']['error'] == "Arxiv API Error"
+    assert summary['arXiv']['inserted'] == 0
+    assert summary['CrossRef']['inserted'] == 1
+
+def test_search_and_store_shares_one_quota(search_service):
+    quotas = []
+
+    def query_and_store(query, max_results, refresh, quota):
+        quotas.append(quota)
+        return {'processed': 0, 'inserted': 0, 'error': None}
+
+    wrappers = [search_service.arxiv_db, search_service.crossref_db,
+                search_service.openalex_db, search_service.semantic_scholar_db]
+    for wrapper in wrappers:
+        wrapper.query_and_store.side_effect = query_and_store
+
+    summary = search_service.search_and_store()
+
+    assert len(set(map(id, quotas))) == 1
+    assert quotas[0].total == 5
+    assert set(quotas[0].sources) == {'arxiv', 'crossref', 'openalex', 'semantic_scholar'}
+    assert all(stats['new'] == 0 for stats in summary.values())
+
+def test_search_and_store_even_allocation(search_service):
+    search_service.allocation = 'even'
+    wrappers = [search_service.arxiv_db, search_service.crossref_db,
+                search_service.openalex_db, search_service.semantic_scholar_db]
+    for wrapper in wrappers:
+        wrapper.query_and_store.return_value = {'processed': 2, 'inserted': 2, 'error': None}
+
+    search_service.search_and_store()
+
+    for wrapper in wrappers:
+        wrapper.query_and_store.assert_called_once_with("graph neural networks", 2, refresh=False, quota=None)
+
+@patch('app.database.populate_db.compress_abstracts')
+def test_search_and_store_compresses_new_abstracts(mock_compress_abstracts, search_service):
+    search_service.abstract_storage = 'compressed'
+    for wrapper in [search_service.arxiv_db, search_service.crossref_db,
+                    search_service.openalex_db, search_service.semantic_scholar_db]:
+        wrapper.query_and_store.return_value = {'processed': 1, 'inserted': 1, 'error': None}
+
+    search_service.search_and_store()
+
+    db_manager = search_service.db_manager_class.return_value
+    mock_compress_abstracts.assert_called_once_with(db_manager)
+    db_manager.refresh_paper_features.assert_called_once()
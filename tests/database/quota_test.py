@@ -0,0 +1,54 @@
+import threading
+from app.database.quota import QuotaAllocator
+
+def test_grants_shift_toward_sources_yielding_new_papers():
+    quota = QuotaAllocator(1000, ['fast', 'duplicates'], max_grant=1000)
+    for _ in range(5):
+        quota.record('fast', 10, 10)
+        quota.record('duplicates', 10, 0)
+
+    assert quota._weights()['duplicates'] == 0
+    assert quota._grant('fast') > 100
+    assert quota._grant('duplicates') == 1
+
+def test_sources_stop_once_the_quota_is_met():
+    quota = QuotaAllocator(3, ['a', 'b'])
+
+    assert quota.take('a')
+    quota.record('a', 1, 1)
+    assert quota.take('b')
+    quota.record('b', 2, 2)
+
+    assert not quota.take('a')
+    assert quota.cut_short == {'a'}
+    assert quota.new == 3
+
+def test_limit_waits_for_results_in_flight():
+    quota = QuotaAllocator(100, ['a'])
+    # 98 of 98 results were new so far, so 2 more papers need about 3 results
+    state = quota.sources['a']
+    state.granted = state.taken = state.processed = state.new = 98
+    results = quota.limit('a', range(100))
+    taken = [next(results) for _ in range(3)]
+    # The results in flight could still cover the quota, so the next take waits for them
+    fourth = []
+    thread = threading.Thread(target=lambda: fourth.append(next(results, None)))
+    thread.start()
+    thread.join(timeout=0.2)
+    assert thread.is_alive()
+
+    # Two turn out to be duplicates, so one more result is needed
+    quota.record('a', 3, 1)
+    thread.join(timeout=5)
+    assert taken + fourth == [0, 1, 2, 3]
+
+def test_limit_hands_back_unused_quota_at_the_end_of_results():
+    quota = QuotaAllocator(10, ['short', 'long'], max_grant=10)
+
+    assert list(quota.limit('short', range(2))) == [0, 1]
+
+    state = quota.sources['short']
+    assert not state.active
+    assert state.granted == state.taken == 2
+    assert 'short' not in quota.cut_short
+    assert set(quota._weights()) == {'long'}
@@ -10,6 +10,8 @@ def semantic_scholar_wrapper():
          patch.object(api_handler, "__init__", lambda x, api_key=None: None):
         wrapper = SemanticScholarDbWrapper()
         wrapper.db_manager = MagicMock(spec=DatabaseManager)
+        wrapper.db_manager.batch_failed.return_value = False
+        wrapper.db_manager.get_harvest_checkpoint.return_value = None
         wrapper.api_handler = MagicMock(spec=api_handler)
         return wrapper
 
@@ -31,7 +33,7 @@ def test_query_and_store_paper(semantic_scholar_wrapper):
         "influentialCitationCount": 5
     }
 
-    semantic_scholar_wrapper.api_handler.query.return_value = [mock_result]
+    semantic_scholar_wrapper.api_handler.harvest.return_value = [(None, mock_result)]
     semantic_scholar_wrapper.db_manager.insert_paper.return_value = 1
     semantic_scholar_wrapper.db_manager.insert_author.return_value = 2
     semantic_scholar_wrapper.db_manager.insert_paper_author.return_value = None
@@ -54,7 +56,7 @@ def test_query_and_store_with_missing_data(semantic_scholar_wrapper):
         "authors": []  # Missing author data
     }
 
-    semantic_scholar_wrapper.api_handler.query.return_value = [mock_result]
+    semantic_scholar_wrapper.api_handler.harvest.return_value = [(None, mock_result)]
     semantic_scholar_wrapper.db_manager.insert_paper.return_value = None  # Paper insertion fails
 
     semantic_scholar_wrapper.query_and_store(query="artificial intelligence", max_results=1)
@@ -66,7 +68,7 @@ def test_query_and_store_with_missing_data(semantic_scholar_wrapper):
     semantic_scholar_wrapper.db_manager.insert_paper_author.assert_not_called()
 
 def test_query_and_store_exception_handling(semantic_scholar_wrapper):
-    semantic_scholar_wrapper.api_handler.query.side_effect = Exception("API Error")
+    semantic_scholar_wrapper.api_handler.harvest.side_effect = Exception("API Error")
 
     semantic_scholar_wrapper.query_and_store(query="quantum computing", max_results=1)
 
@@ -87,3 +89,46 @@ def test_db_manager_close(semantic_scholar_wrapper):
     semantic_scholar_wrapper.db_manager.close = MagicMock()
     semantic_scholar_wrapper.query_and_store(query="deep learning", max_results=1)
     semantic_scholar_wrapper.db_manager.close.assert_called_once()
+
+@patch('app.database.semantic_scholar_db_wrapper.DatabaseManager')
+def test_update_existing_entries(mock_db_class, semantic_scholar_wrapper):
+    db_manager = mock_db_class.return_value
+    db_manager.get_enrichment_watermark.return_value = 0
+    db_manager.get_entries_with_placeholders.side_effect = [
+        [(1, 'W1', '10.1/a', 'A', 2020), (2, 'W2', None, 'B', 2021), (3, 'W3', '10.1/c', 'C', 2022)],
+        [],
+    ]
+    db_manager.update_placeholder_fields.return_value = True
+    db_manager.commit_batch.return_value = True
+    semantic_scholar_wrapper.api_handler.batch.return_value = [
+        ('10.1/a', {'citationCount': 12, 'influentialCitationCount': 2, 'abstract': None}),
+    ]
+
+    updated = semantic_scholar_wrapper.update_existing_entries(page_size=3)
+
+    assert updated == 1
+    semantic_scholar_wrapper.api_handler.batch.assert_called_once_with(['10.1/a', '10.1/c'])
+    db_manager.update_placeholder_fields.assert_called_once_with(1, {'total_citations': 12, 'influential_citations': 2})
+    assert [call.args[1] for call in db_manager.set_enrichment_watermark.call_args_list] == [3, 0]
+    db_manager.close.assert_called_once()
+
+@patch('app.database.semantic_scholar_db_wrapper.DatabaseManager')
+def test_update_existing_entries_normalizes_doi_urls(mock_db_class, semantic_scholar_wrapper):
+    db_manager = mock_db_class.return_value
+    db_manager.get_enrichment_watermark.return_value = 0
+    db_manager.get_entries_with_placeholders.side_effect = [
+        [(1, 'W1', 'https://doi.org/10.1/A', 'A', 2020), (2, 'W2', '10.1/a', 'A', 2020)],
+        [],
+    ]
+    db_manager.update_placeholder_fields.return_value = True
+    db_manager.commit_batch.return_value = True
+    semantic_scholar_wrapper.api_handler.batch.return_value = [
+        ('10.1/a', {'citationCount': 5, 'influentialCitationCount': 0, 'abstract': 'An abstract.'}),
+    ]
+
+    updated = semantic_scholar_wrapper.update_existing_entries(page_size=2)
+
+    # Both spellings of the DOI are looked up once, as a bare DOI
+    assert updated == 2
+    semantic_scholar_wrapper.api_handler.batch.assert_called_once_with(['10.1/a'])
+    assert [call.args[0] for call in db_manager.update_placeholder_fields.call_args_list] == [1, 2]
@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+import numpy as np
+import pytest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from app.model import snapshot as snapshot_module
+from unittest.mock import MagicMock, patch
+from app.model.snapshot import write_snapshot, read_manifest, load_snapshot, export_snapshot
+
+DTYPES = {
+    'id': np.int64,
+    'title': object,
+    'journal_h_index': np.float64,
+    'avg_author_h_index': np.float64,
+    'authors': object,
+}
+
+ROW_CHUNKS = [
+    [(1, 'Paper One', 10, Decimal('2.5'), ['Ann', 'Bob'], 'first abstract'),
+     (2, 'Paper Two', None, None, None, None)],
+    [(5, 'Paper Five', 3, Decimal('1'), ['Cy'], 'fifth abstract')],
+]
+
+@pytest.fixture(autouse=True)
+def clear_loaded_snapshots():
+    snapshot_module._loaded_snapshots.clear()
+
+def test_write_and_load_snapshot(tmp_path):
+    manifest = write_snapshot(iter(ROW_CHUNKS), DTYPES, None, str(tmp_path))
+    assert manifest['row_count'] == 3
+    assert read_manifest(str(tmp_path)) == manifest
+
+    snapshot = load_snapshot(str(tmp_path))
+    articles = snapshot.to_frame()
+    assert articles['id'].tolist() == [1, 2, 5]
+    assert articles['title'].tolist() == ['Paper One', 'Paper Two', 'Paper Five']
+    assert articles['avg_author_h_index'].iloc[0] == 2.5
+    assert np.isnan(articles['journal_h_index'].iloc[1])
+    assert articles['authors'].tolist() == [['Ann', 'Bob'], None, ['Cy']]
+    assert 'abstract' not in articles
+    assert list(snapshot.iter_abstracts()) == ['first abstract', '', 'fifth abstract']
+    assert snapshot.get_abstracts([5, 1, 99]) == {5: 'fifth abstract', 1: 'first abstract'}
+
+def test_load_snapshot_is_cached_per_version(tmp_path):
+    write_snapshot(iter(ROW_CHUNKS), DTYPES, None, str(tmp_path))
+    first = load_snapshot(str(tmp_path))
+    assert load_snapshot(str(tmp_path)) is first
+
+    write_snapshot(iter(ROW_CHUNKS[:1]), DTYPES, None, str(tmp_path))
+    second = load_snapshot(str(tmp_path))
+    assert second is not first
+    assert second.manifest['row_count'] == 2
+    # Only the current version is kept on disk
+    assert sorted(os.listdir(tmp_path)) == sorted(['manifest.json', second.manifest['version']])
+
+def test_snapshot_freshness(tmp_path):
+    refreshed_at = '2024-05-01T10:00:00'
+    write_snapshot(iter(ROW_CHUNKS), DTYPES, refreshed_at, str(tmp_path))
+    snapshot = load_snapshot(str(tmp_path))
+    assert snapshot.manifest['features_refreshed_at'] == refreshed_at
+    assert snapshot.is_fresh(refreshed_at)
+    # Refreshed features (new papers or new metrics) make the snapshot stale
+    assert not snapshot.is_fresh('2024-05-01T11:00:00')
+    assert not snapshot.is_fresh(None)
+
+    snapshot.manifest['created_at'] = (datetime.now(timezone.utc) - timedelta(days=2)).isoformat()
+    assert not snapshot.is_fresh(refreshed_at, max_age=3600)
+    assert snapshot.is_fresh(refreshed_at, max_age=0)
+
+def test_export_snapshot_keeps_a_fresh_snapshot(tmp_path):
+    refreshed_at = ['2024-05-01T10:00:00']
+    # export_snapshot imports RankModel the way the app does ('model.RankModel')
+    rank_model = MagicMock(
+        PAPER_FEATURE_DTYPES=DTYPES,
+        iter_article_rows=lambda connection, with_abstracts: iter(ROW_CHUNKS),
+        features_refreshed_at=lambda connection: refreshed_at[0],
+    )
+    with patch.dict(sys.modules, {'model': MagicMock(RankModel=rank_model), 'model.RankModel': rank_model}):
+        first = export_snapshot(MagicMock(), str(tmp_path), force=False)
+        assert export_snapshot(MagicMock(), str(tmp_path), force=False) == first
+
+        refreshed_at[0] = '2024-05-01T11:00:00'
+        second = export_snapshot(MagicMock(), str(tmp_path), force=False)
+    assert second['version'] != first['version']
+    assert second['features_refreshed_at'] == '2024-05-01T11:00:00'
+
+def test_missing_or_foreign_snapshot(tmp_path):
+    assert load_snapshot(str(tmp_path)) is None
+    with open(tmp_path / 'manifest.json', 'w') as file:
+        json.dump({'format': 0}, file)
+    assert read_manifest(str(tmp_path)) is None